@@ -7,11 +7,27 @@ Pipeline Responsibilities:
 --------------------------
 1. Run Sales Agent → identify & select best RFP.
 2. Load the selected RFP JSON document.
-3. Run Technical Agent → compute SKU matches & spec comparisons.
+3. Run Technical Agent → compute SKU matches & spec comparisons against
+   the requested product catalog (catalog id, see CATALOG_REGISTRY).
 4. Run Pricing Agent → compute full costing.
 5. Merge results into a unified RFP response.
 6. Save final output JSON under backend/data/output/.
 
+The Technical Agent runs in the compact output format (deduplicated SKU
+table, see technical_agent.py), which is what gets saved to disk and kept in
+TECHNICAL_RESULTS for on-demand comparison tables; the returned response is
+expanded to the verbose shape unless output_format="compact" is requested
+(comparison_tables=False leaves the tables out of the verbose shape).
+
+Between the two agents the catalog version the Technical Agent ranked
+against is joined with the price table (PRICED_CATALOGS, see
+pricing_agent/priced_catalog.py): every item gets the dense id of its final
+SKU (final_sku_index), which the Pricing Agent reads unit prices by.
+
+The pricing output is kept in PRICING_RESULTS, so what-if scenarios
+(run_pricing_scenario) re-price a processed RFP without re-running the
+pipeline.
+
 This file coordinates the full multi-agent workflow.
 """
 
@@ -29,19 +45,82 @@ sys.path.append(BASE_DIR)
 # IMPORT AGENTS
 # -----------------------------------------------------------
 from agents.sales_agent.sales_agent import run_sales_agent
-from agents.technical_agent.technical_agent import run_technical_agent
-from agents.pricing_agent.pricing_agent import run_pricing_agent
+from agents.technical_agent.technical_agent import (
+    run_technical_agent,
+    expand_technical_output,
+    search_catalog,
+    apply_catalog_delta,
+    TECHNICAL_RESULTS,
+    CATALOG_MANAGER,
+    CATALOG_REGISTRY,
+    DEFAULT_CATALOG_ID,
+    OUTPUT_FORMAT_VERBOSE,
+    OUTPUT_FORMAT_COMPACT,
+    OUTPUT_FORMATS,
+)
+from agents.pricing_agent.pricing_agent import (
+    run_pricing_agent,
+    PRICED_CATALOGS,
+    PRICING_RESULTS,
+    current_pricing_tables,
+)
+from agents.pricing_agent.scenarios import apply_scenario, StalePricingError
 
 # Loader for RFP JSON
 from loaders.json_loader import load_rfp_json
 
 
 
+# -----------------------------------------------------------
+# CATALOG x PRICE TABLE JOIN
+# -----------------------------------------------------------
+
+# joins of catalog versions produced by deltas are derived from the previous join
+PRICED_CATALOGS.set_delta_source(CATALOG_MANAGER.delta_log)
+
+
+def attach_sku_ids(technical_output: dict, catalog_id: str) -> None:
+    """
+    Record the dense id of each item's final SKU (final_sku_index) and the
+    join version in technical_output, for the Pricing Agent. Final SKUs
+    without a unit price are reported here.
+
+    Nothing is recorded when the output names no catalog version (sharded
+    runs) or the catalog changed since the Technical Agent ranked it; the
+    Pricing Agent then looks the SKUs up by key.
+    """
+
+    catalog_version = technical_output.get("catalog_version")
+    if catalog_version is None:
+        return
+
+    with CATALOG_REGISTRY.acquire(catalog_id) as catalog:
+        if catalog.version != catalog_version:
+            print(f"[Main Agent] Catalog {catalog_id} changed since it was ranked; pricing by SKU.")
+            return
+        priced_catalog = PRICED_CATALOGS.get(catalog)
+
+    for item in technical_output.get("items", []):
+        final_sku = item.get("final_recommended_sku")
+        sku_index = priced_catalog.sku_index(final_sku) if final_sku is not None else None
+        item["final_sku_index"] = sku_index
+        if sku_index is not None and priced_catalog.unit_price(sku_index) is None:
+            print(f"[WARNING] Item {item.get('item_index')}: recommended SKU {final_sku} has no unit price")
+    technical_output["priced_catalog_version"] = priced_catalog.version
+
+
+
 # =====================================================================
 # MAIN AGENT PIPELINE
 # =====================================================================
 
-def run_main_agent():
+def run_main_agent(output_format: str = OUTPUT_FORMAT_VERBOSE, comparison_tables: bool = True,
+                   catalog_id: str = DEFAULT_CATALOG_ID):
+    if output_format not in OUTPUT_FORMATS:
+        raise ValueError(f"Unknown output format: {output_format} (expected one of {OUTPUT_FORMATS})")
+    # unknown catalog ids fail before the Sales Agent runs
+    CATALOG_REGISTRY.csv_path(catalog_id)
+
     print("\n==================== MAIN AGENT START ====================\n")
 
     # -------------------------------------------------------
@@ -74,25 +153,31 @@ def run_main_agent():
     # -------------------------------------------------------
     print("\n[Main Agent] Running Technical Agent...")
 
-    product_csv_path = "backend/data/datasets/product_specs.csv"
-
     technical_output = run_technical_agent(
         rfp_json_path,
-        product_csv_path
+        catalog_id=catalog_id,
+        output_format=OUTPUT_FORMAT_COMPACT
     )
 
     print("[Main Agent] Technical Agent completed.")
 
+    # dense SKU ids for the Pricing Agent
+    attach_sku_ids(technical_output, catalog_id)
+
 
     # Save technical output
     os.makedirs("backend/data/tmp", exist_ok=True)
     technical_tmp_path = "backend/data/tmp/technical_output.json"
 
+    # compact output, written without indentation (fast C encoder)
     with open(technical_tmp_path, "w") as f:
-        json.dump(technical_output, f, indent=2)
+        json.dump(technical_output, f, separators=(",", ":"))
 
     print(f"[Main Agent] Technical output saved → {technical_tmp_path}")
 
+    # compact result kept per RFP id; comparison tables are built on request
+    TECHNICAL_RESULTS.put(technical_output)
+
 
     # -------------------------------------------------------
     # STEP 4 — PRICING AGENT
@@ -106,6 +191,9 @@ def run_main_agent():
 
     print("[Main Agent] Pricing Agent completed.")
 
+    # pricing kept per RFP id for what-if scenarios
+    PRICING_RESULTS.put(pricing_output)
+
 
     # -------------------------------------------------------
     # STEP 5 — MERGE OUTPUTS
@@ -125,6 +213,10 @@ def run_main_agent():
             "total_material_cost": pricing_output["totals"]["material_total"],
             "total_test_cost": pricing_output["totals"]["test_total"],
             "grand_total_cost": pricing_output["totals"]["grand_total"],
+            # items whose SKU has no unit price add no material cost: the
+            # grand total of an incomplete quote understates it
+            "unpriced_items": pricing_output["unpriced_items"],
+            "complete": not pricing_output["unpriced_items"],
         }
     }
 
@@ -136,15 +228,42 @@ def run_main_agent():
     final_output_path = "backend/data/output/final_rfp_response.json"
 
     with open(final_output_path, "w") as f:
-        json.dump(final_response, f, indent=2)
+        json.dump(final_response, f, separators=(",", ":"))
 
     print(f"[Main Agent] Final RFP Response saved → {final_output_path}")
+
+    if output_format == OUTPUT_FORMAT_VERBOSE:
+        # the frontend reads top_3 products and comparison tables inline
+        final_response["technical_analysis"] = expand_technical_output(technical_output, comparison_tables)
     print("\n==================== MAIN AGENT END ====================\n")
 
     return final_response
 
 
 
+# =====================================================================
+# WHAT-IF SCENARIOS
+# =====================================================================
+
+def run_pricing_scenario(rfp_id: str, overrides: list):
+    """
+    Re-price a processed RFP under a list of overrides (quantity, SKU from
+    top_3, unit price, test list; see scenarios.py) from its stored pricing
+    and technical results. Returns None when the RFP was not processed;
+    raises ValueError for invalid overrides and StalePricingError when the
+    pricing tables changed since the RFP was priced.
+    """
+
+    pricing_output = PRICING_RESULTS.get(rfp_id)
+    technical_output = TECHNICAL_RESULTS.get(rfp_id)
+    if pricing_output is None or technical_output is None:
+        return None
+
+    tables = current_pricing_tables()
+    return apply_scenario(pricing_output, technical_output, overrides, tables)
+
+
+
 # =====================================================================
 # DIRECT SCRIPT EXECUTION (TEST MODE)
 # =====================================================================
@@ -165,8 +284,8 @@ if __name__ == "__main__":
 
 
     # STEP 2 — TECHNICAL AGENT
-    product_csv = "backend/data/datasets/product_specs.csv"
-    technical_output = run_technical_agent(rfp_json_path, product_csv)
+    technical_output = run_technical_agent(rfp_json_path, catalog_id=DEFAULT_CATALOG_ID)
+    attach_sku_ids(technical_output, DEFAULT_CATALOG_ID)
 
     # Save tech output
     tmp_path = "backend/data/tmp/technical_output.json"
@@ -0,0 +1,130 @@
+"""
+price_tiers.py
+
+Volume (quantity slab) pricing.
+
+product_pricing.csv has one flat unit_price per SKU; real price books drop
+the unit price as the ordered quantity grows, with up to dozens of slabs per
+SKU. product_price_tiers.csv lists them (see pricing_loader.load_price_tiers)
+and PriceTiers compiles them once per pricing tables version into one sorted
+breakpoint array per SKU:
+
+    breakpoints:  min quantities of the slabs, ascending
+    prices:       unit price of each slab
+
+The unit price of a line is found with a binary search for the last
+breakpoint <= quantity, O(log slabs) per line however many slabs a SKU has;
+below the first slab the flat unit_price of the SKU applies. SKUs without
+slabs keep their flat price.
+
+unit_prices() is the batch path the Pricing Agent uses for all items of an
+RFP. With NumPy the slabs of all SKUs are also flattened into one sorted
+array of (SKU slot, min quantity) keys, so every line of the RFP is resolved
+by a single np.searchsorted call; without it, by bisect per line.
+"""
+
+from bisect import bisect_right
+from typing import Dict, List, Optional, Tuple
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+class PriceTiers:
+    """Compiled slabs: {normalized sku key: (breakpoints, prices)}."""
+
+    def __init__(self, tiers: Dict[str, List[Tuple[int, float]]]):
+        # tiers as returned by load_price_tiers (sorted by min quantity)
+        self._breakpoints: Dict[str, Tuple[int, ...]] = {}
+        self._prices: Dict[str, Tuple[float, ...]] = {}
+        for key, slabs in tiers.items():
+            if not slabs:
+                continue
+            self._breakpoints[key] = tuple(quantity for quantity, _ in slabs)
+            self._prices[key] = tuple(price for _, price in slabs)
+
+        # flattened slabs for the batch path, built on first use
+        self._flat = None
+
+    def __len__(self) -> int:
+        return len(self._breakpoints)
+
+    def __contains__(self, key) -> bool:
+        return key in self._breakpoints
+
+    def keys(self):
+        return self._breakpoints.keys()
+
+    def slabs(self) -> int:
+        """Number of slabs over all SKUs."""
+        return sum(len(breakpoints) for breakpoints in self._breakpoints.values())
+
+    def unit_price(self, key: str, quantity: int, base_price: Optional[float]) -> Optional[float]:
+        """Unit price of `quantity` units of the SKU `key` (base_price: its flat price)."""
+
+        breakpoints = self._breakpoints.get(key)
+        if breakpoints is None:
+            return base_price
+        slab = bisect_right(breakpoints, quantity) - 1
+        return self._prices[key][slab] if slab >= 0 else base_price
+
+    def unit_prices(self, keys: List[str], quantities: List[int],
+                    base_prices: List[Optional[float]]) -> List[Optional[float]]:
+        """
+        unit_price() for every line at once (keys, quantities and flat
+        base_prices aligned by line); returns a new list.
+        """
+
+        unit_prices = list(base_prices)
+        if not self._breakpoints:
+            return unit_prices
+
+        if np is None:
+            for position, (key, quantity) in enumerate(zip(keys, quantities)):
+                if key in self._breakpoints:
+                    unit_prices[position] = self.unit_price(key, quantity, base_prices[position])
+            return unit_prices
+
+        slot_of, stride, max_quantity, flat_keys, flat_slots, flat_prices = self._flattened()
+        slots = np.array([slot_of.get(key, -1) for key in keys], dtype=np.int64)
+        tiered = np.flatnonzero(slots >= 0)
+        if not len(tiered):
+            return unit_prices
+
+        # quantities above the largest breakpoint resolve like it, which keeps
+        # slot * stride + quantity inside the slot's key range
+        line_quantities = np.clip(np.array(quantities, dtype=np.int64)[tiered], -1, max_quantity)
+        line_slots = slots[tiered]
+        slabs = np.searchsorted(flat_keys, line_slots * stride + line_quantities + 1, side="right") - 1
+
+        # no slab of the line's SKU at or below its quantity: flat price
+        in_slab = (slabs >= 0) & (flat_slots[np.maximum(slabs, 0)] == line_slots)
+        positions = tiered[in_slab].tolist()
+        prices = flat_prices[slabs[in_slab]].tolist()
+        for position, price in zip(positions, prices):
+            unit_prices[position] = price
+        return unit_prices
+
+    def _flattened(self) -> tuple:
+        """
+        (slot per key, stride, largest breakpoint, keys, slots, prices) of all
+        slabs, sorted by slot * stride + min quantity + 1.
+        """
+
+        if self._flat is None:
+            slot_of = {key: slot for slot, key in enumerate(self._breakpoints)}
+            max_quantity = max(breakpoints[-1] for breakpoints in self._breakpoints.values())
+            stride = max_quantity + 2
+            flat_slots = np.repeat(np.arange(len(slot_of), dtype=np.int64),
+                                   [len(breakpoints) for breakpoints in self._breakpoints.values()])
+            flat_breakpoints = np.fromiter(
+                (quantity for breakpoints in self._breakpoints.values() for quantity in breakpoints), dtype=np.int64
+            )
+            flat_prices = np.fromiter(
+                (price for prices in self._prices.values() for price in prices), dtype=np.float64
+            )
+            self._flat = (slot_of, stride, max_quantity, flat_slots * stride + flat_breakpoints + 1,
+                          flat_slots, flat_prices)
+        return self._flat
@@ -0,0 +1,281 @@
+"""
+priced_catalog.py
+
+Product catalog pre-joined with the product price table.
+
+The Technical Agent identifies SKUs by their normalized sku_id, and the
+Pricing Agent used to look every final SKU up again by normalize_key(sku) in
+the price table, finding a SKU without a price only when pricing it (a
+KeyError that aborted the run). PricedCatalog joins one catalog version
+(technical_agent/catalog.py) with one version of the pricing tables
+(pricing_tables.py) once:
+
+- every SKU gets a dense integer id: its position in the catalog
+- unit_prices[id] is its unit price (None when the price table has none)
+- SKUs without a price are listed in `unpriced` and reported when the join
+  is built, before any RFP is priced against it
+
+The Main Agent records the id of each item's final SKU (final_sku_index)
+and the join version in the Technical Agent output; the Pricing Agent then
+reads the unit prices by id, without normalizing or hashing SKU strings.
+Catalogs are only read through the ProductCatalog attributes (source_path,
+version, products, deleted), so this module does not depend on the
+Technical Agent.
+PricedCatalogCache keeps the latest join per catalog CSV and rebuilds it
+when the catalog or the pricing tables change version; after a catalog delta
+only the changed SKUs are re-priced.
+"""
+
+import os
+import threading
+from typing import Dict, Any, Callable, List, Optional, Tuple
+
+from agents.pricing_agent.pricing_tables import PricingTables
+from loaders.pricing_loader import normalize_key
+
+
+# unpriced SKUs named in the load-time report
+UNPRICED_REPORT_LIMIT = 10
+
+
+class PricedCatalog:
+    """
+    One catalog version joined with one pricing tables version (built by
+    PricedCatalog.join, or PricedCatalog.apply_delta for the version a
+    catalog delta produced).
+
+    Attributes:
+        source_path:      catalog CSV path
+        catalog_version:  version of the joined catalog
+        pricing_version:  version of the joined pricing tables
+        version:          id of the join ("<catalog version>.<pricing version>")
+        unit_prices:      unit price per dense SKU id (None: no price, or deleted)
+        unpriced:         sku_ids of the live SKUs without a unit price
+    """
+
+    def __init__(self, source_path: str, catalog_version: str, pricing_version: str,
+                 sku_ids: List[str], unit_prices: List[Optional[float]], ids: Dict[str, int],
+                 unpriced: List[str]):
+        self.source_path = source_path
+        self.catalog_version = catalog_version
+        self.pricing_version = pricing_version
+        self.version = f"{catalog_version}.{pricing_version}"
+        self.unit_prices = unit_prices
+        self.unpriced = unpriced
+        self._sku_ids = sku_ids
+        # sku_id -> first live position, as the Technical Agent reports SKUs by sku_id
+        self._ids = ids
+
+    @classmethod
+    def join(cls, catalog: Any, tables: PricingTables) -> "PricedCatalog":
+        """Join every SKU of catalog (a ProductCatalog) with the product price table of tables."""
+
+        products = catalog.products
+        if hasattr(products, "sku_ids"):
+            sku_ids = products.sku_ids()
+        else:
+            sku_ids = [product.get("sku_id", "") for product in products]
+        deleted = catalog.deleted
+
+        positions = range(len(sku_ids) - 1, -1, -1)
+        if deleted:
+            ids = {sku_ids[p]: p for p in positions if p not in deleted}
+        else:
+            ids = dict(zip(reversed(sku_ids), positions))
+
+        # a normalized sku_id found in the price table is its own price key
+        # (normalize_key leaves normalized keys unchanged); the others are
+        # normalized like the Pricing Agent's lookups before giving up
+        get_price = tables.product_prices.get
+        unit_prices = [get_price(sku_id) for sku_id in sku_ids]
+        for position in deleted:
+            unit_prices[position] = None
+
+        missing = [p for p, price in enumerate(unit_prices) if price is None and p not in deleted]
+        unpriced = []
+        for position in missing:
+            sku_id = sku_ids[position]
+            if ids[sku_id] == position:
+                unit_prices[position] = get_price(normalize_key(sku_id, memo=False))
+                if unit_prices[position] is None:
+                    unpriced.append(sku_id)
+        # repeated sku_ids resolved through their first position
+        for position in missing:
+            unit_prices[position] = unit_prices[ids[sku_ids[position]]]
+
+        return cls(catalog.source_path, catalog.version, tables.version, sku_ids, unit_prices, ids, unpriced)
+
+    def apply_delta(self, version: str, changes: Dict[int, Optional[Dict[str, Any]]],
+                    tables: PricingTables) -> "PricedCatalog":
+        """
+        Join of the catalog version a delta produced (changes: position ->
+        new normalized product, None when deleted; see
+        CatalogManager.delta_log): only the changed positions are re-priced,
+        this join is left as it is.
+
+        A SKU repeated further down the catalog is not looked for when its
+        first position is changed; it then has no id (the Pricing Agent
+        falls back to SKU lookups for such items).
+        """
+
+        sku_ids = list(self._sku_ids)
+        unit_prices = list(self.unit_prices)
+        ids = dict(self._ids)
+        get_price = tables.product_prices.get
+
+        changed = []
+        for position in sorted(changes):
+            product = changes[position]
+            if position < len(sku_ids):
+                if ids.get(sku_ids[position]) == position:
+                    del ids[sku_ids[position]]
+            else:
+                sku_ids.extend([""] * (position + 1 - len(sku_ids)))
+                unit_prices.extend([None] * (position + 1 - len(unit_prices)))
+            if product is None:
+                unit_prices[position] = None
+                continue
+
+            sku_id = product.get("sku_id", "")
+            sku_ids[position] = sku_id
+            if ids.get(sku_id, position) >= position:
+                ids[sku_id] = position
+            price = get_price(sku_id)
+            if price is None:
+                price = get_price(normalize_key(sku_id, memo=False))
+            unit_prices[position] = price
+            changed.append(sku_id)
+
+        unpriced = [sku_id for sku_id in dict.fromkeys(self.unpriced + changed)
+                    if sku_id in ids and unit_prices[ids[sku_id]] is None]
+        return PricedCatalog(self.source_path, version, self.pricing_version, sku_ids, unit_prices, ids, unpriced)
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def sku_index(self, sku_id: str) -> Optional[int]:
+        """Dense id of a live SKU, or None if the catalog has no such sku_id."""
+        return self._ids.get(sku_id)
+
+    def sku_id(self, index: int) -> str:
+        """sku_id of the SKU with dense id `index`."""
+        return self._sku_ids[index]
+
+    def unit_price(self, index: int) -> Optional[float]:
+        """Unit price of the SKU with dense id `index` (None when it has no price)."""
+        return self.unit_prices[index]
+
+    def describe(self) -> Dict[str, Any]:
+        return {
+            "version": self.version,
+            "catalog_version": self.catalog_version,
+            "pricing_version": self.pricing_version,
+            "skus": len(self._ids),
+            "unpriced": len(self.unpriced),
+        }
+
+
+class PricedCatalogCache:
+    """
+    Latest PricedCatalog per catalog CSV.
+
+    `tables_source()` returns the current pricing tables (e.g. a
+    PricingTableManager lookup); a join is rebuilt when either the catalog
+    or the tables it was built from changed version. With a delta source
+    (set_delta_source, e.g. CatalogManager.delta_log), the join of a catalog
+    version produced by deltas is derived from the previous join instead.
+    """
+
+    def __init__(self, tables_source: Callable[[], PricingTables]):
+        self._tables_source = tables_source
+        self._delta_source: Optional[Callable[[str], Tuple[Optional[str], list]]] = None
+        self._lock = threading.Lock()
+        self._joins: Dict[str, PricedCatalog] = {}
+
+        self.joins = 0
+        self.hits = 0
+        self.derived = 0
+
+    def set_delta_source(self, delta_source: Callable[[str], Tuple[Optional[str], list]]) -> None:
+        """delta_source(csv_path) -> (base version, [(version, changes)]) of the deltas applied to a catalog."""
+        self._delta_source = delta_source
+
+    def get(self, catalog: Any) -> PricedCatalog:
+        """The join of catalog with the current pricing tables (built on first use)."""
+
+        tables = self._tables_source()
+        key = os.path.abspath(catalog.source_path)
+
+        with self._lock:
+            priced = self._joins.get(key)
+            if (priced is not None and priced.catalog_version == catalog.version
+                    and priced.pricing_version == tables.version):
+                self.hits += 1
+                return priced
+
+        derived = self._derive(priced, catalog, tables)
+        if derived is not None:
+            with self._lock:
+                self._joins[key] = derived
+                self.derived += 1
+            return derived
+
+        priced = PricedCatalog.join(catalog, tables)
+        with self._lock:
+            self._joins[key] = priced
+            self.joins += 1
+
+        print(f"[Pricing] Joined {len(priced)} SKUs of {catalog.source_path} with the price table "
+              f"(version {priced.version})")
+        if priced.unpriced:
+            shown = ", ".join(priced.unpriced[:UNPRICED_REPORT_LIMIT])
+            more = len(priced.unpriced) - UNPRICED_REPORT_LIMIT
+            print(f"[WARNING] {len(priced.unpriced)} SKUs have no unit price: {shown}"
+                  + (f" (+{more} more)" if more > 0 else ""))
+        return priced
+
+    def _derive(self, priced: Optional[PricedCatalog], catalog: Any,
+                tables: PricingTables) -> Optional[PricedCatalog]:
+        """Join of catalog derived from priced through the deltas between them, if possible."""
+
+        if priced is None or self._delta_source is None or priced.pricing_version != tables.version:
+            return None
+        base_version, log = self._delta_source(catalog.source_path)
+        versions = [base_version] + [version for version, _ in log]
+        if priced.catalog_version not in versions or catalog.version not in versions:
+            return None
+        start, end = versions.index(priced.catalog_version), versions.index(catalog.version)
+        if start > end:
+            return None
+
+        for version, changes in log[start:end]:
+            priced = priced.apply_delta(version, changes, tables)
+        return priced
+
+    def find(self, version: Optional[str]) -> Optional[PricedCatalog]:
+        """The cached join with this version, if it is still the latest of its catalog."""
+        if not version:
+            return None
+        with self._lock:
+            for priced in self._joins.values():
+                if priced.version == version:
+                    return priced
+        return None
+
+    def invalidate(self, csv_path: Optional[str] = None) -> None:
+        """Drop the join of one catalog CSV, or all of them."""
+        with self._lock:
+            if csv_path is None:
+                self._joins.clear()
+            else:
+                self._joins.pop(os.path.abspath(csv_path), None)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "catalogs": len(self._joins),
+                "joins": self.joins,
+                "hits": self.hits,
+                "derived": self.derived,
+                "unpriced": sum(len(priced.unpriced) for priced in self._joins.values()),
+            }
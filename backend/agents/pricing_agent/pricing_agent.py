@@ -5,7 +5,8 @@ This module implements the FULL Pricing Agent workflow.
 
 Responsibilities:
 --------------------------------
-1. Load product and test pricing tables.
+1. Load product and test pricing tables (cached in memory and reloaded
+   only when a CSV changes, see pricing_tables.py).
 2. Receive:
     - Technical Agent output (final SKUs + quantities)
     - RFP JSON (tests required)
@@ -14,26 +15,70 @@ Responsibilities:
     - Multiply by quantity → material cost
     - Sum test costs → testing cost
     - Compute total cost per item
+   All items of an RFP are priced in one batch (price_items): the test cost
+   is resolved once, each distinct SKU is looked up once and the costs are
+   computed as array operations. When the Technical Agent recorded dense SKU
+   ids (final_sku_index, see priced_catalog.py), unit prices are read by id
+   instead (price_items_by_index).
+   Unit prices follow the quantity slabs of product_price_tiers.csv
+   (resolved by binary search, see price_tiers.py) and the discount of the
+   RFP issuer in issuer_discounts.csv.
 4. Compute:
     - total material cost
     - total test cost
     - grand total
-5. Produce structured JSON output for Main Agent.
+5. Produce structured JSON output for Main Agent, recording the version of
+   the pricing tables the quote was computed from.
 """
 import sys
 import os
 import json
+from typing import List, Dict, Any, Tuple
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
 
 # Add backend folder to Python path
 BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
 sys.path.append(BASE_DIR)
 
 
-from loaders.pricing_loader import (
-    load_product_prices,
-    load_test_prices,
-    normalize_key
-)
+from loaders.pricing_loader import normalize_key
+from agents.pricing_agent.pricing_tables import PricingTableManager, PricingTables
+from agents.pricing_agent.price_tiers import PriceTiers
+from agents.pricing_agent.priced_catalog import PricedCatalog, PricedCatalogCache
+from loaders.result_store import JsonResultStore
+
+
+# -----------------------------------------------------------
+# Pricing tables (process-wide, reloaded when a CSV changes)
+# -----------------------------------------------------------
+
+PRODUCT_PRICING_CSV = "backend/data/datasets/product_pricing.csv"
+TEST_PRICING_CSV = "backend/data/datasets/test_pricing.csv"
+PRICE_TIERS_CSV = "backend/data/datasets/product_price_tiers.csv"
+ISSUER_DISCOUNTS_CSV = "backend/data/datasets/issuer_discounts.csv"
+
+PRICING_TABLES = PricingTableManager()
+
+
+def current_pricing_tables() -> PricingTables:
+    """The pricing tables of the CSVs above (tiers / discounts only when their CSV exists)."""
+    return PRICING_TABLES.get(
+        PRODUCT_PRICING_CSV,
+        TEST_PRICING_CSV,
+        PRICE_TIERS_CSV if os.path.exists(PRICE_TIERS_CSV) else None,
+        ISSUER_DISCOUNTS_CSV if os.path.exists(ISSUER_DISCOUNTS_CSV) else None,
+    )
+
+
+# Catalogs joined with the current pricing tables (dense SKU ids -> unit price)
+PRICED_CATALOGS = PricedCatalogCache(current_pricing_tables)
+
+# Pricing outputs of processed RFPs, re-priced by what-if scenarios (scenarios.py)
+PRICING_RESULTS = JsonResultStore("backend/data/tmp/pricing_results")
 
 
 # -----------------------------------------------------------
@@ -50,6 +95,36 @@ def load_rfp_json(json_path: str) -> dict:
 
 
 
+# -----------------------------------------------------------
+# Test cost (the same for every item of an RFP)
+# -----------------------------------------------------------
+
+def resolve_test_costs(tests_required: list, test_prices: dict) -> Tuple[List[Dict[str, Any]], float]:
+    """
+    Looks up the price of every required test.
+
+    Returns (used_tests, test_cost_total); tests missing from the pricing
+    table are reported and skipped.
+    """
+
+    test_cost_total = 0
+    used_tests = []
+
+    for test in tests_required:
+        test_key = normalize_key(test)
+
+        if test_key not in test_prices:
+            print(f"[WARNING] Test not found in pricing table: {test}")
+            continue
+
+        cost = test_prices[test_key]
+        used_tests.append({ "test_name": test, "test_price": cost })
+        test_cost_total += cost
+
+    return used_tests, test_cost_total
+
+
+
 # -----------------------------------------------------------
 # Pricing Logic for each item
 # -----------------------------------------------------------
@@ -84,19 +159,7 @@ def compute_item_pricing(item: dict, product_prices: dict, test_prices: dict, te
     # ------------------------------
     # 2. Test Cost
     # ------------------------------
-    test_cost_total = 0
-    used_tests = []
-
-    for test in tests_required:
-        test_key = normalize_key(test)
-
-        if test_key not in test_prices:
-            print(f"[WARNING] Test not found in pricing table: {test}")
-            continue
-
-        cost = test_prices[test_key]
-        used_tests.append({ "test_name": test, "test_price": cost })
-        test_cost_total += cost
+    used_tests, test_cost_total = resolve_test_costs(tests_required, test_prices)
 
     # ------------------------------
     # 3. Total Cost for item
@@ -117,6 +180,166 @@ def compute_item_pricing(item: dict, product_prices: dict, test_prices: dict, te
 
 
 
+# -----------------------------------------------------------
+# Batch pricing kernel (all items of an RFP)
+# -----------------------------------------------------------
+
+def price_items(items: list, product_prices: dict, test_prices: dict, tests_required: list,
+                tiers: PriceTiers = None,
+                discount_percent: float = 0.0) -> Tuple[List[Dict[str, Any]], Dict[str, float], list]:
+    """
+    Prices all line items at once; returns (pricing_summary, totals,
+    item_no of the unpriced items). For priced SKUs the rows and totals equal
+    calling compute_item_pricing on each item and summing the costs in
+    item order (for flat prices: no tiers, no discount).
+
+    SKUs missing in product_prices are handled like price_items_by_index
+    does: their items are priced with unit_price None and no material cost
+    instead of aborting the run.
+
+    - the test cost is resolved once for the RFP; every row shares the
+      same list of used tests
+    - each distinct SKU is normalized and looked up once
+    - volume slabs (tiers) and the issuer discount are applied to the unit
+      prices of all items in one pass (apply_volume_pricing)
+    - material / total costs are computed as float64 array operations and
+      the totals as running sums (np.add.accumulate adds in item order, so
+      they round exactly like the per-item loop)
+    """
+
+    used_tests, test_cost_total = resolve_test_costs(tests_required, test_prices)
+
+    if not items:
+        return [], {"material_total": 0, "test_total": 0, "grand_total": 0}, []
+
+    # ------------------------------
+    # 1. Unit prices (one lookup per distinct SKU; None: not in product_prices)
+    # ------------------------------
+    sku_prices = {}
+    sku_keys = {}
+    unit_prices = []
+    for item in items:
+        sku = item["final_recommended_sku"]
+        if sku in sku_prices:
+            unit_price = sku_prices[sku]
+        else:
+            sku_key = sku_keys[sku] = normalize_key(sku)
+            unit_price = sku_prices[sku] = product_prices.get(sku_key)
+        unit_prices.append(unit_price)
+    unpriced_items = [item["item_index"] for item, unit_price in zip(items, unit_prices) if unit_price is None]
+
+    quantities = [int(item["quantity"]) for item in items]
+    if tiers or discount_percent:
+        keys = [sku_keys[item["final_recommended_sku"]] for item in items]
+        unit_prices = apply_volume_pricing(keys, quantities, unit_prices, tiers, discount_percent)
+
+    pricing_summary, totals = _price_rows(items, quantities, unit_prices, used_tests, test_cost_total)
+    return pricing_summary, totals, unpriced_items
+
+
+def price_items_by_index(items: list, priced_catalog: PricedCatalog, test_prices: dict,
+                         tests_required: list, tiers: PriceTiers = None,
+                         discount_percent: float = 0.0) -> Tuple[List[Dict[str, Any]], Dict[str, float], list]:
+    """
+    price_items for items carrying the dense id of their SKU
+    (final_sku_index) in priced_catalog: unit prices are read by id (and
+    only the SKUs with slabs are looked up by key in tiers).
+
+    SKUs without a unit price were reported when the catalog was joined;
+    their items are priced with unit_price None and no material cost
+    instead of aborting the run. Returns (pricing_summary, totals,
+    item_no of the unpriced items).
+    """
+
+    used_tests, test_cost_total = resolve_test_costs(tests_required, test_prices)
+
+    if not items:
+        return [], {"material_total": 0, "test_total": 0, "grand_total": 0}, []
+
+    catalog_prices = priced_catalog.unit_prices
+    unit_prices = [catalog_prices[item["final_sku_index"]] for item in items]
+    unpriced_items = [item["item_index"] for item, unit_price in zip(items, unit_prices) if unit_price is None]
+
+    quantities = [int(item["quantity"]) for item in items]
+    if tiers or discount_percent:
+        keys = []
+        for item in items:
+            # catalog sku_ids are normalized: most are their own price key
+            sku_id = priced_catalog.sku_id(item["final_sku_index"])
+            keys.append(sku_id if not tiers or sku_id in tiers else normalize_key(sku_id))
+        unit_prices = apply_volume_pricing(keys, quantities, unit_prices, tiers, discount_percent)
+
+    pricing_summary, totals = _price_rows(items, quantities, unit_prices, used_tests, test_cost_total)
+    return pricing_summary, totals, unpriced_items
+
+
+def apply_volume_pricing(keys: list, quantities: list, unit_prices: list, tiers: PriceTiers = None,
+                         discount_percent: float = 0.0) -> list:
+    """
+    Unit prices of all lines after volume slabs and the issuer discount.
+
+    keys are the normalized price keys of the lines' SKUs and unit_prices
+    their flat prices (None: unpriced, left as it is).
+    """
+
+    if tiers:
+        unit_prices = tiers.unit_prices(keys, quantities, unit_prices)
+    if discount_percent:
+        factor = 1 - discount_percent / 100
+        unit_prices = [unit_price * factor if unit_price is not None else None for unit_price in unit_prices]
+    return unit_prices
+
+
+def _price_rows(items: list, quantities: list, unit_prices: list, used_tests: list,
+                test_cost_total: float) -> Tuple[List[Dict[str, Any]], Dict[str, float]]:
+    """pricing_summary rows and totals of items with resolved unit prices (None: unpriced)."""
+
+    if None in unit_prices:
+        costed_prices = [0.0 if unit_price is None else unit_price for unit_price in unit_prices]
+    else:
+        costed_prices = unit_prices
+
+    if np is not None:
+        material = np.array(costed_prices, dtype=np.float64) * np.array(quantities, dtype=np.float64)
+        material_costs = material.tolist()
+        total_costs = (material + test_cost_total).tolist() if used_tests else material_costs
+        material_total = float(np.add.accumulate(material)[-1])
+        test_total = (float(np.add.accumulate(np.full(len(items), test_cost_total, dtype=np.float64))[-1])
+                      if used_tests else 0)
+    else:
+        material_costs = [unit_price * quantity for unit_price, quantity in zip(costed_prices, quantities)]
+        total_costs = [material_cost + test_cost_total for material_cost in material_costs]
+        material_total = 0
+        test_total = 0
+        for material_cost in material_costs:
+            material_total += material_cost
+            test_total += test_cost_total
+
+    pricing_summary = [
+        {
+            "item_no": item["item_index"],
+            "sku": item["final_recommended_sku"],
+            "match_percent": item["final_match_percent"],
+            "quantity": quantity,
+            "unit_price": unit_price,
+            "material_cost": material_cost,
+            "tests": used_tests,
+            "test_cost_total": test_cost_total,
+            "total_cost": total_cost
+        }
+        for item, quantity, unit_price, material_cost, total_cost
+        in zip(items, quantities, unit_prices, material_costs, total_costs)
+    ]
+
+    totals = {
+        "material_total": material_total,
+        "test_total": test_total,
+        "grand_total": material_total + test_total
+    }
+    return pricing_summary, totals
+
+
+
 # -----------------------------------------------------------
 # MAIN PRICING AGENT WORKFLOW
 # -----------------------------------------------------------
@@ -145,14 +368,20 @@ def run_pricing_agent(technical_output: dict, rfp_json_path: str) -> dict:
     # -------------------------------------------------------
     # Load price tables
     # -------------------------------------------------------
-    product_csv = "backend/data/datasets/product_pricing.csv"
-    test_csv = "backend/data/datasets/test_pricing.csv"
-
-    product_prices = load_product_prices(product_csv)
-    test_prices = load_test_prices(test_csv)
-
+    # in-memory tables, rebuilt (from the compiled price snapshot) only when a CSV changed
+    pricing_tables = current_pricing_tables()
+    product_prices = pricing_tables.product_prices
+    test_prices = pricing_tables.test_prices
+    tiers = pricing_tables.tiers
+    discount_percent = pricing_tables.discount_percent(rfp_data.get("issuer"))
+
+    print(f"[Pricing Agent] Pricing tables version {pricing_tables.version}.")
     print(f"[Pricing Agent] Loaded {len(product_prices)} product prices.")
     print(f"[Pricing Agent] Loaded {len(test_prices)} test prices.")
+    if tiers:
+        print(f"[Pricing Agent] Volume price slabs for {len(tiers)} SKUs.")
+    if discount_percent:
+        print(f"[Pricing Agent] Issuer discount {discount_percent}% on material prices.")
 
     # -------------------------------------------------------
     # Read items from Technical Agent output
@@ -161,25 +390,43 @@ def run_pricing_agent(technical_output: dict, rfp_json_path: str) -> dict:
     print(f"[Pricing Agent] Received {len(rfp_items)} line items from Technical Agent.")
 
     # -------------------------------------------------------
-    # Compute pricing for each item
+    # Compute pricing for all items (batch kernel)
     # -------------------------------------------------------
-    priced_items = []
-    total_material = 0
-    total_test_cost = 0
-
-    for item in rfp_items:
-        pricing = compute_item_pricing(
-            item=item,
+    # dense SKU ids of the Technical Agent, valid while its join is current
+    priced_catalog = PRICED_CATALOGS.find(technical_output.get("priced_catalog_version"))
+    if priced_catalog is not None and (
+        priced_catalog.pricing_version != pricing_tables.version
+        or any(item.get("final_sku_index") is None for item in rfp_items)
+    ):
+        priced_catalog = None
+
+    unpriced_items = []
+    if priced_catalog is not None:
+        print(f"[Pricing Agent] Pricing by SKU id (priced catalog {priced_catalog.version}).")
+        priced_items, totals, unpriced_items = price_items_by_index(
+            items=rfp_items,
+            priced_catalog=priced_catalog,
+            test_prices=test_prices,
+            tests_required=tests_required,
+            tiers=tiers,
+            discount_percent=discount_percent
+        )
+    else:
+        priced_items, totals, unpriced_items = price_items(
+            items=rfp_items,
             product_prices=product_prices,
             test_prices=test_prices,
-            tests_required=tests_required
+            tests_required=tests_required,
+            tiers=tiers,
+            discount_percent=discount_percent
         )
 
-        priced_items.append(pricing)
-        total_material += pricing["material_cost"]
-        total_test_cost += pricing["test_cost_total"]
+    if unpriced_items:
+        print(f"[WARNING] No unit price for the SKUs of items {unpriced_items}; priced without material cost.")
 
-    grand_total = total_material + total_test_cost
+    total_material = totals["material_total"]
+    total_test_cost = totals["test_total"]
+    grand_total = totals["grand_total"]
 
     print(f"[Pricing Agent] Material Total = {total_material}")
     print(f"[Pricing Agent] Test Total = {total_test_cost}")
@@ -195,11 +442,11 @@ def run_pricing_agent(technical_output: dict, rfp_json_path: str) -> dict:
         "title": rfp_data.get("title"),
         "issuer": rfp_data.get("issuer"),
         "pricing_summary": priced_items,
-        "totals": {
-            "material_total": total_material,
-            "test_total": total_test_cost,
-            "grand_total": grand_total
-        }
+        "totals": totals,
+        "pricing_tables": pricing_tables.describe(),
+        "issuer_discount_percent": discount_percent,
+        "priced_catalog_version": priced_catalog.version if priced_catalog is not None else None,
+        "unpriced_items": unpriced_items
     }
 
 
@@ -0,0 +1,221 @@
+"""
+pricing_tables.py
+
+Process-wide cache of the normalized pricing tables.
+
+Parsing product_pricing.csv and test_pricing.csv and normalizing every key
+on each pipeline run is repeated work that grows with the price book.
+PricingTableManager keeps one PricingTables (product prices + test prices,
+optionally volume price tiers and issuer discounts) per set of CSV paths in
+memory and reloads it only when a file changes, the same way CatalogManager
+(technical_agent/catalog.py) does for catalogs:
+
+- on every access all files are stat()-ed (mtime + size)
+- when mtime or size differ, the content hash (sha256) is recomputed
+- the tables are rebuilt only when a content hash differs
+
+Each file is hashed once per load: build() hands the fingerprints it was
+given on to the price snapshot (pricing_loader.open_product_prices), which
+checks and compiles against them instead of hashing the CSV again. Product
+prices are read from that snapshot, so a reload skips parsing and
+normalizing the CSV, and decoded into a plain dict once per version: every
+lookup is then O(1) (a binary search over the snapshot is ~20x slower
+for a full catalog join). Each process keeps its own copy of the dict.
+
+Every loaded version gets a version id derived from the content hashes;
+the Pricing Agent records it in its output, so each quote names the price
+tables it was computed from. Published tables are never modified: a run
+that got them keeps pricing against the same version.
+"""
+
+import os
+import hashlib
+import threading
+from typing import Dict, Any, Optional, Tuple
+
+from loaders.snapshot import FileFingerprint
+from agents.pricing_agent.price_tiers import PriceTiers
+from loaders.pricing_loader import (
+    normalize_key,
+    open_product_prices,
+    load_test_prices,
+    load_price_tiers,
+    load_issuer_discounts,
+)
+
+
+class PricingTables:
+    """
+    One loaded version of the pricing tables.
+
+    Attributes:
+        product_csv:     product pricing CSV path
+        test_csv:        test pricing CSV path
+        product_prices:  {normalized sku key: unit price}
+        test_prices:     {normalized test name: test price}
+        tiers:           volume price slabs (PriceTiers, empty without a tiers CSV)
+        issuer_discounts: {normalized issuer: discount percent on material prices}
+        product_version: prefix of the product CSV content hash
+        test_version:    prefix of the test CSV content hash
+        version:         id of this set of tables (derived from all hashes)
+    """
+
+    def __init__(self, product_csv: str, test_csv: str,
+                 product_prices: Dict[str, float], test_prices: Dict[str, float],
+                 product_hash: str, test_hash: str,
+                 tiers: Optional[PriceTiers] = None, issuer_discounts: Optional[Dict[str, float]] = None,
+                 extra_hashes: Tuple[str, ...] = ()):
+        self.product_csv = product_csv
+        self.test_csv = test_csv
+        self.product_prices = product_prices
+        self.test_prices = test_prices
+        self.tiers = tiers if tiers is not None else PriceTiers({})
+        self.issuer_discounts = issuer_discounts or {}
+        self.product_version = product_hash[:16]
+        self.test_version = test_hash[:16]
+        self.version = hashlib.sha256(
+            ":".join((product_hash, test_hash) + tuple(extra_hashes)).encode()
+        ).hexdigest()[:16]
+
+    def discount_percent(self, issuer: Optional[str]) -> float:
+        """Discount on material prices for RFPs of issuer (0 when it has none)."""
+        if not issuer or not self.issuer_discounts:
+            return 0.0
+        return self.issuer_discounts.get(normalize_key(issuer), 0.0)
+
+    def describe(self) -> Dict[str, Any]:
+        """Version info recorded in the pricing output."""
+        return {
+            "version": self.version,
+            "product_prices_version": self.product_version,
+            "test_prices_version": self.test_version,
+            "product_prices": len(self.product_prices),
+            "test_prices": len(self.test_prices),
+            "tiered_skus": len(self.tiers),
+            "issuer_discounts": len(self.issuer_discounts),
+        }
+
+
+class PricingTableManager:
+    """
+    Keeps normalized pricing tables in memory, keyed by their CSV paths
+    (product, test, and the optional tiers and issuer discounts CSVs).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._tables: Dict[Tuple[Optional[str], ...], PricingTables] = {}
+        self._fingerprints: Dict[Tuple[Optional[str], ...], Tuple[Optional[FileFingerprint], ...]] = {}
+
+        self.loads = 0
+        self.hits = 0
+
+    def get(self, product_csv: str, test_csv: str, tiers_csv: Optional[str] = None,
+            discounts_csv: Optional[str] = None) -> PricingTables:
+        """Return the pricing tables for the CSVs, reloading them if any file changed."""
+
+        if not os.path.exists(product_csv):
+            raise FileNotFoundError(f"Product pricing file missing: {product_csv}")
+        if not os.path.exists(test_csv):
+            raise FileNotFoundError(f"Test pricing file missing: {test_csv}")
+        if tiers_csv is not None and not os.path.exists(tiers_csv):
+            raise FileNotFoundError(f"Price tiers file missing: {tiers_csv}")
+        if discounts_csv is not None and not os.path.exists(discounts_csv):
+            raise FileNotFoundError(f"Issuer discounts file missing: {discounts_csv}")
+
+        key = tuple(os.path.abspath(path) if path is not None else None
+                    for path in (product_csv, test_csv, tiers_csv, discounts_csv))
+
+        with self._lock:
+            tables = self._tables.get(key)
+            fingerprints = self._fingerprints.get(key)
+            if tables is not None and self._same_stat(key, fingerprints):
+                self.hits += 1
+                return tables
+
+            new_fingerprints = self._fingerprint(key, fingerprints)
+            if tables is not None and all(
+                new is None or new.content_hash == old.content_hash
+                for new, old in zip(new_fingerprints, fingerprints)
+            ):
+                # touched but not modified: keep the loaded tables
+                self._fingerprints[key] = new_fingerprints
+                self.hits += 1
+                return tables
+
+            tables = self.build(product_csv, test_csv, tiers_csv, discounts_csv, new_fingerprints)
+            self._tables[key] = tables
+            self._fingerprints[key] = new_fingerprints
+            return tables
+
+    @staticmethod
+    def _fingerprint(paths: Tuple[Optional[str], ...],
+                     previous: Optional[Tuple[Optional[FileFingerprint], ...]] = None
+                     ) -> Tuple[Optional[FileFingerprint], ...]:
+        """Fingerprints of paths; files whose stat matches previous keep their fingerprint (no re-hash)."""
+        previous = previous or (None,) * len(paths)
+        return tuple(
+            None if path is None
+            else old if old is not None and old.same_stat(os.stat(path))
+            else FileFingerprint.of(path)
+            for path, old in zip(paths, previous)
+        )
+
+    @staticmethod
+    def _same_stat(key: Tuple[Optional[str], ...], fingerprints: Tuple[Optional[FileFingerprint], ...]) -> bool:
+        return all(fingerprint.same_stat(os.stat(path))
+                   for path, fingerprint in zip(key, fingerprints) if path is not None)
+
+    def build(self, product_csv: str, test_csv: str, tiers_csv: Optional[str] = None,
+              discounts_csv: Optional[str] = None,
+              fingerprints: Optional[Tuple[Optional[FileFingerprint], ...]] = None) -> PricingTables:
+        """Load all tables without consulting the cache."""
+
+        if fingerprints is None:
+            fingerprints = self._fingerprint((product_csv, test_csv, tiers_csv, discounts_csv))
+
+        product_table = open_product_prices(product_csv, fingerprints[0])
+        # plain dict: O(1) lookups instead of a binary search over the snapshot
+        product_prices = product_table.to_dict() if hasattr(product_table, "to_dict") else product_table
+        test_prices = load_test_prices(test_csv)
+        tiers = PriceTiers(load_price_tiers(tiers_csv)) if tiers_csv is not None else None
+        issuer_discounts = load_issuer_discounts(discounts_csv) if discounts_csv is not None else None
+        self.loads += 1
+
+        # the optional files take part in the version only when given, so the
+        # version of a product + test pair does not change without them
+        extra_hashes = tuple(fingerprint.content_hash for fingerprint in fingerprints[2:] if fingerprint is not None)
+        tables = PricingTables(product_csv, test_csv, product_prices, test_prices,
+                               fingerprints[0].content_hash, fingerprints[1].content_hash,
+                               tiers, issuer_discounts, extra_hashes)
+        print(f"[Pricing] Loaded {len(product_prices)} product prices and {len(test_prices)} test prices "
+              f"(version {tables.version})")
+        if tiers is not None:
+            print(f"[Pricing] Compiled {tiers.slabs()} volume price slabs for {len(tiers)} SKUs; "
+                  f"{len(tables.issuer_discounts)} issuer discounts")
+            unknown = [key for key in tiers.keys() if key not in product_prices]
+            if unknown:
+                print(f"[WARNING] {len(unknown)} tiered SKUs have no flat unit price in {product_csv}; "
+                      f"their slabs are not used: {', '.join(unknown[:10])}")
+        return tables
+
+    def invalidate(self, product_csv: Optional[str] = None, test_csv: Optional[str] = None) -> None:
+        """Drop the cached tables of one pair of product / test CSVs, or all of them."""
+        with self._lock:
+            if product_csv is None or test_csv is None:
+                self._tables.clear()
+                self._fingerprints.clear()
+                return
+            pair = (os.path.abspath(product_csv), os.path.abspath(test_csv))
+            for key in [key for key in self._tables if key[:2] == pair]:
+                self._tables.pop(key, None)
+                self._fingerprints.pop(key, None)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "tables": len(self._tables),
+                "loads": self.loads,
+                "hits": self.hits,
+                "versions": [tables.version for tables in self._tables.values()],
+            }
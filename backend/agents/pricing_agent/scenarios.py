@@ -0,0 +1,212 @@
+"""
+scenarios.py
+
+What-if re-pricing of a processed RFP.
+
+Sales teams ask "what if quantity on item 4 goes to 2,000" or "what if we
+swap to the second-best SKU". Instead of re-running Sales, Technical and
+Pricing, apply_scenario takes the stored pricing output of the RFP
+(PRICING_RESULTS, see loaders/result_store.py), its compact technical output
+(for the ranked top_3 SKUs of every item) and a list of overrides, and
+re-prices only the rows the overrides touch:
+
+    {"item_no": 4, "quantity": 2000}
+    {"item_no": 4, "sku_rank": 2}                 # 2nd SKU of the item's top_3
+    {"item_no": 4, "sku": "cablexlpe3c4is7098"}   # a sku_id of the item's top_3
+    {"item_no": 4, "unit_price": 199.5}
+    {"item_no": 4, "tests": ["High voltage test"]}
+    {"tests": ["High voltage test"]}              # no item_no: every item
+
+item_no matches the item numbers of the quote whether written as a number
+or a string (4 or "4"). Overrides are applied in order, fields of one item
+on top of each other; a
+unit_price override wins over the price of a swapped SKU. Swapped SKUs and
+changed quantities are priced from the current pricing tables, volume slabs
+and issuer discount included (price_tiers.py). Only the changed rows are
+recomputed and the totals are adjusted by their differences, so the work
+grows with the number of changed rows (plus one pass indexing the rows of
+the RFP), never with the catalog size; a test list override without item_no
+changes every row. The stored output is not modified.
+
+A scenario is only priced against the pricing tables version the stored
+quote was computed from: the untouched rows keep their stored prices, so
+after a price table reload (another version) the scenario is rejected with
+StalePricingError until the RFP is priced again.
+"""
+
+from typing import List, Dict, Any, Tuple
+
+from agents.pricing_agent.pricing_agent import resolve_test_costs
+from agents.pricing_agent.pricing_tables import PricingTables
+from loaders.pricing_loader import normalize_key
+
+
+OVERRIDE_FIELDS = ("item_no", "quantity", "sku_rank", "sku", "unit_price", "tests")
+
+
+class StalePricingError(ValueError):
+    """The stored quote was priced with pricing tables that are no longer loaded."""
+
+
+def _item_key(item_no) -> str:
+    """Comparable form of an item number: 4, 4.0 and "4" are the same item."""
+    if isinstance(item_no, float) and item_no.is_integer():
+        item_no = int(item_no)
+    return str(item_no).strip()
+
+
+def _validate_override(number: int, override: Dict[str, Any]) -> None:
+    if not isinstance(override, dict):
+        raise ValueError(f"Override {number}: expected an object, got {override!r}")
+    unknown = [field for field in override if field not in OVERRIDE_FIELDS]
+    if unknown:
+        raise ValueError(f"Override {number}: unknown fields {unknown} (expected {OVERRIDE_FIELDS})")
+    if "item_no" not in override and set(override) != {"tests"}:
+        raise ValueError(f"Override {number}: item_no is required unless only the test list is overridden")
+    if "sku_rank" in override and "sku" in override:
+        raise ValueError(f"Override {number}: pass either sku_rank or sku, not both")
+    if "quantity" in override:
+        quantity = override["quantity"]
+        try:
+            if isinstance(quantity, bool) or not isinstance(quantity, (int, float, str)):
+                raise ValueError
+            # 2000, 2000.0 and "2000" are fine; 1.5 is not truncated to 1
+            if isinstance(quantity, float) and not quantity.is_integer():
+                raise ValueError
+            if int(quantity) < 0:
+                raise ValueError
+        except (ValueError, OverflowError):
+            raise ValueError(f"Override {number}: quantity must be a non-negative integer, got {quantity!r}")
+    if "unit_price" in override:
+        unit_price = override["unit_price"]
+        if isinstance(unit_price, bool) or not isinstance(unit_price, (int, float)) or unit_price < 0:
+            raise ValueError(f"Override {number}: unit_price must be a non-negative number, got {unit_price!r}")
+    if "tests" in override:
+        tests = override["tests"]
+        if not isinstance(tests, list) or not all(isinstance(test, str) for test in tests):
+            raise ValueError(f"Override {number}: tests must be a list of test names")
+
+
+def _choose_sku(item_no: str, override: Dict[str, Any], top_3: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """The top_3 entry an override swaps the item to."""
+    if "sku_rank" in override:
+        rank = override["sku_rank"]
+        if isinstance(rank, bool) or not isinstance(rank, int) or not 1 <= rank <= len(top_3):
+            raise ValueError(f"Item {item_no}: sku_rank must be between 1 and {len(top_3)}, got {rank!r}")
+        return top_3[rank - 1]
+    entry = next((entry for entry in top_3 if entry["sku_id"] == override["sku"]), None)
+    if entry is None:
+        raise ValueError(f"Item {item_no}: SKU {override['sku']!r} is not among its ranked SKUs "
+                         f"{[entry['sku_id'] for entry in top_3]}")
+    return entry
+
+
+def _reprice_row(row: Dict[str, Any], changes: Dict[str, Any], tables: PricingTables,
+                 discount_percent: float,
+                 test_costs: Dict[Tuple[str, ...], Tuple[list, float]]) -> Dict[str, Any]:
+    """New pricing_summary row: row with the changes of its overrides, costs recomputed."""
+
+    row = dict(row)
+
+    if "sku" in changes:
+        entry = changes["sku"]
+        row["sku"] = entry["sku_id"]
+        row["match_percent"] = entry["match_percent"]
+    if "quantity" in changes:
+        row["quantity"] = int(changes["quantity"])
+    if "sku" in changes or (tables.tiers and "quantity" in changes):
+        # the slab of the new SKU / quantity
+        key = normalize_key(row["sku"])
+        unit_price = tables.tiers.unit_price(key, row["quantity"], tables.product_prices.get(key))
+        if unit_price is not None and discount_percent:
+            unit_price *= 1 - discount_percent / 100
+        row["unit_price"] = unit_price
+    if "unit_price" in changes:
+        row["unit_price"] = changes["unit_price"]
+    if "tests" in changes:
+        # the same list is resolved once per scenario
+        key = tuple(changes["tests"])
+        if key not in test_costs:
+            test_costs[key] = resolve_test_costs(changes["tests"], tables.test_prices)
+        row["tests"], row["test_cost_total"] = test_costs[key]
+
+    unit_price = row["unit_price"]
+    row["material_cost"] = unit_price * row["quantity"] if unit_price is not None else 0.0
+    row["total_cost"] = row["material_cost"] + row["test_cost_total"]
+    return row
+
+
+def apply_scenario(pricing_output: Dict[str, Any], technical_output: Dict[str, Any],
+                   overrides: List[Dict[str, Any]], tables: PricingTables) -> Dict[str, Any]:
+    """
+    Re-price the pricing output of an RFP under a list of overrides (see
+    module docstring). Raises ValueError for an invalid override, and
+    StalePricingError when tables is not the version the output was
+    priced with.
+    """
+
+    priced_version = (pricing_output.get("pricing_tables") or {}).get("version")
+    if priced_version != tables.version:
+        raise StalePricingError(
+            f"RFP {pricing_output.get('rfp_id')} was priced with pricing tables {priced_version}, "
+            f"the current version is {tables.version}; run the pipeline again to price scenarios"
+        )
+
+    for number, override in enumerate(overrides, start=1):
+        _validate_override(number, override)
+
+    summary = pricing_output.get("pricing_summary", [])
+    row_positions = {_item_key(row["item_no"]): position for position, row in enumerate(summary)}
+    top_3s = {_item_key(item["item_index"]): item.get("top_3", []) for item in technical_output.get("items", [])}
+
+    # item key -> merged changes, in the order the items were first overridden
+    changes: Dict[str, Dict[str, Any]] = {}
+    for override in overrides:
+        item_keys = [_item_key(override["item_no"])] if "item_no" in override else list(row_positions)
+        for item_key in item_keys:
+            if item_key not in row_positions:
+                raise ValueError(f"Unknown item_no: {override['item_no']!r}")
+            item_changes = changes.setdefault(item_key, {})
+            if "sku_rank" in override or "sku" in override:
+                item_changes["sku"] = _choose_sku(item_key, override, top_3s.get(item_key, []))
+                # the price of the new SKU, unless overridden again below
+                item_changes.pop("unit_price", None)
+            for field in ("quantity", "unit_price", "tests"):
+                if field in override:
+                    item_changes[field] = override[field]
+
+    new_summary = list(summary)
+    totals = dict(pricing_output.get("totals", {}))
+    unpriced_items = set(pricing_output.get("unpriced_items", []))
+    test_costs: Dict[Tuple[str, ...], Tuple[list, float]] = {}
+    discount_percent = tables.discount_percent(pricing_output.get("issuer"))
+
+    changed_items = []
+    for item_key, item_changes in changes.items():
+        position = row_positions[item_key]
+        old_row = summary[position]
+        item_no = old_row["item_no"]
+        changed_items.append(item_no)
+        new_row = _reprice_row(old_row, item_changes, tables, discount_percent, test_costs)
+        new_summary[position] = new_row
+
+        totals["material_total"] += new_row["material_cost"] - old_row["material_cost"]
+        totals["test_total"] += new_row["test_cost_total"] - old_row["test_cost_total"]
+        if new_row["unit_price"] is None:
+            unpriced_items.add(item_no)
+        else:
+            unpriced_items.discard(item_no)
+    totals["grand_total"] = totals["material_total"] + totals["test_total"]
+
+    return {
+        "rfp_id": pricing_output.get("rfp_id"),
+        "title": pricing_output.get("title"),
+        "issuer": pricing_output.get("issuer"),
+        "overrides": overrides,
+        "changed_items": changed_items,
+        "pricing_summary": new_summary,
+        "totals": totals,
+        "base_totals": pricing_output.get("totals"),
+        "pricing_tables": tables.describe(),
+        "unpriced_items": sorted(unpriced_items),
+    }
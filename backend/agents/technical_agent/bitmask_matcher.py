@@ -0,0 +1,341 @@
+"""
+bitmask_matcher.py
+
+Bitmask scoring for the Technical Agent.
+
+All six spec attributes are booleans, so the outcome of comparing one RFP
+item with one SKU is a 6-bit mask (bit i set = SPEC_ATTRIBUTES[i] matched).
+The match percent is a function of the mask only, so it is precomputed for
+all 64 masks by MatchScorer, which also applies per-attribute weights:
+
+    percent(mask) = round(sum(weights of matched attributes) / sum(weights) * 100, 2)
+
+With equal weights this is exactly calculate_spec_match's percentage.
+MatchScorer also carries the per-attribute match tolerances (size_sqmm
+±0.2 sqmm by default, optional numeric voltage tolerance); they are read
+when an item is resolved, so changing them needs no rebuild.
+
+BitmaskMatcher precomputes, once per catalog, a code per SKU and attribute
+(the position of the SKU's value in a per-attribute table of distinct
+values). Ranking an RFP item then resolves the item against the few distinct
+values of each attribute once, and every (item, SKU) score is a handful of
+list lookups OR-ed into a mask - no per-comparison string normalization or
+float()/int() parsing. top_k() adds a bounded heap with branch-and-bound
+pruning for when only the best few SKUs are needed.
+
+Catalog deltas overwrite or append the codes of the changed positions
+(apply_delta); deleted SKUs keep their position and are skipped when ranking.
+copy() gives a new catalog version its own code columns; the per-attribute
+tables of distinct values only ever grow, so both versions share them.
+"""
+
+import sys
+import heapq
+from array import array
+from itertools import filterfalse
+from typing import List, Dict, Any, Optional, Sequence, Tuple, Set, Iterable
+
+from agents.technical_agent.spec_keys import (
+    SPEC_ATTRIBUTES,
+    DEFAULT_TOLERANCES,
+    TOLERANCE_ATTRIBUTES,
+    attribute_match_key,
+    parse_voltage,
+)
+from agents.technical_agent.compact_catalog import make_ranked_entry, column_nbytes
+
+
+ATTRIBUTE_BITS = {attr: 1 << i for i, attr in enumerate(SPEC_ATTRIBUTES)}
+FULL_MASK = (1 << len(SPEC_ATTRIBUTES)) - 1
+
+
+def mask_to_attributes(mask: int) -> List[str]:
+    """Names of the attributes whose bit is set in `mask`."""
+    return [attr for attr in SPEC_ATTRIBUTES if mask & ATTRIBUTE_BITS[attr]]
+
+
+def mask_from_attributes(attributes) -> int:
+    """Mask with the bits of the given attribute names set."""
+    mask = 0
+    for attr in attributes:
+        mask |= ATTRIBUTE_BITS[attr]
+    return mask
+
+
+# -------------------------
+# Scoring
+# -------------------------
+
+class MatchScorer:
+    """
+    Precomputed mask -> match percent table for a set of attribute weights,
+    plus the match tolerances of the numeric attributes.
+
+    weights: {attribute: weight}; attributes left out weigh 1.0. None means
+    equal weights (the calculate_spec_match rule).
+    tolerances: {attribute: tolerance} for TOLERANCE_ATTRIBUTES; attributes
+    left out keep DEFAULT_TOLERANCES (size_sqmm 0.2 sqmm; voltage None =
+    exact key match, a number = kV difference allowed when both parse).
+    """
+
+    def __init__(self, weights: Optional[Dict[str, float]] = None,
+                 tolerances: Optional[Dict[str, Optional[float]]] = None):
+        weights = dict(weights or {})
+        unknown = set(weights) - set(SPEC_ATTRIBUTES)
+        if unknown:
+            raise ValueError(f"Unknown spec attributes in weights: {sorted(unknown)}")
+        if any(w < 0 for w in weights.values()):
+            raise ValueError("Attribute weights must be non-negative")
+
+        tolerances = dict(tolerances or {})
+        unknown = set(tolerances) - set(TOLERANCE_ATTRIBUTES)
+        if unknown:
+            raise ValueError(f"No tolerance can be set for: {sorted(unknown)} "
+                             f"(expected one of {list(TOLERANCE_ATTRIBUTES)})")
+        if any(t is not None and not t >= 0 for t in tolerances.values()):
+            raise ValueError("Attribute tolerances must be non-negative")
+        if tolerances.get("size_sqmm", 0.0) is None:
+            raise ValueError("size_sqmm always has a numeric tolerance")
+
+        self.tolerances = {attr: tolerances.get(attr, DEFAULT_TOLERANCES[attr])
+                           for attr in TOLERANCE_ATTRIBUTES}
+        self.size_tolerance: float = float(self.tolerances["size_sqmm"])
+        self.voltage_tolerance: Optional[float] = self.tolerances["voltage"]
+
+        self.weights = [float(weights.get(attr, 1.0)) for attr in SPEC_ATTRIBUTES]
+        # equal positive weights: percent is monotonic in the number of matches
+        self.uniform = len(set(self.weights)) == 1 and self.weights[0] > 0
+        total = sum(self.weights)
+
+        self.percent_table: List[float] = []
+        for mask in range(FULL_MASK + 1):
+            matched = sum(w for i, w in enumerate(self.weights) if mask >> i & 1)
+            match_percent = (matched / total) * 100 if total else 0.0
+            self.percent_table.append(round(match_percent, 2))
+
+        # rank of each mask's percent among the distinct percents (0 = lowest);
+        # used as an integer sort key that orders exactly like the percent
+        distinct = sorted(set(self.percent_table))
+        self.rank_table: List[int] = [distinct.index(p) for p in self.percent_table]
+
+        # everything ranked results depend on (match cache keys)
+        self.signature = (tuple(self.weights), tuple(self.tolerances.values()))
+
+    def percent(self, mask: int) -> float:
+        return self.percent_table[mask]
+
+
+DEFAULT_SCORER = MatchScorer()
+
+
+# -------------------------
+# Matcher
+# -------------------------
+
+class BitmaskMatcher:
+    """
+    Per-SKU attribute codes over a product sequence (see module docstring).
+
+    Usage:
+        matcher = BitmaskMatcher(products)
+        top_3 = matcher.rank(rfp_item, limit=3)
+    """
+
+    def __init__(self, products: Sequence[Dict[str, Any]], deleted: Optional[Set[int]] = None):
+        self.products = products
+        # positions of deleted SKUs (shared with the owning catalog), never ranked
+        self.deleted: Set[int] = deleted if deleted is not None else set()
+
+        # per attribute: distinct raw values, their match keys, and one code per SKU
+        self._values: List[Dict[Any, int]] = [{} for _ in SPEC_ATTRIBUTES]
+        self._keys: List[List[Any]] = [[] for _ in SPEC_ATTRIBUTES]
+        self._columns: List[array] = [array("I") for _ in SPEC_ATTRIBUTES]
+
+        for product in products:
+            for i, attr in enumerate(SPEC_ATTRIBUTES):
+                self._columns[i].append(self._code(i, attr, product.get(attr, "")))
+
+    def copy(self, products: Sequence[Dict[str, Any]], deleted: Set[int]) -> "BitmaskMatcher":
+        """Matcher over a copy of the catalog (its products / deleted): code columns copied, value tables shared."""
+        clone = BitmaskMatcher.__new__(BitmaskMatcher)
+        clone.products = products
+        clone.deleted = deleted
+        clone._values = self._values
+        clone._keys = self._keys
+        clone._columns = [column[:] for column in self._columns]
+        return clone
+
+    def apply_delta(self, positions: Iterable[int]) -> None:
+        """Re-encode the SKUs at changed `positions` (positions past the end are appended, in order)."""
+        for position in sorted(positions):
+            product = self.products[position]
+            append = position == len(self._columns[0])
+            for i, attr in enumerate(SPEC_ATTRIBUTES):
+                code = self._code(i, attr, product.get(attr, ""))
+                if append:
+                    self._columns[i].append(code)
+                else:
+                    self._columns[i][position] = code
+
+    def nbytes(self) -> int:
+        """Approximate bytes held by the code columns and value tables."""
+        return (sum(column_nbytes(column) for column in self._columns)
+                + sum(sys.getsizeof(values) + column_nbytes(keys) for values, keys in zip(self._values, self._keys)))
+
+    def live_positions(self) -> Iterable[int]:
+        """Positions of the SKUs that are not deleted, in catalog order."""
+        positions = range(len(self._columns[0]))
+        return filterfalse(self.deleted.__contains__, positions) if self.deleted else positions
+
+    def _code(self, i: int, attr: str, value) -> int:
+        codes = self._values[i]
+        code = codes.get(value)
+        if code is None:
+            code = len(codes)
+            codes[value] = code
+            # comparison key computed once per distinct value
+            self._keys[i].append(attribute_match_key(attr, value))
+        return code
+
+    # ---- per-item resolution ----
+
+    @staticmethod
+    def _attribute_matches(attr: str, item_key, sku_key, scorer: MatchScorer) -> bool:
+        """Same rules as calculate_spec_match, applied to precomputed keys."""
+        if attr == "cores":
+            if item_key[0] is not None and sku_key[0] is not None:
+                return item_key[0] == sku_key[0]
+            return bool(item_key[1]) and item_key[1] == sku_key[1]
+        if attr == "size_sqmm":
+            if item_key[0] is not None and sku_key[0] is not None:
+                return abs(item_key[0] - sku_key[0]) <= scorer.size_tolerance
+            return bool(item_key[1]) and item_key[1] == sku_key[1]
+        if attr == "voltage" and scorer.voltage_tolerance is not None:
+            item_kv = parse_voltage(item_key)
+            sku_kv = parse_voltage(sku_key)
+            if item_kv is not None and sku_kv is not None:
+                return abs(item_kv - sku_kv) <= scorer.voltage_tolerance
+        return bool(item_key) and item_key == sku_key
+
+    def item_tables(self, rfp_item: Dict[str, Any], scorer: MatchScorer = DEFAULT_SCORER) -> List[List[int]]:
+        """
+        For each attribute, a list indexed by SKU value code holding the
+        attribute's bit when that value matches the RFP item, else 0.
+        """
+
+        tables = []
+        for i, attr in enumerate(SPEC_ATTRIBUTES):
+            bit = ATTRIBUTE_BITS[attr]
+            item_key = attribute_match_key(attr, rfp_item.get(attr, ""))
+            tables.append([
+                bit if self._attribute_matches(attr, item_key, sku_key, scorer) else 0
+                for sku_key in self._keys[i]
+            ])
+        return tables
+
+    def mask(self, tables: List[List[int]], position: int) -> int:
+        """Match mask of the SKU at `position` for pre-resolved item tables."""
+        mask = 0
+        for table, column in zip(tables, self._columns):
+            mask |= table[column[position]]
+        return mask
+
+    def masks(self, tables: List[List[int]]) -> List[int]:
+        """Match masks of every SKU, in catalog order."""
+        t0, t1, t2, t3, t4, t5 = tables
+        return [
+            t0[c0] | t1[c1] | t2[c2] | t3[c3] | t4[c4] | t5[c5]
+            for c0, c1, c2, c3, c4, c5 in zip(*self._columns)
+        ]
+
+    def match_mask(self, rfp_item: Dict[str, Any], position: int,
+                   scorer: MatchScorer = DEFAULT_SCORER) -> int:
+        """Match mask of one (item, SKU) pair."""
+        return self.mask(self.item_tables(rfp_item, scorer), position)
+
+    # ---- ranking ----
+
+    def rank(self, rfp_item: Dict[str, Any], limit: Optional[int] = None,
+             scorer: MatchScorer = DEFAULT_SCORER) -> List[Dict[str, Any]]:
+        """
+        Rank all SKUs for one RFP item (match % descending, catalog order for
+        ties); same entries and order as rank_products_for_rfp_item.
+        """
+        return [self.entry(p, mask, scorer) for p, mask in self.rank_positions(rfp_item, limit, scorer)]
+
+    def rank_positions(self, rfp_item: Dict[str, Any], limit: Optional[int] = None,
+                       scorer: MatchScorer = DEFAULT_SCORER) -> List[Tuple[int, int]]:
+        """Ranked (position, match mask) pairs for one RFP item, in rank() order."""
+
+        masks = self.masks(self.item_tables(rfp_item, scorer))
+        rank_table = scorer.rank_table
+        key = lambda p: (-rank_table[masks[p]], p)
+        if limit is None:
+            order = sorted(self.live_positions(), key=key)
+        else:
+            order = heapq.nsmallest(limit, self.live_positions(), key=key)
+        return [(p, masks[p]) for p in order]
+
+    def top_k(self, rfp_item: Dict[str, Any], k: int = 3,
+              scorer: MatchScorer = DEFAULT_SCORER) -> List[Dict[str, Any]]:
+        """
+        Top-k SKUs for one RFP item with a bounded heap and branch-and-bound.
+
+        SKUs are scanned in catalog order. A min-heap keeps the k best
+        (score, position) pairs seen so far. Attributes are evaluated in
+        decreasing weight order; as soon as the best score a SKU could still
+        reach (its matched bits plus every remaining attribute) cannot beat
+        the current k-th score, the SKU is abandoned. The scan stops early
+        once the heap holds k SKUs with the maximum possible score.
+
+        Tie-breaking: equal match percents rank by catalog position, earlier
+        first - exactly the order of the stable sort in
+        rank_products_for_rfp_item. A later SKU therefore has to score
+        strictly higher than the k-th entry to enter the heap.
+        """
+        return [self.entry(p, mask, scorer) for p, mask in self.top_k_positions(rfp_item, k, scorer)]
+
+    def top_k_positions(self, rfp_item: Dict[str, Any], k: int = 3,
+                        scorer: MatchScorer = DEFAULT_SCORER) -> List[Tuple[int, int]]:
+        """Top-k (position, match mask) pairs for one RFP item, in top_k() order."""
+
+        n_products = len(self._columns[0]) - len(self.deleted)
+        if k <= 0 or n_products == 0:
+            return []
+
+        tables = self.item_tables(rfp_item, scorer)
+        rank_table = scorer.rank_table
+        best_rank = max(rank_table)
+
+        # (item table, SKU code column, bits of the attributes still to evaluate)
+        steps = []
+        remaining = FULL_MASK
+        for i in sorted(range(len(SPEC_ATTRIBUTES)), key=lambda i: -scorer.weights[i]):
+            remaining &= ~(1 << i)
+            steps.append((tables[i], self._columns[i], remaining))
+
+        # heap entries: (score rank, -position, mask); heap[0] is the k-th best
+        heap = []
+        for position in self.live_positions():
+            mask = 0
+            if len(heap) < k:
+                for table, column, _ in steps:
+                    mask |= table[column[position]]
+                heapq.heappush(heap, (rank_table[mask], -position, mask))
+            else:
+                kth_rank = heap[0][0]
+                for table, column, rest in steps:
+                    mask |= table[column[position]]
+                    if rank_table[mask | rest] <= kth_rank:
+                        break  # cannot beat the k-th entry any more
+                else:
+                    heapq.heapreplace(heap, (rank_table[mask], -position, mask))
+
+            if len(heap) == k and heap[0][0] == best_rank:
+                break  # k perfect matches: nothing later can displace them
+
+        heap.sort(key=lambda e: (-e[0], -e[1]))
+        return [(-neg_position, mask) for _, neg_position, mask in heap]
+
+    def entry(self, position: int, mask: int, scorer: MatchScorer = DEFAULT_SCORER) -> Dict[str, Any]:
+        return make_ranked_entry(self.products[position], scorer.percent(mask), mask)
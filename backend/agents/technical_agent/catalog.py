@@ -0,0 +1,752 @@
+"""
+catalog.py
+
+Process-wide cache of the normalized product catalog.
+
+Loading product_specs.csv, canonicalizing every row and normalizing it is
+pure repeated work when the file has not changed. CatalogManager keeps one
+ProductCatalog per CSV path in memory and reloads it only when the file
+changes:
+
+- on every access the file is stat()-ed (mtime + size)
+- when mtime or size differ, the content hash (sha256) is recomputed
+- the catalog is rebuilt only when the content hash differs
+
+Match structures derived from the catalog (BitmaskMatcher, SpecIndex, VectorMatchEngine,
+NumericRangeIndex)
+are built lazily and live as long as the catalog version they belong to.
+Reload listeners are told when a cached catalog is replaced or dropped, so
+caches keyed by catalog version (match_cache.py) can evict its entries.
+
+Published catalogs are never modified (copy-on-write):
+
+- a reload builds the new catalog, and the match structures the current one
+  had built, on a background thread while get() keeps returning the current
+  catalog; the new one is then published by swapping the reference. Only the
+  first load of a CSV (nothing to serve yet) is waited for
+- a pipeline run reads one catalog from start to end (CatalogManager.acquire),
+  so it never sees a half-built or half-updated catalog
+- a replaced catalog is retired: its match structures are released when its
+  last reader leaves (at once if it has none)
+
+Catalog deltas (CatalogManager.apply_delta) add, update and delete SKUs
+without reloading the CSV:
+
+- the delta is applied to a copy of the current catalog (ProductCatalog.copy:
+  per-SKU columns are copied, the append-only value tables and the posting
+  lists are shared), which is then published like a reload
+- updated SKUs keep their position, added SKUs are appended, deleted SKUs
+  become tombstones (ProductCatalog.deleted) that no match structure ranks
+- the match structures that are already built re-encode only the changed
+  positions (see their apply_delta)
+- the catalog gets a new version, derived from the old one and the delta
+- delta listeners get the old / new version, the SKUs whose ranked entries
+  became stale and the changed products, so match_cache.py keeps every
+  cached result the delta cannot affect
+"""
+
+import os
+import sys
+import json
+import hashlib
+import threading
+import weakref
+from contextlib import contextmanager
+from typing import List, Dict, Any, Callable, Iterator, Optional, Sequence, Set, Tuple
+
+from agents.technical_agent.bitmask_matcher import BitmaskMatcher
+from agents.technical_agent.compact_catalog import CompactCatalog, RAW_SKU_FIELDS, column_nbytes
+from agents.technical_agent.spec_index import SpecIndex
+from agents.technical_agent.vector_engine import VectorMatchEngine
+from agents.technical_agent.range_index import NumericRangeIndex, RANGE_ATTRIBUTES, RANGE_PARSERS
+from loaders.snapshot import FileFingerprint
+
+
+DELTA_OPS = ("add", "update", "delete")
+
+# Fold a catalog's SKU map changes into a new shared map past this many
+# changes (at least SKU_CHANGES_FOLD_MIN): every delta copies the changes
+SKU_CHANGES_FOLD_FRACTION = 0.05
+SKU_CHANGES_FOLD_MIN = 4096
+
+# match structures a reload rebuilds ahead of the swap (ProductCatalog.warm)
+STRUCTURES = ("bitmask", "spec_index", "vector") + tuple(f"range:{attr}" for attr in RANGE_ATTRIBUTES)
+
+
+class ProductCatalog:
+    """
+    One loaded version of a product catalog.
+
+    Attributes:
+        source_path:  CSV path the catalog was built from
+        version:      catalog version id (prefix of the content hash, then
+                      derived from it by every applied delta)
+        base_version: version of the CSV content the catalog was loaded from
+        products:     normalized product records (CompactCatalog or list of dicts)
+        deleted:      positions of the SKUs deleted by deltas
+        deltas:       number of deltas applied since the load
+        readers:      pipeline runs currently reading this catalog (CatalogManager.acquire)
+        retired:      True once a newer catalog was published in its place
+        released:     True once a retired catalog dropped its match structures
+    """
+
+    def __init__(self, source_path: str, version: str, products: Sequence[Dict[str, Any]]):
+        self.source_path = source_path
+        self.version = version
+        self.base_version = version
+        self.products = products
+        self.deleted: Set[int] = set()
+        self.deltas = 0
+
+        self.readers = 0
+        self.retired = False
+        self.released = False
+
+        self._lock = threading.RLock()
+        self._bitmask_matcher: Optional[BitmaskMatcher] = None
+        self._spec_index: Optional[SpecIndex] = None
+        self._vector_engine: Optional[VectorMatchEngine] = None
+        self._range_indexes: Dict[str, NumericRangeIndex] = {}
+
+        # raw SKU (CSV SKU column) per position and raw SKU -> first position,
+        # built on the first delta; later positions of repeated SKUs are kept
+        # apart, as catalogs rarely repeat them. The map is shared by the
+        # copies of a catalog and never modified: each copy records its own
+        # changes (None: no position any more) on top of it
+        self._raw_skus: Optional[List[str]] = None
+        self._sku_positions: Dict[str, int] = {}
+        self._sku_changes: Dict[str, Optional[int]] = {}
+        self._sku_repeats: Dict[str, List[int]] = {}
+
+    def __len__(self) -> int:
+        """Number of SKUs (deleted SKUs excluded)."""
+        return len(self.products) - len(self.deleted)
+
+    def live_products(self) -> Sequence[Dict[str, Any]]:
+        """Products that are not deleted, in catalog order."""
+        if not self.deleted:
+            return self.products
+        return [product for position, product in enumerate(self.products) if position not in self.deleted]
+
+    def bitmask_matcher(self) -> BitmaskMatcher:
+        """Per-SKU attribute codes for this catalog version (built once)."""
+        with self._lock:
+            if self._bitmask_matcher is None:
+                self._bitmask_matcher = BitmaskMatcher(self.products, self.deleted)
+            return self._bitmask_matcher
+
+    def spec_index(self) -> SpecIndex:
+        """Inverted attribute index for this catalog version (built once)."""
+        with self._lock:
+            if self._spec_index is None:
+                self._spec_index = SpecIndex(self.products, matcher=self.bitmask_matcher(),
+                                             range_indexes=self._range_indexes, deleted=self.deleted)
+            return self._spec_index
+
+    def range_index(self, attr: str) -> NumericRangeIndex:
+        """Sorted range index of one numeric attribute (RANGE_ATTRIBUTES) for this catalog version (built once)."""
+        if attr not in RANGE_ATTRIBUTES:
+            raise ValueError(f"No range index for {attr} (expected one of {RANGE_ATTRIBUTES})")
+        with self._lock:
+            if self._spec_index is not None:
+                return self._spec_index.range_index(attr)
+            if attr not in self._range_indexes:
+                self._range_indexes[attr] = NumericRangeIndex.for_attribute(
+                    self.products, attr, exclude=self.deleted
+                )
+            return self._range_indexes[attr]
+
+    def vector_engine(self) -> VectorMatchEngine:
+        """NumPy match engine for this catalog version (built once)."""
+        with self._lock:
+            if self._vector_engine is None:
+                self._vector_engine = VectorMatchEngine(self.products, deleted=self.deleted)
+            return self._vector_engine
+
+    def nbytes(self) -> int:
+        """
+        Approximate bytes held by the catalog: its records and the match
+        structures built so far (structures shared with other versions of
+        the catalog are counted for each).
+        """
+        with self._lock:
+            if isinstance(self.products, CompactCatalog):
+                total = self.products.nbytes()
+            else:
+                total = column_nbytes(self.products)
+            structures = [self._bitmask_matcher, self._spec_index, self._vector_engine,
+                          *self._range_indexes.values()]
+            total += sum(structure.nbytes() for structure in structures if structure is not None)
+            if self._raw_skus is not None:
+                total += (column_nbytes(self._raw_skus) + sys.getsizeof(self._sku_positions)
+                          + sys.getsizeof(self._sku_changes))
+            return total
+
+    # ---- copy-on-write lifecycle ----
+
+    def built_structures(self) -> List[str]:
+        """Names (STRUCTURES) of the match structures built so far."""
+        with self._lock:
+            built = []
+            if self._bitmask_matcher is not None:
+                built.append("bitmask")
+            if self._spec_index is not None:
+                built.append("spec_index")
+            if self._vector_engine is not None:
+                built.append("vector")
+            built.extend(f"range:{attr}" for attr in self._range_indexes)
+            return built
+
+    def warm(self, structures: Sequence[str]) -> None:
+        """Build the named match structures (STRUCTURES) now instead of on first use."""
+        builders = {"bitmask": self.bitmask_matcher, "spec_index": self.spec_index,
+                    "vector": self.vector_engine}
+        for name in structures:
+            if name.startswith("range:"):
+                self.range_index(name[len("range:"):])
+            else:
+                builders[name]()
+
+    def copy(self) -> "ProductCatalog":
+        """
+        Unpublished copy of this catalog, with the match structures already
+        built, that a delta can change without disturbing readers of this one.
+        Per-SKU columns are copied; tables that only grow (distinct values,
+        vocabularies) and structures deltas never modify (posting lists,
+        sorted range arrays) are shared.
+        """
+
+        with self._lock:
+            if isinstance(self.products, CompactCatalog):
+                products = self.products.copy()
+            else:
+                products = list(self.products)
+            catalog = ProductCatalog(self.source_path, self.version, products)
+            catalog.base_version = self.base_version
+            catalog.deltas = self.deltas
+            catalog.deleted = set(self.deleted)
+
+            if self._raw_skus is not None:
+                catalog._raw_skus = list(self._raw_skus)
+                catalog._sku_positions = self._sku_positions
+                catalog._sku_changes = dict(self._sku_changes)
+                catalog._sku_repeats = {sku: list(positions) for sku, positions in self._sku_repeats.items()}
+
+            catalog._range_indexes = {attr: index.copy() for attr, index in self._range_indexes.items()}
+            if self._bitmask_matcher is not None:
+                catalog._bitmask_matcher = self._bitmask_matcher.copy(products, catalog.deleted)
+            if self._spec_index is not None:
+                catalog._spec_index = self._spec_index.copy(products, catalog.bitmask_matcher(),
+                                                            catalog._range_indexes, catalog.deleted)
+            if self._vector_engine is not None:
+                catalog._vector_engine = self._vector_engine.copy(products, catalog.deleted)
+            return catalog
+
+    def add_reader(self) -> bool:
+        """Count one more reader; False if the catalog was already released (read the current one instead)."""
+        with self._lock:
+            if self.released:
+                return False
+            self.readers += 1
+            return True
+
+    def remove_reader(self) -> None:
+        with self._lock:
+            self.readers -= 1
+            if self.retired and self.readers == 0:
+                self._release()
+
+    def retire(self) -> None:
+        """Mark the catalog as replaced; it is released now or when its last reader leaves."""
+        with self._lock:
+            self.retired = True
+            if self.readers == 0:
+                self._release()
+
+    def _release(self) -> None:
+        # the products stay usable by stray references; structures a newer
+        # version shares stay alive through it
+        self.released = True
+        self._bitmask_matcher = None
+        self._spec_index = None
+        self._vector_engine = None
+        self._range_indexes = {}
+        self._raw_skus = None
+        self._sku_positions = {}
+        self._sku_changes = {}
+        self._sku_repeats = {}
+
+    # ---- deltas ----
+
+    @property
+    def raw_fields(self) -> Tuple[str, ...]:
+        """Columns of the raw CSV rows."""
+        if isinstance(self.products, CompactCatalog):
+            return self.products.raw_fields
+        return tuple((self.products[0].get("_raw") or {}).keys()) if len(self.products) else ()
+
+    @property
+    def raw_sku_field(self) -> Optional[str]:
+        """The CSV column holding the SKU (one of RAW_SKU_FIELDS), if any."""
+        return next((field for field in self.raw_fields if field in RAW_SKU_FIELDS), None)
+
+    def _build_sku_positions(self) -> None:
+        if isinstance(self.products, CompactCatalog):
+            self._raw_skus = self.products.raw_skus()
+        else:
+            field = self.raw_sku_field
+            self._raw_skus = [(product.get("_raw") or {}).get(field) for product in self.products]
+        self._sku_changes = {}
+        self._sku_repeats = {}
+        if not self.deleted:
+            # usual case, unique SKUs: one dict build
+            self._sku_positions = dict(zip(self._raw_skus, range(len(self._raw_skus))))
+            if len(self._sku_positions) == len(self._raw_skus):
+                return
+        positions = {}
+        for position, sku in enumerate(self._raw_skus):
+            if position in self.deleted:
+                continue
+            if sku not in positions:
+                positions[sku] = position
+            else:
+                self._sku_repeats.setdefault(sku, []).append(position)
+        self._sku_positions = positions
+
+    def _first_position(self, sku: str) -> Optional[int]:
+        if sku in self._sku_changes:
+            return self._sku_changes[sku]
+        return self._sku_positions.get(sku)
+
+    def _add_sku_position(self, sku: str, position: int) -> None:
+        if self._first_position(sku) is None:
+            self._sku_changes[sku] = position
+        else:
+            self._sku_repeats.setdefault(sku, []).append(position)
+
+    def _remove_sku_position(self, sku: str, position: int) -> None:
+        repeats = self._sku_repeats.get(sku, [])
+        if self._first_position(sku) == position:
+            self._sku_changes[sku] = repeats.pop(0) if repeats else None
+        elif position in repeats:
+            repeats.remove(position)
+        if not repeats:
+            self._sku_repeats.pop(sku, None)
+
+    def positions_of(self, sku: str) -> List[int]:
+        """Positions of the (not deleted) SKUs whose CSV SKU column is `sku`, in catalog order."""
+        with self._lock:
+            if self._raw_skus is None:
+                self._build_sku_positions()
+            first = self._first_position(sku)
+            if first is None:
+                return []
+            return sorted([first] + self._sku_repeats.get(sku, []))
+
+    def apply_changes(self, version: str, changes: Dict[int, Optional[Dict[str, Any]]]) -> None:
+        """
+        Apply one resolved delta: changes maps positions to their new
+        normalized product (None deletes the SKU). Positions past the end
+        are appended and must follow each other. The built match structures
+        are updated in place, so this is only called on an unpublished copy();
+        the catalog then has `version`.
+        """
+
+        with self._lock:
+            if self._raw_skus is None:
+                self._build_sku_positions()
+            sku_field = self.raw_sku_field
+
+            for position in sorted(changes):
+                product = changes[position]
+                if position < len(self.products):
+                    self._remove_sku_position(self._raw_skus[position], position)
+                if product is None:
+                    self.deleted.add(position)
+                    continue
+                sku = (product.get("_raw") or {}).get(sku_field)
+                if position == len(self.products):
+                    self.products.append(product)
+                    self._raw_skus.append(sku)
+                elif position < len(self.products):
+                    if isinstance(self.products, CompactCatalog):
+                        self.products.replace(position, product)
+                    else:
+                        self.products[position] = product
+                    self._raw_skus[position] = sku
+                else:
+                    raise ValueError(f"Delta appends position {position} after {len(self.products)} SKUs")
+                self._add_sku_position(sku, position)
+
+            positions = list(changes)
+            if self._bitmask_matcher is not None:
+                self._bitmask_matcher.apply_delta(positions)
+            if self._vector_engine is not None:
+                self._vector_engine.apply_delta(positions)
+            if self._spec_index is not None:
+                # also updates the shared range indexes
+                self._spec_index.apply_delta(positions)
+                if self._spec_index.needs_rebuild():
+                    self._spec_index = None
+            else:
+                for attr, index in self._range_indexes.items():
+                    parse = RANGE_PARSERS[attr]
+                    index.apply_delta({
+                        position: None if product is None else parse(product.get(attr, ""))
+                        for position, product in changes.items()
+                    })
+
+            if len(self._sku_changes) > max(SKU_CHANGES_FOLD_MIN,
+                                            SKU_CHANGES_FOLD_FRACTION * len(self._sku_positions)):
+                self._fold_sku_changes()
+
+            self.version = version
+            self.deltas += 1
+
+    def _fold_sku_changes(self) -> None:
+        positions = dict(self._sku_positions)
+        for sku, position in self._sku_changes.items():
+            if position is None:
+                positions.pop(sku, None)
+            else:
+                positions[sku] = position
+        self._sku_positions = positions
+        self._sku_changes = {}
+
+
+class CatalogManager:
+    """
+    Keeps normalized catalogs in memory, keyed by CSV path.
+
+    `builder(csv_path)` must return the list of normalized product records;
+    it runs once per catalog version. `row_normalizer(csv_row)` turns one
+    raw CSV row into a normalized product record; it is needed by apply_delta.
+    With background_reloads=False, get() always reloads a changed CSV
+    before returning.
+    """
+
+    def __init__(self, builder: Callable[[str], Sequence[Dict[str, Any]]],
+                 row_normalizer: Optional[Callable[[Dict[str, Any]], Dict[str, Any]]] = None,
+                 background_reloads: bool = True):
+        self._builder = builder
+        self._row_normalizer = row_normalizer
+        self._background_reloads = background_reloads
+        self._lock = threading.Lock()
+        self._catalogs: Dict[str, ProductCatalog] = {}
+        self._fingerprints: Dict[str, FileFingerprint] = {}
+        # per CSV: deltas applied since the load, as [(version, changes)]
+        self._delta_logs: Dict[str, List[Tuple[str, Dict[int, Optional[Dict[str, Any]]]]]] = {}
+
+        # per CSV: serializes reloads and deltas (readers never take it)
+        self._update_locks: Dict[str, threading.RLock] = {}
+        # CSVs being reloaded in the background
+        self._reloading: Set[str] = set()
+        # replaced catalogs still read by in-flight runs
+        self._retired: "weakref.WeakSet[ProductCatalog]" = weakref.WeakSet()
+
+        self._reload_listeners = []
+        self._delta_listeners = []
+
+        self.loads = 0
+        self.hits = 0
+        self.deltas = 0
+        self.swaps = 0
+
+    def add_reload_listener(self, listener: Callable[[ProductCatalog], None]) -> None:
+        """Register listener(old_catalog), called when a cached catalog is replaced or dropped."""
+        self._reload_listeners.append(listener)
+
+    def add_delta_listener(self, listener: Callable) -> None:
+        """
+        Register listener(old_version, new_version, stale_skus, changed_products),
+        called after a delta was applied. stale_skus are the sku_ids whose
+        ranked entries are out of date (updated or deleted SKUs);
+        changed_products is a list of (new normalized product, appended).
+        """
+        self._delta_listeners.append(listener)
+
+    def _notify_dropped(self, catalog: Optional[ProductCatalog]) -> None:
+        if catalog is None:
+            return
+        for listener in self._reload_listeners:
+            listener(catalog)
+
+    def _update_lock(self, key: str) -> threading.RLock:
+        with self._lock:
+            return self._update_locks.setdefault(key, threading.RLock())
+
+    def _retire(self, catalog: Optional[ProductCatalog], notify: bool) -> None:
+        if catalog is None:
+            return
+        catalog.retire()
+        if not catalog.released:
+            self._retired.add(catalog)
+        if notify:
+            self._notify_dropped(catalog)
+
+    def get(self, csv_path: str, wait: bool = False) -> ProductCatalog:
+        """
+        Return the published catalog for csv_path.
+
+        When the file changed, the current catalog is returned while the new
+        one is built in the background (see module docstring); wait=True
+        reloads first. The first load of a CSV is always waited for.
+        """
+
+        if not os.path.exists(csv_path):
+            raise FileNotFoundError(f"Product CSV file not found: {csv_path}")
+
+        key = os.path.abspath(csv_path)
+
+        with self._lock:
+            catalog = self._catalogs.get(key)
+            fingerprint = self._fingerprints.get(key)
+            if catalog is not None and fingerprint.same_stat(os.stat(key)):
+                self.hits += 1
+                return catalog
+
+        if catalog is None or wait or not self._background_reloads:
+            return self._reload(key, csv_path)
+
+        self._start_reload(key, csv_path)
+        with self._lock:
+            self.hits += 1
+        return catalog
+
+    def _start_reload(self, key: str, csv_path: str) -> None:
+        with self._lock:
+            if key in self._reloading:
+                return
+            self._reloading.add(key)
+
+        def reload():
+            try:
+                self._reload(key, csv_path)
+            except Exception as e:
+                # keep serving the current catalog; the next get() retries
+                print(f"[Catalog] Background reload of {csv_path} failed: {e}")
+            finally:
+                with self._lock:
+                    self._reloading.discard(key)
+
+        threading.Thread(target=reload, name=f"catalog-reload:{os.path.basename(key)}", daemon=True).start()
+
+    def _reload(self, key: str, csv_path: str) -> ProductCatalog:
+        """Load the CSV if it changed since the published catalog was built; returns the published catalog."""
+
+        with self._update_lock(key):
+            with self._lock:
+                catalog = self._catalogs.get(key)
+                fingerprint = self._fingerprints.get(key)
+
+            if catalog is not None and fingerprint.same_stat(os.stat(key)):
+                # reloaded by another thread meanwhile
+                return catalog
+
+            new_fingerprint = FileFingerprint.of(key)
+            if catalog is not None and new_fingerprint.content_hash == fingerprint.content_hash:
+                # touched but not modified: keep the loaded catalog
+                with self._lock:
+                    self._fingerprints[key] = new_fingerprint
+                return catalog
+
+            new_catalog = self.build(csv_path, new_fingerprint)
+            if catalog is not None:
+                # readers of the new version should not wait for its structures either
+                new_catalog.warm(catalog.built_structures())
+
+            with self._lock:
+                old_catalog = self._catalogs.get(key)
+                self._catalogs[key] = new_catalog
+                self._fingerprints[key] = new_fingerprint
+                self._delta_logs.pop(key, None)
+                if old_catalog is not None:
+                    self.swaps += 1
+
+        self._retire(old_catalog, notify=True)
+        return new_catalog
+
+    def peek(self, csv_path: str) -> Optional[ProductCatalog]:
+        """The published catalog for csv_path, or None if it is not loaded (never loads or reloads)."""
+        with self._lock:
+            return self._catalogs.get(os.path.abspath(csv_path))
+
+    @contextmanager
+    def acquire(self, csv_path: str) -> Iterator[ProductCatalog]:
+        """
+        Read one catalog version for the duration of the with-block: reloads
+        and deltas publish newer versions meanwhile, but this one keeps its
+        match structures until the block exits.
+        """
+        catalog = self.get(csv_path)
+        while not catalog.add_reader():
+            # released between get() and add_reader(): a newer one is published
+            catalog = self.get(csv_path)
+        try:
+            yield catalog
+        finally:
+            catalog.remove_reader()
+
+    def build(self, csv_path: str, fingerprint: Optional[FileFingerprint] = None) -> ProductCatalog:
+        """Build a catalog from the CSV without consulting the cache."""
+
+        if fingerprint is None:
+            fingerprint = FileFingerprint.of(csv_path)
+
+        products = self._builder(csv_path)
+        self.loads += 1
+
+        catalog = ProductCatalog(csv_path, fingerprint.content_hash[:16], products)
+        print(f"[Catalog] Loaded {len(products)} SKUs from {csv_path} (version {catalog.version})")
+        return catalog
+
+    def apply_delta(self, csv_path: str, records: List[Dict[str, Any]]) -> ProductCatalog:
+        """
+        Apply add / update / delete records to the cached catalog of csv_path
+        (see module docstring) and return the new catalog.
+
+        Each record is a CSV row keyed by the CSV columns plus "op" (one of
+        DELTA_OPS); the SKU column (sku / sku_id / SKU) identifies the SKU.
+        An update only needs the columns it changes. Records are applied in
+        order; a delta that fails validation changes nothing (ValueError).
+        A reload of the CSV in progress is waited for.
+        """
+
+        if self._row_normalizer is None:
+            raise ValueError("This catalog manager has no row normalizer; deltas are not supported")
+
+        key = os.path.abspath(csv_path)
+
+        with self._update_lock(key):
+            catalog = self.get(csv_path, wait=True)
+            old_version = catalog.version
+            changes, stale_skus = self._resolve_delta(catalog, records)
+
+            payload = json.dumps(records, sort_keys=True, default=str)
+            version = hashlib.sha256((old_version + payload).encode("utf-8")).hexdigest()[:16]
+            n_before = len(catalog.products)
+            new_catalog = catalog.copy()
+            new_catalog.apply_changes(version, changes)
+
+            with self._lock:
+                self._catalogs[key] = new_catalog
+                self._delta_logs.setdefault(key, []).append((version, changes))
+                self.deltas += 1
+                self.swaps += 1
+
+        self._retire(catalog, notify=False)
+        changed = [(product, position >= n_before) for position, product in changes.items() if product is not None]
+        print(f"[Catalog] Applied delta of {len(records)} records to {csv_path} "
+              f"(version {old_version} -> {version}, {len(new_catalog)} SKUs)")
+        for listener in self._delta_listeners:
+            listener(old_version, version, stale_skus, changed)
+        return new_catalog
+
+    def _resolve_delta(self, catalog: ProductCatalog,
+                       records: List[Dict[str, Any]]) -> Tuple[Dict[int, Optional[Dict[str, Any]]], Set[str]]:
+        """Validate delta records against the catalog: (position -> product or None, stale sku_ids)."""
+
+        products = catalog.products
+        fields = catalog.raw_fields
+        sku_field = catalog.raw_sku_field
+        if sku_field is None:
+            raise ValueError(f"Catalog has no SKU column (expected one of {RAW_SKU_FIELDS})")
+
+        rows: Dict[int, Optional[Dict[str, Any]]] = {}     # position -> new raw row (None: deleted)
+        positions: Dict[str, List[int]] = {}               # raw SKU -> live positions, as changed so far
+        next_position = len(products)
+
+        def live_positions(sku: str) -> List[int]:
+            if sku not in positions:
+                positions[sku] = catalog.positions_of(sku)
+            return positions[sku]
+
+        for number, record in enumerate(records, start=1):
+            op = record.get("op")
+            if op not in DELTA_OPS:
+                raise ValueError(f"Delta record {number}: op must be one of {DELTA_OPS}, got {op!r}")
+            row = {field: "" if value is None else str(value).strip()
+                   for field, value in record.items() if field != "op"}
+            unknown = [field for field in row if field not in fields]
+            if unknown:
+                raise ValueError(f"Delta record {number}: unknown columns {unknown} (expected {list(fields)})")
+            sku = row.get(sku_field, "")
+            if not sku:
+                raise ValueError(f"Delta record {number}: missing {sku_field}")
+
+            if op == "add":
+                if live_positions(sku):
+                    raise ValueError(f"Delta record {number}: SKU {sku} already exists")
+                rows[next_position] = {field: row.get(field, "") for field in fields}
+                positions[sku] = [next_position]
+                next_position += 1
+                continue
+
+            targets = live_positions(sku)
+            if not targets:
+                raise ValueError(f"Delta record {number}: SKU {sku} not found")
+            for position in targets:
+                if op == "delete":
+                    rows[position] = None
+                else:
+                    current = rows.get(position)
+                    if current is None:
+                        current = dict(products[position].to_dict()["_raw"]
+                                       if isinstance(products, CompactCatalog) else products[position]["_raw"])
+                    current.update(row)
+                    rows[position] = current
+            if op == "delete":
+                positions[sku] = []
+
+        # SKUs added and deleted within the delta are never appended
+        n = len(products)
+        appended = [row for position, row in sorted(rows.items()) if position >= n and row is not None]
+        changes: Dict[int, Optional[Dict[str, Any]]] = {
+            position: None if row is None else self._row_normalizer(row)
+            for position, row in rows.items() if position < n
+        }
+        for offset, row in enumerate(appended):
+            changes[n + offset] = self._row_normalizer(row)
+
+        stale_skus = {products[position].get("sku_id", "") for position in changes if position < n}
+        return changes, stale_skus
+
+    def delta_log(self, csv_path: str) -> Tuple[Optional[str], List[Tuple[str, Dict[int, Optional[Dict[str, Any]]]]]]:
+        """(base version, [(version, changes)]) of the deltas applied to the cached catalog of csv_path."""
+        key = os.path.abspath(csv_path)
+        with self._lock:
+            catalog = self._catalogs.get(key)
+            if catalog is None:
+                return None, []
+            return catalog.base_version, list(self._delta_logs.get(key, []))
+
+    def invalidate(self, csv_path: Optional[str] = None) -> None:
+        """Drop one cached catalog (or all of them) so the next get() reloads."""
+        with self._lock:
+            if csv_path is None:
+                dropped = list(self._catalogs.values())
+                self._catalogs.clear()
+                self._fingerprints.clear()
+                self._delta_logs.clear()
+            else:
+                key = os.path.abspath(csv_path)
+                dropped = [self._catalogs.pop(key, None)]
+                self._fingerprints.pop(key, None)
+                self._delta_logs.pop(key, None)
+
+        for catalog in dropped:
+            self._retire(catalog, notify=True)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            reloading = len(self._reloading)
+        return {
+            "catalogs": len(self._catalogs),
+            "loads": self.loads,
+            "hits": self.hits,
+            "deltas": self.deltas,
+            "swaps": self.swaps,
+            "reloading": reloading,
+            # replaced catalogs still read by in-flight runs
+            "retired_in_use": sum(1 for catalog in list(self._retired) if not catalog.released),
+        }
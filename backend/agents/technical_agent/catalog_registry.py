@@ -0,0 +1,205 @@
+"""
+catalog_registry.py
+
+Registry of the product catalogs the Technical Agent quotes against (one
+per OEM, and tenants may have their own), keyed by catalog id.
+
+Registering a catalog (catalog id -> product specs CSV) loads nothing: its
+normalized records and match structures are loaded on first use, through the
+CatalogManager (catalog.py), so background reloads, deltas and the
+copy-on-write snapshots work per catalog as before.
+
+Memory is bounded by an LRU policy over bytes: after every use the size of
+the catalog (ProductCatalog.nbytes: records plus the match structures built
+so far) is measured, and while the loaded catalogs add up to more than
+max_bytes the least recently used ones are evicted (dropped from the
+CatalogManager; runs still reading one keep it until they finish). Catalogs
+in use and the most recently used one are never evicted, so a single
+catalog larger than the budget stays loaded rather than reloading on every
+request. Catalogs changed by deltas (ProductCatalog.deltas > 0) are never
+evicted either: the deltas live only in memory, and reloading the CSV
+would silently bring deleted SKUs back and revert updated ones. They count
+towards max_bytes, so other catalogs are evicted in their place.
+
+The registry is read from a JSON file mapping catalog ids to CSV paths:
+
+    {"default": "backend/data/datasets/product_specs.csv",
+     "oem-polycab": "backend/data/datasets/polycab_specs.csv"}
+
+Shard worker processes (sharding.py) hold their own copies and are not
+counted.
+"""
+
+import os
+import json
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Dict, Any, Iterator, List
+
+from agents.technical_agent.catalog import CatalogManager, ProductCatalog
+
+
+DEFAULT_MAX_BYTES = 2 << 30     # 2 GiB
+
+
+class _CatalogEntry:
+    """Registration and counters of one catalog id."""
+
+    __slots__ = ("csv_path", "bytes", "readers", "hits", "loads", "evictions")
+
+    def __init__(self, csv_path: str):
+        self.csv_path = csv_path
+        self.bytes = 0
+        self.readers = 0
+        self.hits = 0
+        self.loads = 0
+        self.evictions = 0
+
+
+class CatalogRegistry:
+    """Catalog id -> lazily loaded catalog, LRU-evicted by total bytes (see module docstring)."""
+
+    def __init__(self, manager: CatalogManager, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.manager = manager
+        self.max_bytes = max_bytes
+        # least recently used first
+        self._entries: "OrderedDict[str, _CatalogEntry]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    # ---- registration ----
+
+    def register(self, catalog_id: str, csv_path: str) -> None:
+        """Register (or re-point) a catalog id; nothing is loaded until it is used."""
+        if not catalog_id:
+            raise ValueError("Catalog id must not be empty")
+        with self._lock:
+            entry = self._entries.get(catalog_id)
+            csv_path = os.path.normpath(csv_path)
+            if entry is not None and entry.csv_path == csv_path:
+                return
+            self._entries[catalog_id] = _CatalogEntry(csv_path)
+            self._entries.move_to_end(catalog_id, last=False)
+        if entry is not None:
+            self._drop(entry)
+
+    def unregister(self, catalog_id: str) -> None:
+        """Forget a catalog id and drop its catalog."""
+        with self._lock:
+            entry = self._entries.pop(catalog_id, None)
+        if entry is not None:
+            self._drop(entry)
+
+    def load_config(self, config_path: str) -> List[str]:
+        """Register every catalog of a JSON file {catalog_id: csv_path}; returns the ids."""
+        with open(config_path, "r", encoding="utf-8") as f:
+            catalogs = json.load(f)
+        if not isinstance(catalogs, dict):
+            raise ValueError(f"Catalog registry {config_path} must map catalog ids to CSV paths")
+        for catalog_id, csv_path in catalogs.items():
+            self.register(catalog_id, csv_path)
+        return list(catalogs)
+
+    def catalog_ids(self) -> List[str]:
+        with self._lock:
+            return sorted(self._entries)
+
+    def csv_path(self, catalog_id: str) -> str:
+        """CSV path registered for catalog_id (ValueError for an unknown id)."""
+        with self._lock:
+            entry = self._entries.get(catalog_id)
+        if entry is None:
+            raise ValueError(f"Unknown catalog id: {catalog_id!r} (registered: {self.catalog_ids()})")
+        return entry.csv_path
+
+    # ---- use ----
+
+    @contextmanager
+    def acquire(self, catalog_id: str) -> Iterator[ProductCatalog]:
+        """
+        Read the catalog of catalog_id for the duration of the with-block
+        (loaded on first use; see CatalogManager.acquire). The catalog cannot
+        be evicted meanwhile; the budget is enforced when the block exits.
+        """
+
+        with self._lock:
+            entry = self._entries.get(catalog_id)
+            if entry is None:
+                raise ValueError(f"Unknown catalog id: {catalog_id!r} (registered: {sorted(self._entries)})")
+            if self.manager.peek(entry.csv_path) is None:
+                entry.loads += 1
+            else:
+                entry.hits += 1
+            entry.readers += 1
+            self._entries.move_to_end(catalog_id)
+
+        try:
+            with self.manager.acquire(entry.csv_path) as catalog:
+                yield catalog
+        finally:
+            with self._lock:
+                entry.readers -= 1
+            self._account(entry)
+
+    def _account(self, entry: _CatalogEntry) -> None:
+        """Measure the catalog of entry, then evict LRU catalogs while over budget."""
+
+        catalog = self.manager.peek(entry.csv_path)
+        size = catalog.nbytes() if catalog is not None else 0
+
+        evicted = []
+        with self._lock:
+            entry.bytes = size
+            # one catalog per CSV, even when several ids share it
+            sizes = {e.csv_path: e.bytes for e in self._entries.values()
+                     if e.bytes and self.manager.peek(e.csv_path) is not None}
+            total = sum(sizes.values())
+            # never evicted: catalogs being read, the most recently used one and
+            # catalogs changed by deltas (only a reload of their CSV would remain)
+            pinned = {e.csv_path for e in self._entries.values() if e.readers}
+            pinned.add(next(reversed(self._entries.values())).csv_path)
+            pinned.update(path for path in sizes if self.manager.peek(path).deltas)
+            for catalog_id, candidate in self._entries.items():
+                if total <= self.max_bytes:
+                    break
+                if candidate.csv_path in sizes and candidate.csv_path not in pinned:
+                    total -= sizes.pop(candidate.csv_path)
+                    candidate.evictions += 1
+                    evicted.append((catalog_id, candidate))
+            for _, candidate in evicted:
+                for e in self._entries.values():
+                    if e.csv_path == candidate.csv_path:
+                        e.bytes = 0
+
+        for catalog_id, candidate in evicted:
+            print(f"[Catalog] Evicted catalog {catalog_id} ({candidate.csv_path}) to stay within "
+                  f"{self.max_bytes} bytes")
+            self.manager.invalidate(candidate.csv_path)
+
+    def _drop(self, entry: _CatalogEntry) -> None:
+        # another id may still use the same CSV
+        with self._lock:
+            shared = any(e.csv_path == entry.csv_path for e in self._entries.values())
+        if not shared:
+            self.manager.invalidate(entry.csv_path)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            catalogs = {
+                catalog_id: {
+                    "csv_path": entry.csv_path,
+                    "loaded": self.manager.peek(entry.csv_path) is not None,
+                    "bytes": entry.bytes,
+                    "readers": entry.readers,
+                    "hits": entry.hits,
+                    "loads": entry.loads,
+                    "evictions": entry.evictions,
+                }
+                for catalog_id, entry in self._entries.items()
+            }
+        loaded = {catalog["csv_path"]: catalog["bytes"] for catalog in catalogs.values() if catalog["loaded"]}
+        return {
+            "max_bytes": self.max_bytes,
+            "bytes": sum(loaded.values()),
+            "catalogs": catalogs,
+        }
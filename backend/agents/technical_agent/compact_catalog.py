@@ -0,0 +1,414 @@
+"""
+compact_catalog.py
+
+Compact, array-backed storage for the normalized product catalog.
+
+normalize_product_specs produces one dict per SKU plus a nested copy of the
+raw CSV row. For large catalogs that is several hundred bytes of dict
+overhead per SKU and many duplicated strings. CompactCatalog stores the same
+data column-wise:
+
+- a string table holding every distinct spec / raw value once (interned)
+- normalized spec values as codes into the string table (array of uint32)
+- raw CSV values as codes as well, except the SKU column, which is unique
+  per row and kept as a plain list
+- the raw CSV header once for the whole catalog
+
+Indexing the catalog returns a SkuRecord, a two-slot view that supports
+.get(key, default) like the normalized product dict, so the matchers rank
+over the catalog directly. The full dict (including "_raw") is only
+materialized with to_dict() when a SKU is returned in a ranked result.
+
+Rows can be replaced in place (replace(), used by catalog deltas); the
+values they drop stay in the string table until the catalog is reloaded.
+copy() gives a new catalog version its own rows; the string table only ever
+grows, so the copies share it.
+
+The columns can be written to a binary snapshot (loaders/snapshot.py) and
+reopened with mmap: from_snapshot() wraps the mapped columns without
+copying them (only the small table of distinct values is decoded), and the
+catalog is only copied into Python lists / arrays if it is appended to or
+rows are replaced afterwards; the per-SKU id columns then stay mapped and
+only the changed values are kept aside.
+"""
+
+import sys
+from array import array
+from typing import Dict, Any, List, Optional, Tuple, Iterable
+
+from loaders.snapshot import Snapshot, write_snapshot
+
+
+SPEC_FIELDS = ("cores", "size_sqmm", "voltage", "insulation", "conductor", "standard")
+RAW_SKU_FIELDS = ("sku", "sku_id", "SKU")
+
+_SPEC_POSITIONS = {field: i for i, field in enumerate(SPEC_FIELDS)}
+_N_SPECS = len(SPEC_FIELDS)
+
+# list items sampled by column_nbytes
+NBYTES_SAMPLE = 1000
+
+
+def column_nbytes(values) -> int:
+    """
+    Approximate bytes held by a column: the buffer of an array, memoryview,
+    NumPy array or snapshot string table; for a list, its pointer array plus
+    the size of its items, estimated from up to NBYTES_SAMPLE of them.
+    """
+    if isinstance(values, array):
+        return values.itemsize * len(values)
+    if hasattr(values, "nbytes"):
+        return values.nbytes
+    if isinstance(values, _PatchedStrings):
+        return (column_nbytes(values._base) + sys.getsizeof(values._replaced)
+                + column_nbytes(list(values._replaced.values())) + column_nbytes(values._appended))
+    n = len(values)
+    if not n:
+        return sys.getsizeof(values)
+    sample = values[::max(1, n // NBYTES_SAMPLE)]
+    return sys.getsizeof(values) + sum(map(sys.getsizeof, sample)) * n // len(sample)
+
+
+def _as_list(values) -> list:
+    """Mutable copy of a column (snapshot string tables are decoded in bulk)."""
+    return values.to_list() if hasattr(values, "to_list") else list(values)
+
+
+class _PatchedStrings:
+    """
+    Snapshot string table plus replaced / appended values, so a thawed
+    catalog does not decode every SKU id up front.
+    """
+
+    __slots__ = ("_base", "_replaced", "_appended")
+
+    def __init__(self, base):
+        self._base = base
+        self._replaced: Dict[int, Any] = {}
+        self._appended: List[Any] = []
+
+    def __len__(self) -> int:
+        return len(self._base) + len(self._appended)
+
+    def __getitem__(self, position: int) -> Any:
+        n = len(self._base)
+        if position >= n:
+            return self._appended[position - n]
+        if position in self._replaced:
+            return self._replaced[position]
+        return self._base[position]
+
+    def __setitem__(self, position: int, value: Any) -> None:
+        n = len(self._base)
+        if position >= n:
+            self._appended[position - n] = value
+        else:
+            self._replaced[position] = value
+
+    def __iter__(self):
+        for position in range(len(self)):
+            yield self[position]
+
+    def append(self, value: Any) -> None:
+        self._appended.append(value)
+
+    def copy(self) -> "_PatchedStrings":
+        strings = _PatchedStrings(self._base)
+        strings._replaced = dict(self._replaced)
+        strings._appended = list(self._appended)
+        return strings
+
+    def to_list(self) -> List[Any]:
+        values = _as_list(self._base)
+        for position, value in self._replaced.items():
+            values[position] = value
+        return values + self._appended
+
+
+def _thawed_strings(values):
+    return _PatchedStrings(values) if hasattr(values, "to_list") else list(values)
+
+
+def _thawed_codes(values) -> array:
+    codes = array("I")
+    if isinstance(values, memoryview):
+        codes.frombytes(values.cast("B"))
+    else:
+        codes.extend(values)
+    return codes
+
+
+class SkuRecord:
+    """View of one SKU of a CompactCatalog."""
+
+    __slots__ = ("catalog", "position")
+
+    def __init__(self, catalog: "CompactCatalog", position: int):
+        self.catalog = catalog
+        self.position = position
+
+    def get(self, key: str, default: Any = None) -> Any:
+        """dict-style access to the normalized fields."""
+        return self.catalog.get_value(self.position, key, default)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Materialize the normalized product dict, as produced by normalize_product_specs."""
+        return self.catalog.to_dict(self.position)
+
+
+class CompactCatalog:
+    """
+    Column-wise catalog of normalized SKUs (see module docstring).
+
+    Build it with append(normalized_product) for every product dict returned
+    by normalize_product_specs.
+    """
+
+    def __init__(self):
+        self._strings: List[Any] = []
+        # None for a snapshot-backed catalog until the first append()
+        self._string_codes: Optional[Dict[Any, int]] = {}
+
+        self._sku_ids: List[str] = []
+        self._specs = array("I")
+
+        self._raw_fields: Optional[Tuple[str, ...]] = None
+        self._raw_sku_column: Optional[int] = None
+        self._raw_skus: List[Any] = []
+        self._raw = array("I")
+
+    # ---- build ----
+
+    def _code(self, value) -> int:
+        code = self._string_codes.get(value)
+        if code is None:
+            code = len(self._strings)
+            self._strings.append(value)
+            self._string_codes[value] = code
+        return code
+
+    def _thaw(self) -> None:
+        """Copy snapshot-backed columns into mutable lists / arrays."""
+        if self._string_codes is not None:
+            return
+        self._strings = list(self._strings)
+        self._string_codes = {value: code for code, value in enumerate(self._strings)}
+        self._sku_ids = _thawed_strings(self._sku_ids)
+        self._specs = _thawed_codes(self._specs)
+        self._raw_skus = _thawed_strings(self._raw_skus)
+        self._raw = _thawed_codes(self._raw)
+
+    def _check_raw_fields(self, raw: Dict[str, Any]) -> None:
+        fields = tuple(raw.keys())
+        if self._raw_fields is None:
+            self._raw_fields = fields
+            self._raw_sku_column = next(
+                (i for i, field in enumerate(fields) if field in RAW_SKU_FIELDS), None
+            )
+        elif fields != self._raw_fields:
+            raise ValueError(f"Product row has columns {fields}, expected {self._raw_fields}")
+
+    def _raw_codes(self, raw: Dict[str, Any]) -> Tuple[List[int], Any]:
+        """(codes of the raw row, raw SKU value)."""
+        codes = []
+        raw_sku = None
+        for i, value in enumerate(raw.values()):
+            if i == self._raw_sku_column:
+                # SKU ids are unique per row: kept out of the string table
+                raw_sku = value
+                codes.append(0)
+            else:
+                codes.append(self._code(value))
+        return codes, raw_sku
+
+    def append(self, product: Dict[str, Any]) -> int:
+        """Add one normalized product dict; returns its position."""
+
+        self._thaw()
+
+        raw = product.get("_raw") or {}
+        self._check_raw_fields(raw)
+
+        self._sku_ids.append(product.get("sku_id", ""))
+        self._specs.extend(self._code(product.get(field, "")) for field in SPEC_FIELDS)
+
+        codes, raw_sku = self._raw_codes(raw)
+        self._raw.extend(codes)
+        self._raw_skus.append(raw_sku)
+
+        return len(self._sku_ids) - 1
+
+    def replace(self, position: int, product: Dict[str, Any]) -> None:
+        """Overwrite the SKU at `position` with a normalized product dict."""
+
+        if not 0 <= position < len(self._sku_ids):
+            raise IndexError("catalog index out of range")
+        self._thaw()
+
+        raw = product.get("_raw") or {}
+        self._check_raw_fields(raw)
+
+        self._sku_ids[position] = product.get("sku_id", "")
+        base = position * _N_SPECS
+        for i, field in enumerate(SPEC_FIELDS):
+            self._specs[base + i] = self._code(product.get(field, ""))
+
+        codes, raw_sku = self._raw_codes(raw)
+        width = len(codes)
+        self._raw[position * width:(position + 1) * width] = array("I", codes)
+        self._raw_skus[position] = raw_sku
+
+    def copy(self) -> "CompactCatalog":
+        """Catalog with its own rows (copied), sharing the append-only string table."""
+        catalog = CompactCatalog()
+        catalog._strings = self._strings
+        catalog._string_codes = self._string_codes
+        catalog._raw_fields = self._raw_fields
+        catalog._raw_sku_column = self._raw_sku_column
+        if self._string_codes is None:
+            # snapshot-backed: the mapped columns are read-only, the copy thaws its own
+            catalog._sku_ids, catalog._specs = self._sku_ids, self._specs
+            catalog._raw_skus, catalog._raw = self._raw_skus, self._raw
+        else:
+            catalog._sku_ids, catalog._raw_skus = (
+                strings.copy() if isinstance(strings, _PatchedStrings) else list(strings)
+                for strings in (self._sku_ids, self._raw_skus)
+            )
+            catalog._specs = self._specs[:]
+            catalog._raw = self._raw[:]
+        return catalog
+
+    # ---- access ----
+
+    def __len__(self) -> int:
+        return len(self._sku_ids)
+
+    def __getitem__(self, position: int) -> SkuRecord:
+        if position < 0:
+            position += len(self._sku_ids)
+        if not 0 <= position < len(self._sku_ids):
+            raise IndexError("catalog index out of range")
+        return SkuRecord(self, position)
+
+    def __iter__(self):
+        for position in range(len(self._sku_ids)):
+            yield SkuRecord(self, position)
+
+    @property
+    def raw_fields(self) -> Tuple[str, ...]:
+        """Columns of the raw CSV rows."""
+        return self._raw_fields or ()
+
+    def nbytes(self) -> int:
+        """Approximate bytes held by the columns (mapped snapshot columns included)."""
+        total = sum(column_nbytes(column) for column in
+                    (self._strings, self._sku_ids, self._specs, self._raw, self._raw_skus))
+        if self._string_codes is not None:
+            total += sys.getsizeof(self._string_codes)
+        return total
+
+    def sku_ids(self) -> List[str]:
+        """Normalized sku_id of every position, as a new list."""
+        return _as_list(self._sku_ids)
+
+    def raw_skus(self) -> List[Any]:
+        """Raw SKU column value of every position, as a new list (None without a SKU column)."""
+        return _as_list(self._raw_skus)
+
+    def get_value(self, position: int, key: str, default: Any = None) -> Any:
+        """Value of one normalized field of the SKU at `position`."""
+        spec = _SPEC_POSITIONS.get(key)
+        if spec is not None:
+            return self._strings[self._specs[position * _N_SPECS + spec]]
+        if key == "sku_id":
+            return self._sku_ids[position]
+        if key == "_raw":
+            return self.raw_row(position)
+        return default
+
+    def raw_row(self, position: int) -> Dict[str, Any]:
+        """The original CSV row of the SKU at `position`."""
+        fields = self._raw_fields or ()
+        width = len(fields)
+        codes = self._raw[position * width:(position + 1) * width]
+        values = [self._strings[code] for code in codes]
+        if self._raw_sku_column is not None:
+            values[self._raw_sku_column] = self._raw_skus[position]
+        return dict(zip(fields, values))
+
+    def to_dict(self, position: int) -> Dict[str, Any]:
+        """Materialize the normalized product dict of the SKU at `position`."""
+        product = {"sku_id": self._sku_ids[position]}
+        base = position * _N_SPECS
+        for i, field in enumerate(SPEC_FIELDS):
+            product[field] = self._strings[self._specs[base + i]]
+        product["_raw"] = self.raw_row(position)
+        return product
+
+    def subset(self, positions: Iterable[int]) -> "CompactCatalog":
+        """New catalog holding the SKUs at `positions`, in that order."""
+        catalog = CompactCatalog()
+        for position in positions:
+            catalog.append(self.to_dict(position))
+        return catalog
+
+    # ---- snapshot ----
+
+    def write_snapshot(self, path: str, kind: str, schema_version: int, sources: List[Dict[str, Any]]) -> None:
+        """
+        Write the catalog columns to a binary snapshot (see loaders/snapshot.py);
+        sources: fingerprints of the source files taken before they were parsed.
+        """
+        columns = {
+            "strings": ("str", self._strings),
+            "sku_ids": ("str", self._sku_ids),
+            "specs": ("u32", self._specs),
+            "raw": ("u32", self._raw),
+        }
+        if self._raw_sku_column is not None:
+            columns["raw_skus"] = ("str", self._raw_skus)
+        meta = {"raw_fields": list(self._raw_fields or ()), "raw_sku_column": self._raw_sku_column,
+                "spec_fields": list(SPEC_FIELDS)}
+        write_snapshot(path, kind, schema_version, sources, columns, meta)
+
+    @classmethod
+    def from_snapshot(cls, snapshot: Snapshot) -> "CompactCatalog":
+        """Catalog backed by the mapped columns of a snapshot written by write_snapshot()."""
+
+        if tuple(snapshot.meta.get("spec_fields", ())) != SPEC_FIELDS:
+            raise ValueError(f"Snapshot {snapshot.path} has spec fields {snapshot.meta.get('spec_fields')}")
+
+        catalog = cls()
+        # distinct values only (SKU ids are kept apart): decoded once, they are
+        # read for every SKU while the match structures are built
+        catalog._strings = list(snapshot.column("strings"))
+        catalog._string_codes = None
+        catalog._sku_ids = snapshot.column("sku_ids")
+        catalog._specs = snapshot.column("specs")
+        catalog._raw = snapshot.column("raw")
+
+        raw_fields = snapshot.meta.get("raw_fields")
+        catalog._raw_fields = tuple(raw_fields) if raw_fields else None
+        catalog._raw_sku_column = snapshot.meta.get("raw_sku_column")
+        if catalog._raw_sku_column is not None:
+            catalog._raw_skus = snapshot.column("raw_skus")
+        else:
+            catalog._raw_skus = [None] * len(catalog._sku_ids)
+        return catalog
+
+
+def materialize_product(product) -> Dict[str, Any]:
+    """Return a plain product dict for a SkuRecord or an already-normalized dict."""
+    if isinstance(product, SkuRecord):
+        return product.to_dict()
+    return product
+
+
+def make_ranked_entry(product, match_percent: float, match_mask: int) -> Dict[str, Any]:
+    """Build one ranked entry ({"sku_id", "match_percent", "match_mask", "product"})."""
+    return {
+        "sku_id": product.get("sku_id", product.get("sku", "UNKNOWN")),
+        "match_percent": match_percent,
+        "match_mask": match_mask,
+        "product": materialize_product(product)
+    }
@@ -0,0 +1,170 @@
+"""
+match_cache.py
+
+Process-wide LRU cache of ranked match results.
+
+The same line-item specification (e.g. 3C x 2.5 sqmm, 1.1kV, PVC, Copper,
+IS 694) shows up across many RFPs. Its ranking only depends on:
+
+- the item's spec signature (match keys of the six attributes, spec_keys.py)
+- the catalog version
+- the attribute weights and tolerances (MatchScorer.signature) and the
+  number of SKUs kept (top-k)
+
+so the ranked entries are cached under that key and shared across items,
+RFPs and requests. Entries of a catalog version are dropped when the
+catalog is reloaded (CatalogManager reload listener), and the cache is
+bounded by an LRU policy.
+
+When a delta is applied to the catalog (CatalogManager delta listener),
+apply_delta moves the entries the delta cannot affect to the new version and
+drops the others. An entry is affected when it ranks an updated or deleted
+SKU, or when a changed SKU would now enter its top-k; the latter is checked
+by scoring only the changed SKUs against the item the entry was ranked for.
+"""
+
+import threading
+from collections import OrderedDict
+from typing import List, Dict, Any, Optional, Tuple, Iterable, Set
+
+from agents.technical_agent.bitmask_matcher import BitmaskMatcher, MatchScorer
+from agents.technical_agent.spec_keys import spec_signature
+
+
+DEFAULT_MAX_ENTRIES = 4096
+
+
+class MatchResultCache:
+    """Thread-safe LRU map: (version, scorer signature, k, spec signature) -> ranked entries."""
+
+    def __init__(self, max_entries: int = DEFAULT_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Tuple, List[Dict[str, Any]]]" = OrderedDict()
+        # key -> (rfp item, scorer) the entries were ranked for, used to re-check them on deltas
+        self._sources: Dict[Tuple, Tuple[Dict[str, Any], MatchScorer]] = {}
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.carried_over = 0
+
+    @staticmethod
+    def make_key(catalog_version: str, rfp_item: Dict[str, Any], limit: int, scorer_signature) -> Tuple:
+        return catalog_version, tuple(scorer_signature), limit, spec_signature(rfp_item)
+
+    def get(self, key: Tuple) -> Optional[List[Dict[str, Any]]]:
+        """Cached entries for key (as a fresh list of entry copies), or None."""
+        with self._lock:
+            entries = self._entries.get(key)
+            if entries is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+        # entry dicts are copied; the product dicts inside are shared read-only
+        return [dict(entry) for entry in entries]
+
+    def put(self, key: Tuple, entries: List[Dict[str, Any]], rfp_item: Optional[Dict[str, Any]] = None,
+            scorer: Optional[MatchScorer] = None) -> None:
+        """Store entries; with rfp_item and scorer they can outlive catalog deltas (apply_delta)."""
+        with self._lock:
+            self._entries[key] = [dict(entry) for entry in entries]
+            self._entries.move_to_end(key)
+            if rfp_item is not None and scorer is not None:
+                self._sources[key] = (rfp_item, scorer)
+            else:
+                self._sources.pop(key, None)
+            while len(self._entries) > self.max_entries:
+                evicted, _ = self._entries.popitem(last=False)
+                self._sources.pop(evicted, None)
+                self.evictions += 1
+
+    def invalidate_version(self, catalog_version: str) -> int:
+        """Drop every entry computed against catalog_version; returns the count."""
+        with self._lock:
+            stale = [key for key in self._entries if key[0] == catalog_version]
+            for key in stale:
+                del self._entries[key]
+                self._sources.pop(key, None)
+            return len(stale)
+
+    def apply_delta(self, old_version: str, new_version: str, stale_skus: Set[str],
+                    changed_products: Iterable[Tuple[Dict[str, Any], bool]]) -> int:
+        """
+        Carry the entries of old_version that a catalog delta cannot affect
+        over to new_version and drop the rest (see module docstring).
+        changed_products holds (new normalized product, appended) pairs.
+        Returns the number of entries carried over.
+        """
+
+        changed_products = list(changed_products)
+        matcher = BitmaskMatcher([product for product, _ in changed_products])
+        appended = [is_appended for _, is_appended in changed_products]
+        # (scorer signature, spec signature) -> best rank among updated / appended SKUs
+        best_ranks: Dict[Tuple, Tuple[int, int]] = {}
+
+        def changed_best_ranks(key: Tuple, source: Tuple[Dict[str, Any], MatchScorer]) -> Tuple[int, int]:
+            group = (key[1], key[3])
+            if group not in best_ranks:
+                rfp_item, scorer = source
+                rank_table = scorer.rank_table
+                ranks = [rank_table[mask] for mask in matcher.masks(matcher.item_tables(rfp_item, scorer))]
+                best_ranks[group] = (
+                    max((rank for rank, is_appended in zip(ranks, appended) if not is_appended), default=-1),
+                    max((rank for rank, is_appended in zip(ranks, appended) if is_appended), default=-1),
+                )
+            return best_ranks[group]
+
+        with self._lock:
+            migrated = OrderedDict()
+            carried = 0
+            for key, entries in self._entries.items():
+                if key[0] != old_version:
+                    migrated[key] = entries
+                    continue
+                source = self._sources.pop(key, None)
+                if source is None or not self._survives(entries, key, source, stale_skus, appended,
+                                                        changed_best_ranks):
+                    continue
+                new_key = (new_version,) + key[1:]
+                migrated[new_key] = entries
+                self._sources[new_key] = source
+                carried += 1
+            self._entries = migrated
+            self.carried_over += carried
+        return carried
+
+    @staticmethod
+    def _survives(entries: List[Dict[str, Any]], key: Tuple, source: Tuple[Dict[str, Any], MatchScorer],
+                  stale_skus: Set[str], appended: List[bool], changed_best_ranks) -> bool:
+        """True when the ranked entries are still the top `limit` after the delta."""
+
+        if any(entry["sku_id"] in stale_skus for entry in entries):
+            return False
+        if len(entries) < key[2]:
+            # every SKU was ranked: any change shows up in the list
+            return not (stale_skus or appended)
+        if not appended:
+            return True
+
+        kth_rank = source[1].rank_table[entries[-1]["match_mask"]]
+        best_updated, best_appended = changed_best_ranks(key, source)
+        # appended SKUs lose catalog-order ties; updated ones may win them
+        return best_updated < kth_rank and best_appended <= kth_rank
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._sources.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "carried_over": self.carried_over,
+            }
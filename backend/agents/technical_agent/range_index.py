@@ -0,0 +1,181 @@
+"""
+range_index.py
+
+Sorted-array range index over one numeric spec attribute.
+
+Toleranced matches (size_sqmm within ±0.2) cannot be looked up in a hash
+index. NumericRangeIndex keeps the parsed values of one attribute sorted,
+with the catalog position of every value alongside:
+
+    values    [1.5, 1.5, 2.5, 2.5, 2.5, 4.0, ...]   (array of float64)
+    positions [ 17,  40,   0,   2,   9,   1, ...]   (array of uint32)
+
+within(value, tolerance) finds the matching run with two binary searches
+(bisect), so a lookup costs O(log n + k) for k matching SKUs. The index does
+not depend on the tolerance, so tolerances can change per query (MatchScorer
+tolerances, catalog search) without rebuilding anything.
+
+Matches use the exact abs(value - v) <= tolerance test of calculate_spec_mask.
+The binary searches locate the values in [value - tolerance, value + tolerance];
+the edges of that run are then moved so that floating-point rounding of
+value ± tolerance never adds or drops a SKU.
+
+SKUs whose value does not parse (or is not finite) are not indexed; they can
+never satisfy a numeric test.
+
+Catalog deltas (apply_delta) do not touch the sorted arrays: changed
+positions are masked out of them and their new values kept in a small
+unsorted overlay that every lookup also scans. Once the overlay grows past
+OVERLAY_COMPACT_FRACTION of the index, the arrays are rebuilt with it merged in.
+The sorted arrays are never modified in place, so copy() (the index of a new
+catalog version, see catalog.py) shares them and only copies the overlay.
+"""
+
+import sys
+import heapq
+import math
+from array import array
+from bisect import bisect_left, bisect_right
+from typing import List, Dict, Any, Optional, Sequence, Tuple, Set, Collection
+
+from agents.technical_agent.spec_keys import parse_size, parse_voltage
+
+
+# attribute -> parser of the normalized value into a float (None if unparseable)
+RANGE_PARSERS = {
+    "cores": parse_size,        # float count, so 3.5 core cables keep their half core
+    "size_sqmm": parse_size,
+    "voltage": parse_voltage,   # kV
+}
+RANGE_ATTRIBUTES = tuple(RANGE_PARSERS)
+
+# Rebuild the sorted arrays once the delta overlay holds this share of the
+# indexed values (at least OVERLAY_COMPACT_MIN positions)
+OVERLAY_COMPACT_FRACTION = 0.02
+OVERLAY_COMPACT_MIN = 4096
+
+
+class NumericRangeIndex:
+    """Sorted (value, position) arrays over one numeric attribute (see module docstring)."""
+
+    def __init__(self, values: Sequence[Optional[float]]):
+        """values[position] is the parsed value of the SKU at that position, or None."""
+        indexed = [
+            position for position, value in enumerate(values)
+            if value is not None and math.isfinite(value)
+        ]
+        indexed.sort(key=values.__getitem__)
+
+        self._values = array("d", (values[position] for position in indexed))
+        self._positions = array("I", indexed)
+
+        # catalog deltas: positions masked out of the arrays, and their current values
+        self._stale: Set[int] = set()
+        self._overlay: Dict[int, float] = {}
+
+    @classmethod
+    def for_attribute(cls, products: Sequence[Dict[str, Any]], attr: str,
+                      exclude: Collection[int] = ()) -> "NumericRangeIndex":
+        """Index of one RANGE_ATTRIBUTES attribute over normalized products (minus `exclude` positions)."""
+        parse = RANGE_PARSERS[attr]
+        return cls([
+            None if position in exclude else parse(product.get(attr, ""))
+            for position, product in enumerate(products)
+        ])
+
+    def __len__(self) -> int:
+        return len(self._values) - len(self._stale) + len(self._overlay)
+
+    def nbytes(self) -> int:
+        """Approximate bytes held by the sorted arrays and the delta overlay."""
+        return (self._values.itemsize * len(self._values) + self._positions.itemsize * len(self._positions)
+                + sys.getsizeof(self._stale) + sys.getsizeof(self._overlay))
+
+    # ---- deltas ----
+
+    def copy(self) -> "NumericRangeIndex":
+        """Independent index sharing the (read-only) sorted arrays."""
+        clone = NumericRangeIndex.__new__(NumericRangeIndex)
+        clone._values = self._values
+        clone._positions = self._positions
+        clone._stale = set(self._stale)
+        clone._overlay = dict(self._overlay)
+        return clone
+
+    def apply_delta(self, values: Dict[int, Optional[float]]) -> None:
+        """Set the value of changed positions (None: not indexed any more, e.g. deleted SKUs)."""
+        for position, value in values.items():
+            self._stale.add(position)
+            if value is not None and math.isfinite(value):
+                self._overlay[position] = value
+            else:
+                self._overlay.pop(position, None)
+
+        if len(self._stale) > max(OVERLAY_COMPACT_MIN, OVERLAY_COMPACT_FRACTION * len(self._values)):
+            self._compact()
+
+    def _compact(self) -> None:
+        """Merge the overlay into the sorted arrays."""
+        stale = self._stale
+        kept = [(value, position) for value, position in zip(self._values, self._positions)
+                if position not in stale]
+        merged = list(heapq.merge(kept, sorted((value, position) for position, value in self._overlay.items())))
+        self._values = array("d", (value for value, _ in merged))
+        self._positions = array("I", (position for _, position in merged))
+        self._stale = set()
+        self._overlay = {}
+
+    def _base_positions(self, lo: int, hi: int) -> List[int]:
+        positions = self._positions[lo:hi].tolist()
+        if self._stale:
+            stale = self._stale
+            positions = [position for position in positions if position not in stale]
+        return positions
+
+    def _run(self, value: float, tolerance: float) -> Tuple[int, int]:
+        """[lo, hi) bounds of the values v with abs(value - v) <= tolerance."""
+        values = self._values
+        n = len(values)
+        lo = bisect_left(values, value - tolerance)
+        hi = bisect_right(values, value + tolerance)
+
+        # the matching values form one contiguous run (subtraction is monotonic);
+        # fix up its edges where value ± tolerance was rounded
+        while lo > 0 and abs(value - values[lo - 1]) <= tolerance:
+            lo -= 1
+        while lo < hi and abs(value - values[lo]) > tolerance:
+            lo += 1
+        while hi < n and abs(value - values[hi]) <= tolerance:
+            hi += 1
+        while hi > lo and abs(value - values[hi - 1]) > tolerance:
+            hi -= 1
+        return lo, hi
+
+    def within(self, value: float, tolerance: float) -> List[int]:
+        """Positions of the SKUs with abs(value - v) <= tolerance (value order, then changed SKUs)."""
+        if value is None or not math.isfinite(value) or not tolerance >= 0:
+            return []
+        lo, hi = self._run(value, tolerance)
+        positions = self._base_positions(lo, hi)
+        if self._overlay:
+            positions.extend(position for position, v in self._overlay.items() if abs(value - v) <= tolerance)
+        return positions
+
+    def between(self, low: Optional[float] = None, high: Optional[float] = None) -> List[int]:
+        """Positions of the SKUs with low <= v <= high (open-ended when a bound is None)."""
+        lo = 0 if low is None else bisect_left(self._values, low)
+        hi = len(self._values) if high is None else bisect_right(self._values, high)
+        positions = self._base_positions(lo, hi) if lo < hi else []
+        if self._overlay:
+            positions.extend(position for position, v in self._overlay.items()
+                             if (low is None or v >= low) and (high is None or v <= high))
+        return positions
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "indexed": len(self),
+            "min": self._values[0] if self._values else None,
+            "max": self._values[-1] if self._values else None,
+            "overlay": len(self._overlay),
+            "stale": len(self._stale),
+        }
@@ -0,0 +1,94 @@
+"""
+result_store.py
+
+Store of compact Technical Agent results, with comparison tables built on
+demand.
+
+The pipeline keeps only the compact match result of every RFP (SKU ids,
+match percents and match masks, see technical_agent.py output formats).
+The UI opens "View Details" for a few items only, so the comparison table of
+an item is built when it is first requested and then cached (LRU).
+
+Results are kept and saved like every JsonResultStore
+(loaders/result_store.py), so tables can still be served after a restart.
+"""
+
+import threading
+from collections import OrderedDict
+from typing import Dict, Any, Callable, Optional
+
+from loaders.result_store import JsonResultStore
+
+
+DEFAULT_MAX_TABLES = 1024
+
+
+class TechnicalResultStore(JsonResultStore):
+    """
+    rfp_id -> compact technical output, plus an LRU cache of comparison tables.
+
+    `table_builder(compact_output, item)` builds the comparison table of one
+    item of a compact output.
+    """
+
+    def __init__(self, directory: str,
+                 table_builder: Callable[[Dict[str, Any], Dict[str, Any]], Dict[str, Any]],
+                 max_tables: int = DEFAULT_MAX_TABLES):
+        super().__init__(directory)
+        self.max_tables = max_tables
+        self._table_builder = table_builder
+
+        self._tables_lock = threading.Lock()
+        # (rfp_id, item_index) -> comparison table
+        self._tables: "OrderedDict[tuple, Dict[str, Any]]" = OrderedDict()
+
+        self.tables_built = 0
+        self.table_hits = 0
+
+    def put(self, output: Dict[str, Any]) -> str:
+        """Store (and save) a compact output; drops the cached tables of its RFP."""
+
+        rfp_id = super().put(output)
+        with self._tables_lock:
+            for key in [key for key in self._tables if key[0] == rfp_id]:
+                del self._tables[key]
+        return rfp_id
+
+    def comparison_table(self, rfp_id: str, item_index: int) -> Optional[Dict[str, Any]]:
+        """Comparison table of one item, built on first use; None if the RFP or item is unknown."""
+
+        key = (rfp_id, item_index)
+        with self._tables_lock:
+            table = self._tables.get(key)
+            if table is not None:
+                self._tables.move_to_end(key)
+                self.table_hits += 1
+                return table
+
+        output = self.get(rfp_id)
+        if output is None:
+            return None
+        item = next((i for i in output.get("items", []) if i.get("item_index") == item_index), None)
+        if item is None:
+            return None
+
+        table = self._table_builder(output, item)
+
+        with self._tables_lock:
+            self.tables_built += 1
+            if self.is_current(rfp_id, output):
+                # only cache tables of the result that is still current
+                self._tables[key] = table
+                while len(self._tables) > self.max_tables:
+                    self._tables.popitem(last=False)
+        return table
+
+    def stats(self) -> Dict[str, Any]:
+        stats = super().stats()
+        with self._tables_lock:
+            stats.update({
+                "cached_tables": len(self._tables),
+                "tables_built": self.tables_built,
+                "table_hits": self.table_hits,
+            })
+        return stats
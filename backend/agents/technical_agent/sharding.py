@@ -0,0 +1,366 @@
+"""
+sharding.py
+
+Sharded scatter-gather matching for very large catalogs.
+
+A ShardPool splits one product CSV into N shards, each held by a long-lived
+worker process that loads its shard once and keeps it warm (normalized
+catalog plus match structures) across requests:
+
+- row i of the CSV belongs to shard i % N (round-robin keeps shards balanced)
+- a batch of RFP items is sent to every shard at once (scatter); each shard
+  returns its local top-k as (global position, match mask, product) triples
+- the per-shard lists are merged by (match percent desc, global position)
+  (gather), which yields exactly the global top-k of the single-process path,
+  including the catalog-order tie-breaking
+
+Each shard's local top-k already holds every SKU of that shard that can be
+in the global top-k, so the merge only looks at N * k candidates per item.
+
+Workers reload their shard when the CSV changes (mtime/size, then content
+hash, as in catalog.py). Deltas applied to the in-process catalog
+(CatalogManager.apply_delta) are replayed on the shards with apply_deltas:
+every worker keeps the changed positions of its own shard. ShardPoolManager keeps one pool per (CSV, number of
+shards, match mode) for the lifetime of the process.
+"""
+
+import atexit
+import heapq
+import itertools
+import multiprocessing
+import os
+import threading
+import traceback
+from typing import List, Dict, Any, Callable, Optional, Tuple
+
+from agents.technical_agent.bitmask_matcher import MatchScorer, DEFAULT_SCORER
+from agents.technical_agent.catalog import ProductCatalog
+from loaders.snapshot import FileFingerprint
+from agents.technical_agent.compact_catalog import make_ranked_entry
+
+
+# match modes a shard worker can run (brute_force is a single-process reference)
+SHARD_MATCH_MODES = ("indexed", "vectorized", "bitmask", "top_k")
+DEFAULT_START_METHOD = "spawn"
+
+
+# -------------------------
+# Worker side
+# -------------------------
+
+def _shard_positions(catalog: ProductCatalog, match_mode: str, rfp_items: List[Dict[str, Any]],
+                     limit: int, scorer: MatchScorer) -> List[List[Tuple[int, int]]]:
+    """Local ranked (position, mask) pairs of one shard for every RFP item."""
+
+    if match_mode == "indexed":
+        spec_index = catalog.spec_index()
+        return [spec_index.rank_positions(rfp_item, limit, scorer) for rfp_item in rfp_items]
+    if match_mode == "vectorized":
+        return catalog.vector_engine().rank_batch_positions(rfp_items, limit, scorer)
+    if match_mode == "bitmask":
+        matcher = catalog.bitmask_matcher()
+        return [matcher.rank_positions(rfp_item, limit, scorer) for rfp_item in rfp_items]
+    if match_mode == "top_k":
+        matcher = catalog.bitmask_matcher()
+        return [matcher.top_k_positions(rfp_item, limit, scorer) for rfp_item in rfp_items]
+    raise ValueError(f"Unknown shard match mode: {match_mode} (expected one of {SHARD_MATCH_MODES})")
+
+
+def _shard_worker(conn, csv_path: str, shard_index: int, n_shards: int,
+                  builder: Callable, match_mode: str) -> None:
+    """
+    Worker process main loop. Commands (tuples over the pipe):
+        ("load", version)               -> ("ok", number of SKUs in the shard)
+        ("rank", items, limit, scorer)  -> ("ok", per item [(global position, mask, product)])
+        ("delta", version, changes)     -> ("ok", number of SKUs in the shard)
+        ("close",)                      -> exits
+    Failures are answered with ("error", traceback text).
+    """
+
+    catalog = None
+    while True:
+        try:
+            command = conn.recv()
+        except EOFError:
+            return
+
+        if command[0] == "close":
+            conn.close()
+            return
+
+        try:
+            if command[0] == "load":
+                products = builder(csv_path, shard=(shard_index, n_shards))
+                catalog = ProductCatalog(csv_path, command[1], products)
+                # build the match structures now, not on the first request
+                if match_mode == "indexed":
+                    catalog.spec_index()
+                elif match_mode == "vectorized":
+                    catalog.vector_engine()
+                else:
+                    catalog.bitmask_matcher()
+                conn.send(("ok", len(products)))
+
+            elif command[0] == "rank":
+                _, rfp_items, limit, scorer = command
+                rankings = _shard_positions(catalog, match_mode, rfp_items, limit, scorer)
+                conn.send(("ok", [
+                    [(position * n_shards + shard_index, mask, catalog.products[position].to_dict())
+                     for position, mask in ranking]
+                    for ranking in rankings
+                ]))
+
+            elif command[0] == "delta":
+                # global position p lives in shard p % n_shards at local position p // n_shards
+                _, version, changes = command
+                catalog.apply_changes(version, {
+                    position // n_shards: product for position, product in changes.items()
+                    if position % n_shards == shard_index
+                })
+                conn.send(("ok", len(catalog)))
+
+            else:
+                raise ValueError(f"Unknown shard command: {command[0]}")
+
+        except Exception:
+            conn.send(("error", traceback.format_exc()))
+
+
+# -------------------------
+# Merge
+# -------------------------
+
+def merge_shard_rankings(shard_rankings: List[List[Tuple[int, int, Dict[str, Any]]]], limit: int,
+                         scorer: MatchScorer = DEFAULT_SCORER) -> List[Dict[str, Any]]:
+    """
+    Merge the local rankings of one RFP item (one list per shard, each sorted
+    by match percent desc then position) into the global top `limit` entries.
+    """
+
+    rank_table = scorer.rank_table
+    merged = heapq.merge(*shard_rankings, key=lambda hit: (-rank_table[hit[1]], hit[0]))
+    return [
+        make_ranked_entry(product, scorer.percent(mask), mask)
+        for _, mask, product in itertools.islice(merged, limit)
+    ]
+
+
+# -------------------------
+# Pool
+# -------------------------
+
+class ShardPool:
+    """
+    N warm worker processes holding the shards of one product CSV.
+
+    `builder(csv_path, shard=(index, count))` must return the normalized
+    product records of one shard (a CompactCatalog); it runs in the workers.
+    Requests are serialized per pool; the shards of one request run in
+    parallel.
+    """
+
+    def __init__(self, csv_path: str, n_shards: int, builder: Callable,
+                 match_mode: str = "indexed", start_method: str = DEFAULT_START_METHOD):
+        if n_shards < 1:
+            raise ValueError(f"n_shards must be at least 1, got {n_shards}")
+        if match_mode not in SHARD_MATCH_MODES:
+            raise ValueError(f"Unknown shard match mode: {match_mode} (expected one of {SHARD_MATCH_MODES})")
+
+        self.csv_path = csv_path
+        self.n_shards = n_shards
+        self.match_mode = match_mode
+
+        self._lock = threading.Lock()
+        self._fingerprint: Optional[FileFingerprint] = None
+        self.version: Optional[str] = None
+        # version of the CSV content the shards loaded, and number of deltas replayed on top of it
+        self.base_version: Optional[str] = None
+        self.deltas = 0
+        self.shard_sizes: List[int] = []
+        self.closed = False
+
+        self.loads = 0
+        self.requests = 0
+
+        context = multiprocessing.get_context(start_method)
+        self._conns = []
+        self._processes = []
+        for shard_index in range(n_shards):
+            parent_conn, child_conn = context.Pipe()
+            process = context.Process(
+                target=_shard_worker,
+                args=(child_conn, csv_path, shard_index, n_shards, builder, match_mode),
+                name=f"catalog-shard-{shard_index}",
+                daemon=True,
+            )
+            process.start()
+            child_conn.close()
+            self._conns.append(parent_conn)
+            self._processes.append(process)
+
+    def __len__(self) -> int:
+        return sum(self.shard_sizes)
+
+    # ---- scatter / gather ----
+
+    def _call(self, command: Tuple) -> List[Any]:
+        """Send one command to every shard, then collect all replies (in shard order)."""
+
+        if self.closed:
+            raise RuntimeError("Shard pool is closed")
+
+        try:
+            for conn in self._conns:
+                conn.send(command)
+            replies = [conn.recv() for conn in self._conns]
+        except (EOFError, OSError) as e:
+            # a worker died: the pool cannot answer consistently any more
+            self.close()
+            raise RuntimeError(f"Shard worker lost: {e}") from e
+
+        for shard_index, (status, payload) in enumerate(replies):
+            if status != "ok":
+                raise RuntimeError(f"Shard {shard_index} failed:\n{payload}")
+        return [payload for _, payload in replies]
+
+    def refresh(self) -> Optional[str]:
+        """
+        (Re)load the shards if the CSV changed since the last load.
+        Returns the replaced catalog version, or None when nothing was reloaded.
+        """
+
+        if not os.path.exists(self.csv_path):
+            raise FileNotFoundError(f"Product CSV file not found: {self.csv_path}")
+
+        with self._lock:
+            if self._fingerprint is not None and self._fingerprint.same_stat(os.stat(self.csv_path)):
+                return None
+
+            fingerprint = FileFingerprint.of(self.csv_path)
+            if self._fingerprint is not None and fingerprint.content_hash == self._fingerprint.content_hash:
+                # touched but not modified: keep the loaded shards
+                self._fingerprint = fingerprint
+                return None
+
+            old_version = self.version
+            version = fingerprint.content_hash[:16]
+            self.shard_sizes = self._call(("load", version))
+            self._fingerprint = fingerprint
+            self.version = version
+            self.base_version = version
+            self.deltas = 0
+            self.loads += 1
+
+        print(f"[Catalog] Loaded {len(self)} SKUs from {self.csv_path} into {self.n_shards} shards "
+              f"(version {version}, {self.match_mode})")
+        return old_version
+
+    def apply_deltas(self, base_version: Optional[str], deltas: List[Tuple[str, Dict[int, Any]]]) -> None:
+        """
+        Replay the catalog deltas not applied yet (CatalogManager.delta_log)
+        on the shards. Nothing happens when the log belongs to another load
+        of the CSV than the shards hold.
+        """
+
+        with self._lock:
+            if base_version is None or base_version != self.base_version:
+                return
+            for version, changes in deltas[self.deltas:]:
+                self.shard_sizes = self._call(("delta", version, changes))
+                self.version = version
+                self.deltas += 1
+
+    def rank(self, rfp_items: List[Dict[str, Any]], limit: int = 3,
+             scorer: MatchScorer = DEFAULT_SCORER) -> List[List[Dict[str, Any]]]:
+        """Global top `limit` ranked entries for every RFP item (same as the single-process path)."""
+
+        if not rfp_items:
+            return []
+
+        with self._lock:
+            if self.version is None:
+                raise RuntimeError("Shard pool has no catalog loaded; call refresh() first")
+            per_shard = self._call(("rank", rfp_items, limit, scorer))
+            self.requests += 1
+
+        return [
+            merge_shard_rankings([shard[position] for shard in per_shard], limit, scorer)
+            for position in range(len(rfp_items))
+        ]
+
+    def close(self) -> None:
+        """Stop the worker processes."""
+
+        if self.closed:
+            return
+        self.closed = True
+        for conn in self._conns:
+            try:
+                conn.send(("close",))
+            except (OSError, ValueError):
+                pass
+            conn.close()
+        for process in self._processes:
+            process.join(timeout=5)
+            if process.is_alive():
+                process.terminate()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "shards": self.n_shards,
+            "shard_sizes": list(self.shard_sizes),
+            "match_mode": self.match_mode,
+            "version": self.version,
+            "deltas": self.deltas,
+            "loads": self.loads,
+            "requests": self.requests,
+        }
+
+
+class ShardPoolManager:
+    """
+    Keeps one ShardPool per (CSV path, number of shards, match mode) alive
+    for the lifetime of the process.
+    """
+
+    def __init__(self, builder: Callable, start_method: str = DEFAULT_START_METHOD):
+        self._builder = builder
+        self._start_method = start_method
+        self._lock = threading.Lock()
+        self._pools: Dict[Tuple[str, int, str], ShardPool] = {}
+
+        self._reload_listeners = []
+
+        atexit.register(self.shutdown)
+
+    def add_reload_listener(self, listener: Callable[[str], None]) -> None:
+        """Register listener(old_version), called when a pool reloads a changed CSV."""
+        self._reload_listeners.append(listener)
+
+    def get(self, csv_path: str, n_shards: int, match_mode: str = "indexed") -> ShardPool:
+        """Return a warm pool for the CSV, (re)loading its shards if the file changed."""
+
+        key = (os.path.abspath(csv_path), n_shards, match_mode)
+        with self._lock:
+            pool = self._pools.get(key)
+            if pool is None or pool.closed:
+                pool = ShardPool(key[0], n_shards, self._builder, match_mode, self._start_method)
+                self._pools[key] = pool
+
+        old_version = pool.refresh()
+        if old_version is not None:
+            for listener in self._reload_listeners:
+                listener(old_version)
+        return pool
+
+    def shutdown(self) -> None:
+        """Stop every pool's workers."""
+        with self._lock:
+            pools = list(self._pools.values())
+            self._pools.clear()
+        for pool in pools:
+            pool.close()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {f"{path}|{n}|{mode}": pool.stats() for (path, n, mode), pool in self._pools.items()}
@@ -0,0 +1,330 @@
+"""
+spec_index.py
+
+Inverted attribute index over the normalized product catalog.
+
+The brute-force matcher (calculate_spec_match) compares every RFP line item
+against every SKU. This module pre-builds, once per catalog:
+
+    attribute match key -> posting list of SKU positions
+
+so ranking one RFP item only touches SKUs that share at least one attribute
+with it, and the number of matching attributes per SKU is obtained by merging
+the item's posting lists. Match masks of the ranked SKUs (and of all
+candidates when attribute weights are not equal) come from BitmaskMatcher.
+
+Posting keys follow spec_keys.py. Toleranced attributes are looked up in
+sorted range indexes instead (range_index.py): size_sqmm always, voltage
+when the scorer sets a voltage tolerance. The tolerance is taken from the
+scorer at query time, so changing it needs no rebuild.
+
+Scores and the ordering of the ranked list (match % descending, catalog order
+for ties) are identical to rank_products_for_rfp_item.
+
+Catalog deltas (apply_delta) leave the posting lists alone: the changed
+positions are marked dirty, dropped from the posting-list counts and scored
+directly from their (updated) BitmaskMatcher codes. Deleted SKUs are never
+ranked. Past DIRTY_REBUILD_FRACTION of the catalog, needs_rebuild() tells the
+owner to build a fresh index. As the posting lists never change after the
+build, copy() (the index of a new catalog version) shares them.
+"""
+
+import sys
+import heapq
+import math
+import threading
+from collections import Counter
+from typing import List, Dict, Any, Optional, Tuple, Set, Iterable
+
+from agents.technical_agent.bitmask_matcher import BitmaskMatcher, MatchScorer, DEFAULT_SCORER, FULL_MASK
+from agents.technical_agent.range_index import NumericRangeIndex, RANGE_PARSERS
+from agents.technical_agent.spec_keys import (
+    STRING_ATTRIBUTES,
+    norm_str,
+    parse_size,
+    parse_cores,
+    parse_voltage,
+    voltage_key,
+)
+
+
+# Rebuild the index once this share of the catalog (at least DIRTY_REBUILD_MIN
+# SKUs) was changed by deltas: dirty SKUs cost a mask evaluation per query
+DIRTY_REBUILD_FRACTION = 0.01
+DIRTY_REBUILD_MIN = 1024
+
+# number of matched attributes per match mask
+_MATCH_COUNTS = [bin(mask).count("1") for mask in range(FULL_MASK + 1)]
+
+
+def _add_posting(postings: Dict[Any, List[int]], key, position: int) -> None:
+    if key in postings:
+        postings[key].append(position)
+    else:
+        postings[key] = [position]
+
+
+# -------------------------
+# Index
+# -------------------------
+
+class SpecIndex:
+    """
+    Inverted index over a list of normalized products.
+
+    The index keeps a reference to the product list (normalized dicts or
+    a CompactCatalog); ranked entries carry the same product dicts as the
+    brute-force path.
+    """
+
+    def __init__(self, products: List[Dict[str, Any]], matcher: Optional[BitmaskMatcher] = None,
+                 range_indexes: Optional[Dict[str, NumericRangeIndex]] = None,
+                 deleted: Optional[Set[int]] = None):
+        self.products = products
+        # positions of deleted SKUs (shared with the owning catalog): not indexed, never ranked
+        self.deleted: Set[int] = deleted if deleted is not None else set()
+        # per-SKU attribute codes, used for the match masks of ranked SKUs
+        self._owns_matcher = matcher is None
+        self.matcher = matcher if matcher is not None else BitmaskMatcher(products, self.deleted)
+
+        # positions changed by deltas since the index was built
+        self._dirty: Set[int] = set()
+
+        # sorted numeric indexes of the toleranced attributes (the catalog's
+        # own dict when given, so both see the same indexes); the voltage one
+        # is only needed by scorers with a voltage tolerance and is built on first use
+        self._range_indexes = range_indexes if range_indexes is not None else {}
+        self._range_lock = threading.Lock()
+        self.size_index = self.range_index("size_sqmm")
+
+        # cores: integer postings + string fallback postings
+        self._cores_int: Dict[int, List[int]] = {}
+        self._cores_str_all: Dict[str, List[int]] = {}
+        self._cores_str_unparsed: Dict[str, List[int]] = {}
+
+        # size: string fallback postings (numeric sizes are in size_index)
+        self._size_str_all: Dict[str, List[int]] = {}
+        self._size_str_unparsed: Dict[str, List[int]] = {}
+
+        self._voltage: Dict[str, List[int]] = {}
+        self._strings: Dict[str, Dict[str, List[int]]] = {attr: {} for attr in STRING_ATTRIBUTES}
+
+        for position, product in enumerate(products):
+            if position not in self.deleted:
+                self._index_product(position, product)
+
+    # ---- build ----
+
+    def range_index(self, attr: str) -> NumericRangeIndex:
+        """Sorted range index of one numeric attribute (built once)."""
+        with self._range_lock:
+            index = self._range_indexes.get(attr)
+            if index is None:
+                index = self._range_indexes[attr] = NumericRangeIndex.for_attribute(
+                    self.products, attr, exclude=self.deleted
+                )
+            return index
+
+    def copy(self, products: List[Dict[str, Any]], matcher: BitmaskMatcher,
+             range_indexes: Dict[str, NumericRangeIndex], deleted: Set[int]) -> "SpecIndex":
+        """
+        Index over a copy of the catalog (its products, matcher, range indexes
+        and deleted set), sharing the posting lists with this one.
+        """
+        clone = SpecIndex.__new__(SpecIndex)
+        clone.__dict__.update(self.__dict__)
+        clone.products = products
+        clone.deleted = deleted
+        clone.matcher = matcher
+        clone._owns_matcher = False
+        clone._dirty = set(self._dirty)
+        clone._range_indexes = range_indexes
+        clone._range_lock = threading.Lock()
+        clone.size_index = clone.range_index("size_sqmm")
+        return clone
+
+    def apply_delta(self, positions: Iterable[int]) -> None:
+        """
+        Take changed SKU positions (updated, appended or deleted in
+        self.products / self.deleted) into account without re-indexing.
+        """
+        positions = set(positions)
+        self._dirty |= positions
+        if self._owns_matcher:
+            self.matcher.apply_delta(positions)
+        for attr, index in self._range_indexes.items():
+            parse = RANGE_PARSERS[attr]
+            index.apply_delta({
+                position: None if position in self.deleted else parse(self.products[position].get(attr, ""))
+                for position in positions
+            })
+
+    def nbytes(self) -> int:
+        """
+        Approximate bytes held by the posting lists (plus the matcher when the
+        index built its own; range indexes belong to the catalog).
+        """
+        postings = [self._cores_int, self._cores_str_all, self._cores_str_unparsed,
+                    self._size_str_all, self._size_str_unparsed, self._voltage, *self._strings.values()]
+        total = sum(sys.getsizeof(lists) + sum(map(sys.getsizeof, lists.values())) for lists in postings)
+        # the position ints the lists point to (one per indexed SKU)
+        total += sys.getsizeof(len(self.products)) * (len(self.products) - len(self.deleted))
+        if self._owns_matcher:
+            total += self.matcher.nbytes()
+        return total
+
+    def needs_rebuild(self) -> bool:
+        """True once deltas changed enough SKUs that a fresh index is cheaper to query."""
+        return len(self._dirty) > max(DIRTY_REBUILD_MIN, DIRTY_REBUILD_FRACTION * len(self.products))
+
+    def _index_product(self, position: int, product: Dict[str, Any]) -> None:
+        # cores
+        raw_cores = product.get("cores", "")
+        cores = parse_cores(raw_cores)
+        cores_str = norm_str(raw_cores)
+        if cores is not None:
+            _add_posting(self._cores_int, cores, position)
+        if cores_str:
+            _add_posting(self._cores_str_all, cores_str, position)
+            if cores is None:
+                _add_posting(self._cores_str_unparsed, cores_str, position)
+
+        # size
+        raw_size = product.get("size_sqmm", "")
+        size_str = norm_str(raw_size)
+        if size_str:
+            _add_posting(self._size_str_all, size_str, position)
+            if parse_size(raw_size) is None:
+                _add_posting(self._size_str_unparsed, size_str, position)
+
+        # voltage
+        voltage = voltage_key(product.get("voltage", ""))
+        if voltage:
+            _add_posting(self._voltage, voltage, position)
+
+        # plain string attributes
+        for attr in STRING_ATTRIBUTES:
+            key = norm_str(product.get(attr, ""))
+            if key:
+                _add_posting(self._strings[attr], key, position)
+
+    # ---- query ----
+
+    def posting_lists(self, rfp_item: Dict[str, Any], scorer: MatchScorer = DEFAULT_SCORER) -> List[List[int]]:
+        """
+        Return one posting list per attribute of the RFP item. Each list holds
+        the positions of the SKUs matching that attribute; the lists of one
+        attribute never contain the same SKU twice.
+        """
+
+        lists = []
+
+        # cores
+        raw_cores = rfp_item.get("cores", "")
+        cores = parse_cores(raw_cores)
+        cores_str = norm_str(raw_cores)
+        if cores is not None:
+            lists.append(self._cores_int.get(cores, []))
+            if cores_str:
+                lists.append(self._cores_str_unparsed.get(cores_str, []))
+        elif cores_str:
+            lists.append(self._cores_str_all.get(cores_str, []))
+
+        # size
+        raw_size = rfp_item.get("size_sqmm", "")
+        size = parse_size(raw_size)
+        size_str = norm_str(raw_size)
+        if size is not None:
+            # non-finite sizes parse but can never satisfy the tolerance check
+            if math.isfinite(size):
+                lists.append(self.size_index.within(size, scorer.size_tolerance))
+            if size_str:
+                lists.append(self._size_str_unparsed.get(size_str, []))
+        elif size_str:
+            lists.append(self._size_str_all.get(size_str, []))
+
+        # voltage: numeric within the tolerance when both parse, otherwise key match
+        voltage = voltage_key(rfp_item.get("voltage", ""))
+        voltage_kv = parse_voltage(voltage) if scorer.voltage_tolerance is not None else None
+        if voltage_kv is not None:
+            lists.append(self.range_index("voltage").within(voltage_kv, scorer.voltage_tolerance))
+        elif voltage:
+            lists.append(self._voltage.get(voltage, []))
+
+        # plain string attributes
+        for attr in STRING_ATTRIBUTES:
+            key = norm_str(rfp_item.get(attr, ""))
+            if key:
+                lists.append(self._strings[attr].get(key, []))
+
+        return lists
+
+    def match_counts(self, rfp_item: Dict[str, Any], scorer: MatchScorer = DEFAULT_SCORER) -> Counter:
+        """Number of matching attributes per SKU position (SKUs with 0 are absent)."""
+        counts = Counter()
+        for postings in self.posting_lists(rfp_item, scorer):
+            counts.update(postings)
+
+        if self._dirty:
+            # postings of dirty SKUs may be stale: count them from their current codes
+            tables = self.matcher.item_tables(rfp_item, scorer)
+            for position in self._dirty:
+                counts.pop(position, None)
+                if position not in self.deleted:
+                    matched = _MATCH_COUNTS[self.matcher.mask(tables, position)]
+                    if matched:
+                        counts[position] = matched
+        return counts
+
+    def rank(self, rfp_item: Dict[str, Any], limit: Optional[int] = None,
+             scorer: MatchScorer = DEFAULT_SCORER) -> List[Dict[str, Any]]:
+        """
+        Rank products for one RFP item, high -> low.
+
+        Same entries and order as rank_products_for_rfp_item; with `limit` only
+        the first `limit` entries are built. SKUs scoring 0 are appended in
+        catalog order when needed to fill the result.
+        """
+        return [self.matcher.entry(position, mask, scorer)
+                for position, mask in self.rank_positions(rfp_item, limit, scorer)]
+
+    def rank_positions(self, rfp_item: Dict[str, Any], limit: Optional[int] = None,
+                       scorer: MatchScorer = DEFAULT_SCORER) -> List[Tuple[int, int]]:
+        """Ranked (position, match mask) pairs for one RFP item, in rank() order."""
+
+        counts = self.match_counts(rfp_item, scorer)
+        tables = self.matcher.item_tables(rfp_item, scorer)
+
+        if scorer.uniform:
+            # equal weights: the match count orders exactly like the percent
+            key = lambda position: (-counts[position], position)
+            if limit is None:
+                ordered = sorted(counts, key=key)
+            else:
+                ordered = heapq.nsmallest(limit, counts, key=key)
+            masks = {position: self.matcher.mask(tables, position) for position in ordered}
+        else:
+            masks = {position: self.matcher.mask(tables, position) for position in counts}
+            rank_table = scorer.rank_table
+            zero_rank = rank_table[0]
+            positive = (position for position, mask in masks.items() if rank_table[mask] > zero_rank)
+            key = lambda position: (-rank_table[masks[position]], position)
+            if limit is None:
+                ordered = sorted(positive, key=key)
+            else:
+                ordered = heapq.nsmallest(limit, positive, key=key)
+
+        ranking = [(position, masks[position]) for position in ordered]
+
+        n_live = len(self.products) - len(self.deleted)
+        wanted = n_live if limit is None else min(limit, n_live)
+        if len(ranking) < wanted:
+            taken = set(ordered)
+            for position in range(len(self.products)):
+                if position in taken or position in self.deleted:
+                    continue
+                ranking.append((position, masks.get(position, 0)))
+                if len(ranking) >= wanted:
+                    break
+
+        return ranking
@@ -0,0 +1,111 @@
+"""
+spec_keys.py
+
+Comparison keys for the six spec attributes, shared by every matcher.
+
+Numeric specs arrive as canonical number strings (voltage in kV, see
+loaders/units.py). These helpers reproduce the per-attribute rules of
+calculate_spec_match:
+- cores       -> int(float(value)), falling back to the normalized string
+- size_sqmm   -> float(value) within SIZE_TOLERANCE, falling back to the normalized string
+- voltage     -> lowercase, spaces removed, 'kv' suffix ensured; with a voltage
+                 tolerance, numeric kV within the tolerance when both parse
+- insulation, conductor, standard -> lowercase, spaces/dashes removed
+Empty keys never match.
+"""
+
+from functools import lru_cache
+from typing import Optional
+
+from loaders.normalization import NORMALIZE_CACHE_SIZE, normalize_text, voltage_key
+from loaders.units import parse_voltage_kv
+
+
+SPEC_ATTRIBUTES = ["cores", "size_sqmm", "voltage", "insulation", "conductor", "standard"]
+STRING_ATTRIBUTES = ["insulation", "conductor", "standard"]
+
+# Numeric tolerance for size_sqmm comparisons (sqmm)
+SIZE_TOLERANCE = 0.2
+
+# Attributes whose match tolerance can be configured (MatchScorer tolerances).
+# None = no numeric tolerance: voltage compares its key (exact string match)
+DEFAULT_TOLERANCES = {"size_sqmm": SIZE_TOLERANCE, "voltage": None}
+TOLERANCE_ATTRIBUTES = tuple(DEFAULT_TOLERANCES)
+
+
+# Lowercase, strip and drop spaces/dashes (memoized, see loaders/normalization.py)
+norm_str = normalize_text
+
+
+def parse_size(value) -> Optional[float]:
+    """Return the size as float, or None when it cannot be parsed."""
+    if value.__class__ is str:
+        return _parse_size_text(value)
+    try:
+        return float(str(value))
+    except Exception:
+        return None
+
+
+def parse_cores(value) -> Optional[int]:
+    """Return the core count as int, or None when it cannot be parsed."""
+    if value.__class__ is str:
+        return _parse_cores_text(value)
+    try:
+        return int(float(value))
+    except Exception:
+        return None
+
+
+def parse_voltage(value) -> Optional[float]:
+    """Return the voltage in kV parsed from its comparison key, or None."""
+    return _parse_voltage_key(voltage_key(value))
+
+
+# Catalogs and RFPs repeat a few hundred distinct size / cores strings, so
+# string values are parsed once and then served from these caches
+@lru_cache(maxsize=NORMALIZE_CACHE_SIZE)
+def _parse_size_text(text: str) -> Optional[float]:
+    try:
+        return float(text)
+    except Exception:
+        return None
+
+
+@lru_cache(maxsize=NORMALIZE_CACHE_SIZE)
+def _parse_cores_text(text: str) -> Optional[int]:
+    try:
+        return int(float(text))
+    except Exception:
+        return None
+
+
+@lru_cache(maxsize=NORMALIZE_CACHE_SIZE)
+def _parse_voltage_key(key: str) -> Optional[float]:
+    return parse_voltage_kv(key)
+
+
+def attribute_match_key(attr: str, value):
+    """
+    Comparison key of one attribute value. Two values compare the same way
+    against every other value exactly when their keys are equal.
+    """
+    if attr == "cores":
+        return parse_cores(value), norm_str(value)
+    if attr == "size_sqmm":
+        return parse_size(value), norm_str(value)
+    if attr == "voltage":
+        return voltage_key(value)
+    return norm_str(value)
+
+
+def spec_signature(rfp_item: dict) -> tuple:
+    """Match keys of all spec attributes of an item (hashable, usable as a dict key)."""
+    signature = []
+    for attr in SPEC_ATTRIBUTES:
+        key = attribute_match_key(attr, rfp_item.get(attr, ""))
+        if attr == "size_sqmm" and key[0] is not None and key[0] != key[0]:
+            # NaN never equals itself; a NaN size never matches numerically anyway
+            key = ("nan", key[1])
+        signature.append(key)
+    return tuple(signature)
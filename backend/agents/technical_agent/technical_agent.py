@@ -5,10 +5,18 @@ Full implementation of the Technical Agent.
 
 Responsibilities:
 - Load RFP JSON (one RFP selected by Sales Agent / Main Agent)
-- Load product specs CSV (SKU database)
-- Normalize fields and map keys to a common schema
+- Load product specs CSV (SKU database), cached process-wide by CatalogManager
+  and reloaded only when the file changes (see catalog.py); SKUs are held in
+  a CompactCatalog and only materialized as dicts when returned in top_3.
+  The normalized catalog is compiled once into a binary snapshot next to the
+  CSV (product_specs.csv.snap) and opened with mmap afterwards; the snapshot
+  is recompiled whenever it is older than the CSV
+- Normalize fields and map keys to a common schema; spec fields an item
+  leaves empty are read from its description (loaders/spec_extractor.py) and
+  listed in the item's "inferred_fields"
 - For every line-item in the RFP ("scope_of_supply"):
-    - Compute a spec-match % against every SKU
+    - Compute a spec-match % against the SKUs sharing at least one attribute
+      (inverted attribute index, see spec_index.py)
     - Rank SKUs by match %
     - Pick top-3 SKUs and build a comparison table
     - Select the final recommended SKU (top match)
@@ -19,14 +27,75 @@ Responsibilities:
 Assumptions:
 - json_loader.py exists and implements:
     - load_rfp_json(path)
-    - load_product_specs(csv_path)
+    - iter_product_specs(csv_path)
     - normalize_rfp_specs(dict)
     - normalize_product_specs(list_of_dicts)
   (These return Python native structures.)
+
+Match modes:
+- "indexed"     (default) scores only candidate SKUs found through SpecIndex
+- "vectorized"  NumPy match-mask matrix over all items x SKUs (vector_engine.py)
+- "bitmask"     full scan over precomputed per-SKU attribute codes (bitmask_matcher.py)
+- "top_k"       bounded heap with branch-and-bound pruning over the same codes
+- "brute_force" reference mode: calculate_spec_mask against every SKU
+All modes produce identical match percentages and top_3 ordering.
+
+Tie-breaking (all modes): higher match percent first; SKUs with equal match
+percent keep their catalog (CSV) order, so results are stable across runs.
+The number of SKUs kept per item is configurable (top_k, default 3); the
+output key stays "top_3" for the frontend.
+
+With shards=N (N > 1) the catalog is split across N long-lived worker
+processes that each rank their shard; the per-shard top-k lists are merged
+into the same global top_3 (sharding.py). brute_force is not available there.
+
+With parallel_workers=N the distinct (not cached) line items of a large RFP
+are ranked in chunks on a pool of N processes whose catalog is preloaded by
+the pool initializer; results are reassembled in item order. RFPs with fewer
+than PARALLEL_MIN_ITEMS items are ranked serially.
+
+Output formats (output_format):
+- "verbose" (default) every top_3 entry embeds its full product dict, and each
+  item carries a comparison_table; this is the shape the frontend reads
+- "compact" one deduplicated "skus" table per response; top_3 entries only
+  reference it by sku_id, comparison tables are left out (expand_technical_output
+  rebuilds the verbose shape exactly). Compact results are kept in
+  TECHNICAL_RESULTS, which builds an item's comparison table on request
+
+Every ranked entry carries a "match_mask" (one bit per matched attribute);
+match percentages can use per-attribute weights (attribute_weights), and the
+numeric tolerances (size_sqmm, voltage) can be set per run
+(attribute_tolerances). Toleranced attributes are looked up in sorted range
+indexes (range_index.py), which search_catalog also uses for spec searches.
+
+Catalog updates shipped as add / update / delete records are applied with
+apply_catalog_delta (catalog.py): the match structures re-encode only the
+changed SKUs and MATCH_CACHE keeps the cached results the delta cannot affect.
+
+Several catalogs (one per OEM / tenant) are served side by side: every entry
+point takes a catalog id registered in CATALOG_REGISTRY (catalog_registry.py,
+read from CATALOG_REGISTRY_PATH; "default" is product_specs.csv), which loads
+catalogs on first use and evicts the least recently used ones past
+CATALOG_MEMORY_BYTES. A CSV path can still be passed directly.
+
+Catalogs are copy-on-write: a changed CSV is reloaded in the background and
+deltas are applied to a copy, and the new catalog is swapped in when ready.
+A pipeline run holds the catalog it started with until it is done
+(CATALOG_MANAGER.acquire), so runs never wait for a reload and never see
+one half-applied.
 """
 
 import os
-from typing import List, Dict, Any
+import math
+import time
+import atexit
+import threading
+import warnings
+import multiprocessing
+from contextlib import nullcontext
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import List, Dict, Any, Optional, Tuple
 from datetime import datetime
 import sys
 
@@ -40,32 +109,69 @@ from loaders.json_loader import (
     load_rfp_json,
     normalize_rfp_specs,
     normalize_product_specs,
-    load_product_specs
+    iter_product_specs
+)
+from agents.technical_agent.catalog import CatalogManager, ProductCatalog
+from agents.technical_agent.catalog_registry import CatalogRegistry
+from agents.technical_agent.compact_catalog import CompactCatalog, make_ranked_entry, materialize_product
+from agents.technical_agent.bitmask_matcher import ATTRIBUTE_BITS, MatchScorer, DEFAULT_SCORER
+from agents.technical_agent.match_cache import MatchResultCache
+from agents.technical_agent.spec_keys import (
+    norm_str, voltage_key, parse_size, parse_cores, parse_voltage, SIZE_TOLERANCE,
+)
+from agents.technical_agent.sharding import ShardPool, ShardPoolManager, SHARD_MATCH_MODES
+from agents.technical_agent.result_store import TechnicalResultStore
+from loaders.snapshot import Snapshot, open_snapshot, snapshot_path_for, source_fingerprint
+from loaders.spec_extractor import EXTRACTED_FIELDS, extract_specs, extract_specs_batch
+from loaders.units import (
+    canonical_cores, canonical_size, canonical_voltage,
+    parse_core_count, parse_size_sqmm, parse_voltage_kv,
 )
 
 
+MATCH_MODE_INDEXED = "indexed"
+MATCH_MODE_VECTORIZED = "vectorized"
+MATCH_MODE_BITMASK = "bitmask"
+MATCH_MODE_TOP_K = "top_k"
+MATCH_MODE_BRUTE_FORCE = "brute_force"
+MATCH_MODES = (MATCH_MODE_INDEXED, MATCH_MODE_VECTORIZED, MATCH_MODE_BITMASK, MATCH_MODE_TOP_K,
+               MATCH_MODE_BRUTE_FORCE)
+
+OUTPUT_FORMAT_VERBOSE = "verbose"
+OUTPUT_FORMAT_COMPACT = "compact"
+OUTPUT_FORMATS = (OUTPUT_FORMAT_VERBOSE, OUTPUT_FORMAT_COMPACT)
+
+# Spec values that count as not given (JSON null is mapped to "None")
+_MISSING_VALUES = ("", "None")
+
+# Unit of bare numbers in the voltage / voltage_kv columns (and search queries)
+VOLTAGE_COLUMN_UNIT = "kv"
+
 
 # -------------------------
 # Utility / Helper Functions
 # -------------------------
 
-def map_rfp_item_keys(raw_item: dict) -> dict:
+def map_rfp_item_keys(raw_item: dict, extracted: Optional[Dict[str, str]] = None) -> dict:
     """
     Map raw RFP item keys into the canonical key set expected by the normalization
     and matching logic.
 
     Canonical keys used downstream:
-      - cores (string / number)
-      - size_sqmm (string/numeric)
-      - voltage (string like '1.1kv')
+      - cores (canonical number string, e.g. '3' for '3C')
+      - size_sqmm (canonical number string in sqmm)
+      - voltage (canonical number string in kV, e.g. '11' for '11000 V')
       - insulation (string)
       - conductor (string)
       - standard (string)
       - quantity (int)
       - item_no, description (pass-through)
+      - inferred_fields (list of the spec fields read from the description)
 
     This function detects common variants (like 'voltage_rating_kv') and produces
-    a dictionary with expected keys.
+    a dictionary with expected keys. Spec fields the item leaves empty are
+    filled from its description when it states them (loaders/spec_extractor.py);
+    `extracted` passes specs already extracted by extract_specs_batch.
     """
 
     mapped = {}
@@ -98,13 +204,32 @@ def map_rfp_item_keys(raw_item: dict) -> dict:
     elif "voltage_kv" in raw_item:
         mapped["voltage"] = str(raw_item.get("voltage_kv"))
     else:
-        # fallback: try to parse from description if needed (not implemented here)
         mapped["voltage"] = str(raw_item.get("voltage", "")).strip()
 
-    # insulation, conductor, standard
+    # insulation, conductor
     mapped["insulation"] = str(raw_item.get("insulation", "")).strip()
     mapped["conductor"] = str(raw_item.get("conductor", "")).strip()
 
+    # fallback: fields left empty are read from the description
+    missing = [field for field in EXTRACTED_FIELDS if mapped[field] in _MISSING_VALUES]
+    inferred = []
+    if missing and mapped["description"]:
+        if extracted is None:
+            extracted = extract_specs(mapped["description"])
+        for field in missing:
+            if field in extracted:
+                mapped[field] = extracted[field]
+                inferred.append(field)
+    mapped["inferred_fields"] = inferred
+
+    # numeric specs with units ("11000 V", "2.5 sqmm", "3C") parsed once into
+    # canonical number strings, voltage in kV (see loaders/units.py); a bare
+    # number is read as kV only when it came from a voltage column
+    mapped["cores"] = canonical_cores(mapped["cores"])
+    mapped["size_sqmm"] = canonical_size(mapped["size_sqmm"])
+    voltage_bare_unit = None if "voltage" in inferred else VOLTAGE_COLUMN_UNIT
+    mapped["voltage"] = canonical_voltage(mapped["voltage"], voltage_bare_unit)
+
     # In some JSONs standard may be 'standard' or similar
     mapped["standard"] = str(raw_item.get("standard", raw_item.get("spec", ""))).strip()
 
@@ -120,6 +245,16 @@ def map_rfp_item_keys(raw_item: dict) -> dict:
     return mapped
 
 
+def map_rfp_items(raw_items: List[dict]) -> List[dict]:
+    """
+    map_rfp_item_keys over all line items of an RFP; descriptions are parsed
+    in one batch, once per distinct description.
+    """
+
+    extracted = extract_specs_batch(item.get("description", "") for item in raw_items)
+    return [map_rfp_item_keys(item, specs) for item, specs in zip(raw_items, extracted)]
+
+
 def map_product_row_to_canonical(product_row: dict) -> dict:
     """
     The CSV product rows might have headers such as:
@@ -148,6 +283,11 @@ def map_product_row_to_canonical(product_row: dict) -> dict:
         # fallback to any 'voltage' key
         mapped["voltage"] = str(product_row.get("voltage", "")).strip()
 
+    # numeric specs with units parsed once, as for RFP items
+    mapped["cores"] = canonical_cores(mapped["cores"])
+    mapped["size_sqmm"] = canonical_size(mapped["size_sqmm"])
+    mapped["voltage"] = canonical_voltage(mapped["voltage"], VOLTAGE_COLUMN_UNIT)
+
     # insulation, conductor, standard
     mapped["insulation"] = str(product_row.get("insulation", "")).strip()
     mapped["conductor"] = str(product_row.get("conductor", "")).strip()
@@ -163,28 +303,23 @@ def map_product_row_to_canonical(product_row: dict) -> dict:
 # Spec Match Implementation
 # -------------------------
 
-def calculate_spec_match(rfp_item: dict, product: dict) -> float:
+def calculate_spec_mask(rfp_item: dict, product: dict, scorer: MatchScorer = DEFAULT_SCORER) -> int:
     """
-    Calculates similarity between a normalized RFP item and a normalized product SKU.
+    Compares a normalized RFP item with a normalized product SKU attribute by
+    attribute and returns the match mask (bit i set = attribute i matched,
+    see bitmask_matcher.ATTRIBUTE_BITS).
 
     Rules:
-    - Compare the following attributes with equal weight:
+    - Compare the following attributes:
         cores, size_sqmm, voltage, insulation, conductor, standard
-    - Numeric comparison tolerance for size_sqmm: ±0.2
+    - Numeric comparison tolerance for size_sqmm: ±0.2 (scorer.size_tolerance)
+    - voltage: key equality, or kV within scorer.voltage_tolerance when one is set
     - cores match by integer equality
     - string fields are compared after normalization (lower stripping)
-    - returns a percent (0..100) rounded to 2 decimals
     """
 
     attributes = ["cores", "size_sqmm", "voltage", "insulation", "conductor", "standard"]
-    total_attributes = len(attributes)
-    match_count = 0
-
-    # helper to normalize strings for equality checks
-    def norm_str(v):
-        if v is None:
-            return ""
-        return str(v).lower().strip().replace(" ", "").replace("-", "")
+    match_mask = 0
 
     for attr in attributes:
         rfp_val = rfp_item.get(attr, "")
@@ -192,73 +327,92 @@ def calculate_spec_match(rfp_item: dict, product: dict) -> float:
 
         # SIZE comparison (numeric, allow tolerance)
         if attr == "size_sqmm":
-            try:
-                rfp_size = float(str(rfp_val))
-                prod_size = float(str(prod_val))
-                if abs(rfp_size - prod_size) <= 0.2:
-                    match_count += 1
-            except Exception:
+            rfp_size = parse_size(rfp_val)
+            prod_size = parse_size(prod_val)
+            if rfp_size is not None and prod_size is not None:
+                if abs(rfp_size - prod_size) <= scorer.size_tolerance:
+                    match_mask |= ATTRIBUTE_BITS[attr]
+            else:
                 # fallback to string compare
-                if norm_str(rfp_val) and norm_str(rfp_val) == norm_str(prod_val):
-                    match_count += 1
+                rv = norm_str(rfp_val)
+                if rv and rv == norm_str(prod_val):
+                    match_mask |= ATTRIBUTE_BITS[attr]
 
         # CORES comparison (integer)
         elif attr == "cores":
-            try:
-                if int(float(rfp_val)) == int(float(prod_val)):
-                    match_count += 1
-            except Exception:
-                if norm_str(rfp_val) and norm_str(rfp_val) == norm_str(prod_val):
-                    match_count += 1
+            rfp_cores = parse_cores(rfp_val)
+            prod_cores = parse_cores(prod_val)
+            if rfp_cores is not None and prod_cores is not None:
+                if rfp_cores == prod_cores:
+                    match_mask |= ATTRIBUTE_BITS[attr]
+            else:
+                rv = norm_str(rfp_val)
+                if rv and rv == norm_str(prod_val):
+                    match_mask |= ATTRIBUTE_BITS[attr]
 
         # STRING fields (voltage, insulation, conductor, standard)
         else:
             # Voltage may be like '1.1kv' or '1.1' — normalize to '1.1kv'
             if attr == "voltage":
-                rv = str(rfp_val).lower().replace(" ", "")
-                pv = str(prod_val).lower().replace(" ", "")
-                # ensure 'kv' suffix
-                if rv and "kv" not in rv:
-                    rv = rv + "kv"
-                if pv and "kv" not in pv:
-                    pv = pv + "kv"
-                if rv == pv and rv != "":
-                    match_count += 1
+                rv = voltage_key(rfp_val)
+                pv = voltage_key(prod_val)
+                if scorer.voltage_tolerance is not None:
+                    rfp_kv = parse_voltage(rv)
+                    prod_kv = parse_voltage(pv)
+                    if rfp_kv is not None and prod_kv is not None:
+                        if abs(rfp_kv - prod_kv) <= scorer.voltage_tolerance:
+                            match_mask |= ATTRIBUTE_BITS[attr]
+                        continue
+                if rv and rv == pv:
+                    match_mask |= ATTRIBUTE_BITS[attr]
             else:
-                if norm_str(rfp_val) == norm_str(prod_val) and norm_str(rfp_val) != "":
-                    match_count += 1
+                rv = norm_str(rfp_val)
+                if rv and rv == norm_str(prod_val):
+                    match_mask |= ATTRIBUTE_BITS[attr]
+
+    return match_mask
+
 
-    match_percent = (match_count / total_attributes) * 100 if total_attributes else 0.0
-    return round(match_percent, 2)
+def calculate_spec_match(rfp_item: dict, product: dict) -> float:
+    """
+    Calculates similarity between a normalized RFP item and a normalized product SKU.
+    All six attributes weigh the same (see calculate_spec_mask for the rules);
+    returns a percent (0..100) rounded to 2 decimals.
+    """
+
+    return DEFAULT_SCORER.percent(calculate_spec_mask(rfp_item, product))
 
 
 # -------------------------
 # Ranking and Comparison
 # -------------------------
 
-def rank_products_for_rfp_item(rfp_item: dict, products: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+def rank_products_for_rfp_item(rfp_item: dict, products: List[Dict[str, Any]],
+                               limit: int = None, scorer: MatchScorer = DEFAULT_SCORER) -> List[Dict[str, Any]]:
     """
-    Compute the match % for each product and return a sorted list (high -> low).
+    Compute the match % for each product and return a sorted list (high -> low),
+    truncated to the first `limit` entries when a limit is given.
     Each entry returned contains:
       {
         "sku_id": ...,
         "match_percent": ...,
+        "match_mask": ...,   # matched attributes, see calculate_spec_mask
         "product": { ... }  # the canonical product record
       }
     """
 
     ranking = []
     for prod in products:
-        match = calculate_spec_match(rfp_item, prod)
-        ranking.append({
-            "sku_id": prod.get("sku_id", prod.get("sku", "UNKNOWN")),
-            "match_percent": match,
-            "product": prod
-        })
+        mask = calculate_spec_mask(rfp_item, prod, scorer)
+        ranking.append((scorer.percent(mask), mask, prod))
 
     # sort descending by match_percent
-    ranking_sorted = sorted(ranking, key=lambda x: x["match_percent"], reverse=True)
-    return ranking_sorted
+    ranking_sorted = sorted(ranking, key=lambda x: x[0], reverse=True)
+    if limit is not None:
+        ranking_sorted = ranking_sorted[:limit]
+
+    # product records are only materialized for the returned entries
+    return [make_ranked_entry(prod, match, mask) for match, mask, prod in ranking_sorted]
 
 
 def build_comparison_table(rfp_item: dict, top_products: List[Dict[str, Any]]) -> Dict[str, Any]:
@@ -270,10 +424,13 @@ def build_comparison_table(rfp_item: dict, top_products: List[Dict[str, Any]]) -
       "parameters": ["cores", "size_sqmm", "voltage", "insulation", "conductor", "standard"],
       "rfp_values": { "cores": "...", ... },
       "skus": [
-          {"sku_id": "...", "values": {"cores": "...", ...}, "match_percent": 95.0},
+          {"sku_id": "...", "values": {"cores": "...", ...},
+           "matched": {"cores": true, ...}, "match_percent": 95.0},
           ...
       ]
     }
+
+    "matched" is read from each entry's match_mask, so nothing is re-compared.
     """
 
     parameters = ["cores", "size_sqmm", "voltage", "insulation", "conductor", "standard"]
@@ -284,9 +441,11 @@ def build_comparison_table(rfp_item: dict, top_products: List[Dict[str, Any]]) -
         sku_id = entry.get("sku_id")
         prod = entry.get("product", {})
         values = {p: prod.get(p, "") for p in parameters}
+        mask = entry.get("match_mask", 0)
         skus.append({
             "sku_id": sku_id,
             "values": values,
+            "matched": {p: bool(mask & ATTRIBUTE_BITS[p]) for p in parameters},
             "match_percent": entry.get("match_percent", 0.0)
         })
 
@@ -298,27 +457,501 @@ def build_comparison_table(rfp_item: dict, top_products: List[Dict[str, Any]]) -
     return table
 
 
+def compact_technical_output(output: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Convert a verbose process_rfp output into the compact format: products
+    move into one "skus" table keyed by sku_id, top_3 entries keep sku_id,
+    match_percent and match_mask, and comparison tables are dropped.
+
+    Two different products sharing a sku_id get separate table keys
+    ("<sku_id>#2", ...), referenced from the entry as "sku_ref".
+    """
+
+    skus: Dict[str, Dict[str, Any]] = {}
+    items = []
+
+    for item in output.get("items", []):
+        top_3 = []
+        for entry in item.get("top_3", []):
+            sku_id = entry["sku_id"]
+            ref, duplicate = sku_id, 1
+            while ref in skus and skus[ref] != entry["product"]:
+                duplicate += 1
+                ref = f"{sku_id}#{duplicate}"
+            skus.setdefault(ref, entry["product"])
+
+            compact_entry = {key: value for key, value in entry.items() if key != "product"}
+            if ref != sku_id:
+                compact_entry["sku_ref"] = ref
+            top_3.append(compact_entry)
+
+        compact_item = {key: value for key, value in item.items() if key != "comparison_table"}
+        compact_item["top_3"] = top_3
+        items.append(compact_item)
+
+    compact = {key: value for key, value in output.items() if key != "items"}
+    compact["output_format"] = OUTPUT_FORMAT_COMPACT
+    compact["skus"] = skus
+    compact["items"] = items
+    return compact
+
+
+def _expand_top_3(entries: List[Dict[str, Any]], skus: Dict[str, Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Verbose top_3 entries of a compact item (products looked up in the skus table)."""
+    expanded = []
+    for entry in entries:
+        expanded_entry = {key: value for key, value in entry.items() if key != "sku_ref"}
+        expanded_entry["product"] = skus[entry.get("sku_ref", entry["sku_id"])]
+        expanded.append(expanded_entry)
+    return expanded
+
+
+def comparison_table_for_item(output: Dict[str, Any], item: Dict[str, Any]) -> Dict[str, Any]:
+    """Comparison table of one item of a compact output (as build_comparison_table)."""
+    top_3 = _expand_top_3(item.get("top_3", []), output.get("skus", {}))
+    return build_comparison_table(item.get("rfp_specs", {}), top_3)
+
+
+def expand_technical_output(output: Dict[str, Any], comparison_tables: bool = True) -> Dict[str, Any]:
+    """
+    Rebuild the verbose shape from a compact output (verbose outputs are
+    returned unchanged). Product dicts are shared between entries
+    referencing the same SKU. With comparison_tables=False the items carry
+    no comparison_table (served on demand, see result_store.py).
+    """
+
+    if output.get("output_format") != OUTPUT_FORMAT_COMPACT:
+        return output
+
+    skus = output.get("skus", {})
+    items = []
+
+    for item in output.get("items", []):
+        top_3 = _expand_top_3(item.get("top_3", []), skus)
+
+        expanded_item = {}
+        for key, value in item.items():
+            if key == "top_3":
+                expanded_item["top_3"] = top_3
+                if comparison_tables:
+                    expanded_item["comparison_table"] = build_comparison_table(item.get("rfp_specs", {}), top_3)
+            else:
+                expanded_item[key] = value
+        items.append(expanded_item)
+
+    verbose = {key: value for key, value in output.items() if key not in ("output_format", "skus", "items")}
+    verbose["items"] = items
+    return verbose
+
+
+def rank_top_matches(rfp_items: List[Dict[str, Any]], catalog: ProductCatalog,
+                     match_mode: str = MATCH_MODE_INDEXED, limit: int = 3,
+                     scorer: MatchScorer = DEFAULT_SCORER,
+                     match_cache: MatchResultCache = None) -> List[List[Dict[str, Any]]]:
+    """
+    Return the top `limit` ranked entries for every RFP item using the
+    selected match mode (see module docstring) and attribute weights.
+
+    With a match_cache, items whose spec signature was already ranked against
+    this catalog version are served from the cache, and repeated signatures
+    within rfp_items are ranked once.
+    """
+
+    rank_uncached = lambda items: _rank_top_matches_uncached(items, catalog, match_mode, limit, scorer)
+    return _rank_with_cache(rfp_items, catalog.version, limit, scorer, match_cache, rank_uncached)
+
+
+def rank_sharded_matches(rfp_items: List[Dict[str, Any]], shard_pool: ShardPool,
+                         limit: int = 3, scorer: MatchScorer = DEFAULT_SCORER,
+                         match_cache: MatchResultCache = None) -> List[List[Dict[str, Any]]]:
+    """
+    rank_top_matches over a ShardPool: every item batch is scattered to the
+    shard workers and their local top lists are merged (see sharding.py).
+    """
+
+    rank_uncached = lambda items: shard_pool.rank(items, limit=limit, scorer=scorer)
+    return _rank_with_cache(rfp_items, shard_pool.version, limit, scorer, match_cache, rank_uncached)
+
+
+def _rank_with_cache(rfp_items: List[Dict[str, Any]], catalog_version: str, limit: int,
+                     scorer: MatchScorer, match_cache: MatchResultCache,
+                     rank_uncached) -> List[List[Dict[str, Any]]]:
+    """Serve items from match_cache; rank_uncached(items) ranks each missing signature once."""
+
+    if match_cache is None:
+        return rank_uncached(rfp_items)
+
+    keys = [match_cache.make_key(catalog_version, rfp_item, limit, scorer.signature) for rfp_item in rfp_items]
+    results = [match_cache.get(key) for key in keys]
+
+    # rank each missing signature once
+    pending = {}
+    for position, key in enumerate(keys):
+        if results[position] is None and key not in pending:
+            pending[key] = position
+
+    if pending:
+        computed = rank_uncached([rfp_items[position] for position in pending.values()])
+        for (key, position), entries in zip(pending.items(), computed):
+            match_cache.put(key, entries, rfp_items[position], scorer)
+        fresh = dict(zip(pending, computed))
+        for position, key in enumerate(keys):
+            if results[position] is None:
+                results[position] = [dict(entry) for entry in fresh[key]]
+
+    return results
+
+
+def _rank_top_matches_uncached(rfp_items: List[Dict[str, Any]], catalog: ProductCatalog,
+                               match_mode: str, limit: int,
+                               scorer: MatchScorer) -> List[List[Dict[str, Any]]]:
+    if match_mode == MATCH_MODE_INDEXED:
+        spec_index = catalog.spec_index()
+        return [spec_index.rank(rfp_item, limit=limit, scorer=scorer) for rfp_item in rfp_items]
+
+    if match_mode == MATCH_MODE_VECTORIZED:
+        return catalog.vector_engine().rank_batch(rfp_items, limit=limit, scorer=scorer)
+
+    if match_mode == MATCH_MODE_BITMASK:
+        matcher = catalog.bitmask_matcher()
+        return [matcher.rank(rfp_item, limit=limit, scorer=scorer) for rfp_item in rfp_items]
+
+    if match_mode == MATCH_MODE_TOP_K:
+        matcher = catalog.bitmask_matcher()
+        return [matcher.top_k(rfp_item, k=limit, scorer=scorer) for rfp_item in rfp_items]
+
+    if match_mode == MATCH_MODE_BRUTE_FORCE:
+        products = catalog.live_products()
+        return [rank_products_for_rfp_item(rfp_item, products, limit=limit, scorer=scorer)
+                for rfp_item in rfp_items]
+
+    raise ValueError(f"Unknown match mode: {match_mode} (expected one of {MATCH_MODES})")
+
+
+# -------------------------
+# Product catalog
+# -------------------------
+
+def load_normalized_products(product_csv_path: str, shard: Tuple[int, int] = None) -> CompactCatalog:
+    """
+    Load product CSV rows, map them to canonical keys, normalize them and
+    store them in a CompactCatalog (see compact_catalog.py).
+
+    shard=(index, count) keeps only the rows whose row number % count == index
+    (used by the shard workers, see sharding.py).
+    """
+
+    catalog = CompactCatalog()
+
+    # Rows are streamed so only one raw/normalized dict exists at a time
+    for row_number, row in enumerate(iter_product_specs(product_csv_path)):
+        if shard is not None and row_number % shard[1] != shard[0]:
+            continue
+        # Map and canonicalize the product row
+        mapped = map_product_row_to_canonical(row)
+        # Normalize product specs using the loader-normalizer (lowercase/strip rules)
+        catalog.append(normalize_product_specs([mapped])[0])
+
+    return catalog
+
+
+def normalize_product_row(product_row: dict) -> dict:
+    """One raw CSV row -> normalized product record (as load_normalized_products builds them)."""
+    row = {key: str(value).strip() for key, value in product_row.items()}
+    return normalize_product_specs([map_product_row_to_canonical(row)])[0]
+
+
+# Bump when map_product_row_to_canonical / normalize_product_specs rules change,
+# so snapshots compiled with the old rules are recompiled
+CATALOG_SNAPSHOT_KIND = "product_specs"
+CATALOG_SNAPSHOT_SCHEMA = 3
+
+
+def ensure_catalog_snapshot(product_csv_path: str) -> Optional[Snapshot]:
+    """
+    Open the catalog snapshot of the CSV, compiling it first when it is
+    missing or stale. Returns None when the snapshot cannot be written
+    (e.g. read-only data directory).
+    """
+
+    snapshot_path = snapshot_path_for(product_csv_path)
+    snapshot = open_snapshot(snapshot_path, CATALOG_SNAPSHOT_KIND, CATALOG_SNAPSHOT_SCHEMA, [product_csv_path])
+    if snapshot is not None:
+        return snapshot
+
+    # fingerprint first: an edit during the parse leaves the snapshot stale, not wrong
+    sources = [source_fingerprint(product_csv_path)]
+    catalog = load_normalized_products(product_csv_path)
+    try:
+        catalog.write_snapshot(snapshot_path, CATALOG_SNAPSHOT_KIND, CATALOG_SNAPSHOT_SCHEMA, sources)
+    except OSError as e:
+        print(f"[Catalog] Could not write snapshot {snapshot_path}: {e}")
+        return None
+    print(f"[Catalog] Compiled snapshot {snapshot_path} ({len(catalog)} SKUs)")
+
+    return open_snapshot(snapshot_path, CATALOG_SNAPSHOT_KIND, CATALOG_SNAPSHOT_SCHEMA, [product_csv_path])
+
+
+def load_catalog_snapshot(product_csv_path: str, shard: Tuple[int, int] = None) -> CompactCatalog:
+    """
+    Snapshot-backed variant of load_normalized_products: the catalog is
+    mapped from the compiled snapshot instead of parsing the CSV (falls back
+    to the CSV when no snapshot can be written).
+    """
+
+    snapshot = ensure_catalog_snapshot(product_csv_path)
+    if snapshot is None:
+        return load_normalized_products(product_csv_path, shard=shard)
+
+    catalog = CompactCatalog.from_snapshot(snapshot)
+    if shard is not None:
+        catalog = catalog.subset(range(shard[0], len(catalog), shard[1]))
+    return catalog
+
+
+# Process-wide catalog cache shared by every pipeline run
+CATALOG_MANAGER = CatalogManager(load_catalog_snapshot, row_normalizer=normalize_product_row)
+
+# Catalogs quoted against, by catalog id (one per OEM / tenant), loaded on
+# first use and LRU-evicted past CATALOG_MEMORY_BYTES
+DEFAULT_CATALOG_ID = "default"
+DEFAULT_PRODUCT_CSV = "backend/data/datasets/product_specs.csv"
+CATALOG_REGISTRY_PATH = "backend/data/datasets/catalogs.json"
+CATALOG_MEMORY_BYTES = 2 << 30
+
+CATALOG_REGISTRY = CatalogRegistry(CATALOG_MANAGER, max_bytes=CATALOG_MEMORY_BYTES)
+CATALOG_REGISTRY.register(DEFAULT_CATALOG_ID, DEFAULT_PRODUCT_CSV)
+if os.path.exists(CATALOG_REGISTRY_PATH):
+    CATALOG_REGISTRY.load_config(CATALOG_REGISTRY_PATH)
+
+
+def resolve_catalog_path(product_csv_path: str = None, catalog_id: str = None) -> str:
+    """CSV path of a registered catalog id, or product_csv_path when no id is given."""
+    if catalog_id is not None:
+        if product_csv_path is not None:
+            raise ValueError("Pass either product_csv_path or catalog_id, not both")
+        return CATALOG_REGISTRY.csv_path(catalog_id)
+    if product_csv_path is None:
+        raise ValueError("A product_csv_path or catalog_id is required")
+    return product_csv_path
+
+
+def acquire_catalog(product_csv_path: str = None, catalog_id: str = None):
+    """Read one catalog snapshot in a with-block: a registered catalog id, or the cached catalog of a CSV."""
+    product_csv_path = resolve_catalog_path(product_csv_path, catalog_id)
+    if catalog_id is not None:
+        return CATALOG_REGISTRY.acquire(catalog_id)
+    return CATALOG_MANAGER.acquire(product_csv_path)
+
+# Process-wide ranked-result cache, emptied for a catalog version when it is
+# reloaded; results a catalog delta cannot affect move to the new version
+MATCH_CACHE = MatchResultCache()
+CATALOG_MANAGER.add_reload_listener(lambda catalog: MATCH_CACHE.invalidate_version(catalog.version))
+CATALOG_MANAGER.add_delta_listener(MATCH_CACHE.apply_delta)
+
+# Process-wide warm shard workers (shards=N), one pool per CSV / shard count / match mode
+SHARD_POOLS = ShardPoolManager(load_catalog_snapshot)
+SHARD_POOLS.add_reload_listener(MATCH_CACHE.invalidate_version)
+
+# Compact results of processed RFPs; comparison tables are built on request
+TECHNICAL_RESULTS = TechnicalResultStore("backend/data/tmp/technical_results", comparison_table_for_item)
+
+
+# -------------------------
+# Parallel line-item matching
+# -------------------------
+
+# below this many items to rank, pool overhead outweighs the gain: rank serially
+PARALLEL_MIN_ITEMS = 256
+# chunks per worker, so uneven chunks still keep every worker busy
+PARALLEL_CHUNKS_PER_WORKER = 4
+
+_MATCH_POOLS: Dict[Tuple[str, int, str], ProcessPoolExecutor] = {}
+_MATCH_POOLS_LOCK = threading.Lock()
+
+
+def _init_match_worker(product_csv_path: str, match_mode: str) -> None:
+    """Pool initializer: load the catalog and its match structures once per worker."""
+    catalog = CATALOG_MANAGER.get(product_csv_path)
+    if match_mode == MATCH_MODE_INDEXED:
+        catalog.spec_index()
+    elif match_mode == MATCH_MODE_VECTORIZED:
+        catalog.vector_engine()
+    elif match_mode in (MATCH_MODE_BITMASK, MATCH_MODE_TOP_K):
+        catalog.bitmask_matcher()
+
+
+def _rank_match_chunk(product_csv_path: str, rfp_items: List[Dict[str, Any]], match_mode: str,
+                      limit: int, scorer: MatchScorer) -> Tuple[str, List[List[Dict[str, Any]]], float, int]:
+    """Worker task: rank one chunk; returns (catalog version, rankings, seconds, worker pid)."""
+    started = time.perf_counter()
+    catalog = CATALOG_MANAGER.get(product_csv_path)
+    ranked = _rank_top_matches_uncached(rfp_items, catalog, match_mode, limit, scorer)
+    return catalog.version, ranked, time.perf_counter() - started, os.getpid()
+
+
+def _match_pool(product_csv_path: str, workers: int, match_mode: str) -> ProcessPoolExecutor:
+    """Process pool for one CSV / size / match mode, created once and reused across calls."""
+    key = (os.path.abspath(product_csv_path), workers, match_mode)
+    with _MATCH_POOLS_LOCK:
+        pool = _MATCH_POOLS.get(key)
+        if pool is None:
+            pool = ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_match_worker,
+                initargs=(key[0], match_mode),
+            )
+            _MATCH_POOLS[key] = pool
+        return pool
+
+
+def _drop_match_pool(product_csv_path: str, workers: int, match_mode: str) -> None:
+    key = (os.path.abspath(product_csv_path), workers, match_mode)
+    with _MATCH_POOLS_LOCK:
+        pool = _MATCH_POOLS.pop(key, None)
+    if pool is not None:
+        pool.shutdown(wait=False, cancel_futures=True)
+
+
+def shutdown_match_pools() -> None:
+    """Stop every parallel line-item matching pool."""
+    with _MATCH_POOLS_LOCK:
+        pools = list(_MATCH_POOLS.values())
+        _MATCH_POOLS.clear()
+    for pool in pools:
+        pool.shutdown(wait=True)
+
+
+atexit.register(shutdown_match_pools)
+
+
+def rank_parallel_matches(rfp_items: List[Dict[str, Any]], catalog: ProductCatalog,
+                          product_csv_path: str, match_mode: str, workers: int,
+                          limit: int = 3, scorer: MatchScorer = DEFAULT_SCORER,
+                          chunk_size: int = None, min_items: int = PARALLEL_MIN_ITEMS,
+                          timings: List[Dict[str, Any]] = None) -> List[List[Dict[str, Any]]]:
+    """
+    Uncached ranking of rfp_items on a process pool (same output as
+    _rank_top_matches_uncached, in the same order).
+
+    Items are split into chunks (default: PARALLEL_CHUNKS_PER_WORKER per
+    worker) and chunk results are reassembled in their original order.
+    Falls back to serial ranking when there are fewer than min_items items,
+    when a worker saw another catalog version than `catalog`, or when the
+    pool broke. Per-chunk timings are appended to `timings` when given.
+    """
+
+    # workers load the CSV, which does not carry the deltas applied in this process
+    if workers < 2 or len(rfp_items) < min_items or catalog.deltas:
+        return _rank_top_matches_uncached(rfp_items, catalog, match_mode, limit, scorer)
+
+    if chunk_size is None:
+        chunk_size = math.ceil(len(rfp_items) / (workers * PARALLEL_CHUNKS_PER_WORKER))
+    chunk_size = max(1, chunk_size)
+    chunks = [rfp_items[start:start + chunk_size] for start in range(0, len(rfp_items), chunk_size)]
+
+    pool = _match_pool(product_csv_path, workers, match_mode)
+    try:
+        futures = [
+            pool.submit(_rank_match_chunk, product_csv_path, chunk, match_mode, limit, scorer)
+            for chunk in chunks
+        ]
+        outcomes = [future.result() for future in futures]
+    except BrokenProcessPool as e:
+        print(f"[Technical Agent] Match pool failed ({e}); ranking serially")
+        _drop_match_pool(product_csv_path, workers, match_mode)
+        return _rank_top_matches_uncached(rfp_items, catalog, match_mode, limit, scorer)
+
+    if any(version != catalog.version for version, _, _, _ in outcomes):
+        # the CSV changed between loading `catalog` and ranking in the workers
+        print("[Technical Agent] Catalog changed during parallel matching; ranking serially")
+        return _rank_top_matches_uncached(rfp_items, catalog, match_mode, limit, scorer)
+
+    results = []
+    for chunk_number, (chunk, (_, ranked, seconds, pid)) in enumerate(zip(chunks, outcomes), start=1):
+        results.extend(ranked)
+        print(f"[Technical Agent] Chunk {chunk_number}/{len(chunks)}: {len(chunk)} items "
+              f"in {seconds:.3f}s (worker {pid})")
+        if timings is not None:
+            timings.append({"chunk": chunk_number, "items": len(chunk), "seconds": round(seconds, 6),
+                            "worker_pid": pid})
+
+    return results
+
+
 # -------------------------
 # Main processing flow
 # -------------------------
 
-def process_rfp(rfp_json_path: str, product_csv_path: str) -> Dict[str, Any]:
+def process_rfp(rfp_json_path: str, product_csv_path: str = None,
+                match_mode: str = MATCH_MODE_INDEXED, use_catalog_cache: bool = True,
+                attribute_weights: Dict[str, float] = None, top_k: int = 3,
+                use_match_cache: bool = True, shards: int = 0,
+                parallel_workers: int = 0, parallel_chunk_size: int = None,
+                output_format: str = OUTPUT_FORMAT_VERBOSE,
+                attribute_tolerances: Dict[str, float] = None,
+                catalog_id: str = None) -> Dict[str, Any]:
     """
     Full processing pipeline for one RFP JSON file.
 
+    The catalog is either a registered catalog_id (CATALOG_REGISTRY) or a
+    product_csv_path.
+
+    match_mode selects the ranking strategy (see MATCH_MODES).
+    use_catalog_cache=False rebuilds the catalog from the CSV for this call only.
+    attribute_weights optionally weighs spec attributes ({"voltage": 2.0, ...});
+    attributes left out weigh 1.0.
+    attribute_tolerances optionally overrides the numeric match tolerances
+    ({"size_sqmm": 0.5, "voltage": 0.1}, see MatchScorer); the indexes do not
+    depend on them, so nothing is rebuilt.
+    top_k is the number of ranked SKUs kept per item (returned under "top_3").
+    use_match_cache serves repeated item specs from MATCH_CACHE (never used by
+    the brute_force reference mode).
+    shards > 1 ranks on that many warm worker processes, each holding a slice
+    of the catalog (SHARD_POOLS); match_mode then runs inside every shard.
+    parallel_workers > 1 ranks the line items in chunks of parallel_chunk_size
+    on that many processes (see rank_parallel_matches); RFPs with fewer than
+    PARALLEL_MIN_ITEMS items to rank stay serial. Per-chunk timings are
+    returned under "parallel_chunks" when the pool was used.
+    output_format selects the verbose or compact output shape (see OUTPUT_FORMATS).
+    The version of the catalog ranked against is recorded as
+    "catalog_version" (the Main Agent joins that version with the price
+    table); sharded runs read no catalog in-process and record none.
+
     Steps:
     1. load RFP JSON
     2. extract line items (scope_of_supply)
     3. map and normalize RFP items to canonical keys
-    4. load product CSV and map/normalize to canonical keys
+    4. get the normalized catalog (cached; reloaded in the background when the CSV changes)
     5. for each RFP item:
         - rank all products
-        - select top 3
+        - select top k (default 3)
         - build comparison table
         - pick final sku
     6. return structured output
     """
 
+    if match_mode not in MATCH_MODES:
+        raise ValueError(f"Unknown match mode: {match_mode} (expected one of {MATCH_MODES})")
+
+    if top_k < 1:
+        raise ValueError(f"top_k must be at least 1, got {top_k}")
+
+    if shards > 1 and match_mode not in SHARD_MATCH_MODES:
+        raise ValueError(f"Match mode {match_mode} cannot run sharded (expected one of {SHARD_MATCH_MODES})")
+
+    if shards > 1 and parallel_workers > 1:
+        raise ValueError("shards and parallel_workers cannot be combined")
+
+    if output_format not in OUTPUT_FORMATS:
+        raise ValueError(f"Unknown output format: {output_format} (expected one of {OUTPUT_FORMATS})")
+
+    scorer = (MatchScorer(attribute_weights, attribute_tolerances)
+              if attribute_weights or attribute_tolerances else DEFAULT_SCORER)
+
+    product_csv_path = resolve_catalog_path(product_csv_path, catalog_id)
+
     if not os.path.exists(rfp_json_path):
         raise FileNotFoundError(f"RFP JSON file not found: {rfp_json_path}")
 
@@ -330,43 +963,72 @@ def process_rfp(rfp_json_path: str, product_csv_path: str) -> Dict[str, Any]:
     scope_items_raw = rfp_data.get("scope_of_supply", [])
 
     # 2. Map raw RFP items into canonical form and normalize
-    rfp_mapped_items = [map_rfp_item_keys(item) for item in scope_items_raw]
+    rfp_mapped_items = map_rfp_items(scope_items_raw)
     # Use normalize_rfp_specs from loader (which does text cleanup)
     normalized_rfp_items = [normalize_rfp_specs(item) for item in rfp_mapped_items]
 
-    # 3. Load product CSV rows
-    products_raw = load_product_specs(product_csv_path)  # returns list of dict rows
-    # Map and canonicalize product rows
-    products_mapped = [map_product_row_to_canonical(row) for row in products_raw]
-    # Normalize product specs using the loader-normalizer (lowercase/strip rules)
-    normalized_products = normalize_product_specs(products_mapped)
+    match_cache = MATCH_CACHE if use_match_cache and match_mode != MATCH_MODE_BRUTE_FORCE else None
+    parallel_chunks = []
+    catalog_version = None
+
+    if shards > 1:
+        # 3. Catalog held by warm shard workers; rank by scatter-gather.
+        #    The snapshot is compiled here once instead of by every worker.
+        ensure_catalog_snapshot(product_csv_path)
+        shard_pool = SHARD_POOLS.get(product_csv_path, shards, match_mode)
+        shard_pool.apply_deltas(*CATALOG_MANAGER.delta_log(product_csv_path))
+        top_matches = rank_sharded_matches(normalized_rfp_items, shard_pool, limit=top_k,
+                                           scorer=scorer, match_cache=match_cache)
+    else:
+        # 3. Normalized product catalog (loaded, canonicalized and normalized once),
+        #    read as one snapshot for the whole ranking even if a reload or a
+        #    delta publishes a newer one meanwhile
+        if use_catalog_cache:
+            catalog_snapshot = acquire_catalog(None if catalog_id else product_csv_path, catalog_id)
+        else:
+            catalog_snapshot = nullcontext(CATALOG_MANAGER.build(product_csv_path))
+
+        with catalog_snapshot as catalog:
+            # Rank products for all items and keep the top k (default 3) of each
+            if parallel_workers > 1:
+                rank_uncached = lambda items: rank_parallel_matches(
+                    items, catalog, product_csv_path, match_mode, parallel_workers, limit=top_k,
+                    scorer=scorer, chunk_size=parallel_chunk_size, timings=parallel_chunks
+                )
+                top_matches = _rank_with_cache(normalized_rfp_items, catalog.version, top_k, scorer,
+                                               match_cache, rank_uncached)
+            else:
+                top_matches = rank_top_matches(normalized_rfp_items, catalog, match_mode, limit=top_k,
+                                               scorer=scorer, match_cache=match_cache)
+
+            catalog_version = catalog.version
 
     # 4. Process each RFP item
     results = []
-    for index, rfp_item in enumerate(normalized_rfp_items, start=1):
-        # Rank products
-        ranked = rank_products_for_rfp_item(rfp_item, normalized_products)
-
-        # Top 3
-        top_3 = ranked[:3]
-
-        # Comparison table
-        comparison_table = build_comparison_table(rfp_item, top_3)
+    for index, (rfp_item, top_3) in enumerate(zip(normalized_rfp_items, top_matches), start=1):
+        # Comparison table (not part of the compact format)
+        if output_format == OUTPUT_FORMAT_VERBOSE:
+            comparison_table = build_comparison_table(rfp_item, top_3)
+        else:
+            comparison_table = None
 
         # final sku - take highest match_percent (first in ranked list)
         final_sku = top_3[0]["sku_id"] if len(top_3) > 0 else None
         final_match_percent = top_3[0]["match_percent"] if len(top_3) > 0 else 0.0
 
-        results.append({
+        result = {
             "item_index": index,
             "description": rfp_item.get("description", ""),
             "rfp_specs": rfp_item,
+            "inferred_fields": rfp_item.get("inferred_fields", []),
             "top_3": top_3,
             "comparison_table": comparison_table,
             "final_recommended_sku": final_sku,
             "final_match_percent": final_match_percent,
             "quantity": rfp_item.get("quantity", 0)
-        })
+        }
+
+        results.append(result)
 
     # 5. Build final output
     output = {
@@ -375,29 +1037,176 @@ def process_rfp(rfp_json_path: str, product_csv_path: str) -> Dict[str, Any]:
         "title": rfp_data.get("title"),
         "items": results
     }
+    if catalog_version is not None:
+        output["catalog_version"] = catalog_version
+    if parallel_chunks:
+        output["parallel_chunks"] = parallel_chunks
+
+    if output_format == OUTPUT_FORMAT_COMPACT:
+        output = compact_technical_output(output)
 
     return output
 
 
+# -------------------------
+# Catalog search
+# -------------------------
+
+SEARCH_STRING_ATTRIBUTES = ("insulation", "conductor", "standard")
+
+
+def search_catalog(product_csv_path: str = None, size_sqmm=None, size_tolerance: float = SIZE_TOLERANCE,
+                   voltage=None, voltage_tolerance: float = 0.0, cores=None,
+                   filters: Dict[str, Any] = None, limit: int = 50,
+                   catalog_id: str = None) -> Dict[str, Any]:
+    """
+    Find SKUs by spec, without an RFP, in a registered catalog_id or the
+    catalog of product_csv_path.
+
+    Numeric filters are answered by the catalog's sorted range indexes
+    (range_index.py), so the tolerances are free per query:
+    - size_sqmm  "2.5", "2.5 sqmm", 2.5   matched within size_tolerance sqmm
+    - voltage    "11", "11kV", "11000 V"  matched within voltage_tolerance kV
+    - cores      "3", "3C", "3 core"      exact count
+    filters maps SEARCH_STRING_ATTRIBUTES to values compared like RFP specs
+    (norm_str). Matches are returned in catalog order, at most `limit`.
+    """
+
+    parsed = {}
+    for attr, value, parse in (("size_sqmm", size_sqmm, parse_size_sqmm),
+                               ("voltage", voltage, lambda value: parse_voltage_kv(value, VOLTAGE_COLUMN_UNIT)),
+                               ("cores", cores, parse_core_count)):
+        if value is None or value == "":
+            continue
+        number = parse(value)
+        if number is None:
+            raise ValueError(f"Cannot parse {attr}: {value!r}")
+        parsed[attr] = number
+
+    filters = {attr: norm_str(value) for attr, value in (filters or {}).items() if value not in (None, "")}
+    unknown = set(filters) - set(SEARCH_STRING_ATTRIBUTES)
+    if unknown:
+        raise ValueError(f"Unknown search filters: {sorted(unknown)} (expected {SEARCH_STRING_ATTRIBUTES})")
+    if size_tolerance < 0 or voltage_tolerance < 0:
+        raise ValueError("Tolerances must be non-negative")
+
+    with acquire_catalog(product_csv_path, catalog_id) as catalog:
+        return _search_catalog(catalog, parsed, filters, size_tolerance, voltage_tolerance, limit)
+
+
+def _search_catalog(catalog: ProductCatalog, parsed: Dict[str, float], filters: Dict[str, str],
+                    size_tolerance: float, voltage_tolerance: float, limit: int) -> Dict[str, Any]:
+    tolerances = {"size_sqmm": size_tolerance, "voltage": voltage_tolerance, "cores": 0.0}
+
+    # intersect the range lookups; string filters are checked on the survivors
+    candidates = None
+    for attr, number in parsed.items():
+        positions = catalog.range_index(attr).within(number, tolerances[attr])
+        candidates = set(positions) if candidates is None else candidates.intersection(positions)
+        if not candidates:
+            break
+    positions = sorted(candidates) if candidates is not None else range(len(catalog.products))
+
+    products = catalog.products
+    matches = []
+    total = 0
+    for position in positions:
+        if position in catalog.deleted:
+            continue
+        product = products[position]
+        if any(norm_str(product.get(attr, "")) != value for attr, value in filters.items()):
+            continue
+        total += 1
+        if len(matches) < limit:
+            matches.append(materialize_product(product))
+
+    return {
+        "catalog_version": catalog.version,
+        "total": total,
+        "returned": len(matches),
+        "products": matches,
+    }
+
+
+# -------------------------
+# Catalog deltas
+# -------------------------
+
+def apply_catalog_delta(product_csv_path: str = None, records: List[Dict[str, Any]] = None,
+                        catalog_id: str = None) -> Dict[str, Any]:
+    """
+    Apply add / update / delete records to the cached catalog of the CSV (or
+    of a registered catalog_id) without reloading it (CatalogManager.apply_delta; the CSV file itself is
+    not modified). Runs in flight finish on the catalog they started with. Records are CSV rows plus "op":
+        {"op": "update", "sku": "CABLE-PVC-3C-2.5-IS694", "standard": "IS1554"}
+    Raises ValueError when a record is invalid; nothing is applied then.
+    """
+
+    if records is None:
+        raise ValueError("Delta records are required")
+
+    cache_before = MATCH_CACHE.stats()["carried_over"]
+    started = time.perf_counter()
+    with acquire_catalog(product_csv_path, catalog_id):
+        catalog = CATALOG_MANAGER.apply_delta(resolve_catalog_path(product_csv_path, catalog_id), records)
+    seconds = time.perf_counter() - started
+
+    return {
+        "catalog_version": catalog.version,
+        "base_version": catalog.base_version,
+        "records": len(records),
+        "skus": len(catalog),
+        "deltas": catalog.deltas,
+        "cached_results_kept": MATCH_CACHE.stats()["carried_over"] - cache_before,
+        "seconds": round(seconds, 6),
+    }
+
+
 # -------------------------
 # Convenient entry point
 # -------------------------
 
-def run_technical_agent(rfp_json_path: str, product_csv_path: str) -> Dict[str, Any]:
+def run_technical_agent(rfp_json_path: str, product_csv_path: str = None, *,
+                        catalog_id: str = DEFAULT_CATALOG_ID,
+                        match_mode: str = MATCH_MODE_INDEXED, shards: int = 0,
+                        parallel_workers: int = 0,
+                        output_format: str = OUTPUT_FORMAT_VERBOSE) -> Dict[str, Any]:
     """
     Top-level entrypoint for external callers (Main Agent / API).
+    catalog_id (keyword-only) selects the catalog quoted against
+    (CATALOG_REGISTRY). product_csv_path, the former second argument, is
+    deprecated: it is still quoted against, with a warning.
     Prints logs and returns structured data.
     """
 
+    if product_csv_path is not None:
+        message = (f"run_technical_agent(rfp_json_path, product_csv_path) is deprecated; "
+                   f"register the CSV in {CATALOG_REGISTRY_PATH} and pass catalog_id=...")
+        warnings.warn(message, DeprecationWarning, stacklevel=2)
+        print(f"[WARNING] {message}")
+        catalog_id = None
+
     print("\n========== TECHNICAL AGENT START ==========")
     print(f"[Technical Agent] RFP JSON: {rfp_json_path}")
-    print(f"[Technical Agent] Product CSV: {product_csv_path}")
+    if catalog_id is not None:
+        print(f"[Technical Agent] Catalog: {catalog_id} ({CATALOG_REGISTRY.csv_path(catalog_id)})")
+    else:
+        print(f"[Technical Agent] Catalog CSV: {product_csv_path}")
+    print(f"[Technical Agent] Match mode: {match_mode}")
+    if shards > 1:
+        print(f"[Technical Agent] Shards: {shards}")
+    if parallel_workers > 1:
+        print(f"[Technical Agent] Parallel workers: {parallel_workers}")
 
-    processed = process_rfp(rfp_json_path, product_csv_path)
+    processed = process_rfp(rfp_json_path, product_csv_path, catalog_id=catalog_id, match_mode=match_mode,
+                            shards=shards, parallel_workers=parallel_workers, output_format=output_format)
 
     print("[Technical Agent] Processing complete.")
     print(f"[Technical Agent] RFP id: {processed.get('rfp_id')}")
     print(f"[Technical Agent] Items processed: {len(processed.get('items', []))}")
+    print(f"[Technical Agent] Match cache: {MATCH_CACHE.stats()}")
+    if catalog_id is not None:
+        print(f"[Technical Agent] Catalog {catalog_id}: {CATALOG_REGISTRY.stats()['catalogs'][catalog_id]}")
     print("========== TECHNICAL AGENT END ==========\n")
 
     return processed
@@ -407,10 +1216,10 @@ def run_technical_agent(rfp_json_path: str, product_csv_path: str) -> Dict[str,
 if __name__ == "__main__":
     # example local test paths (adjust to your repo)
     example_rfp = "backend/data/rfp_documents/rfp_001.json"
-    example_csv = "backend/data/datasets/product_specs.csv"
+    example_csv = CATALOG_REGISTRY.csv_path(DEFAULT_CATALOG_ID)
 
     if os.path.exists(example_rfp) and os.path.exists(example_csv):
-        res = run_technical_agent(example_rfp, example_csv)
+        res = run_technical_agent(example_rfp, catalog_id=DEFAULT_CATALOG_ID)
         import json
         print(json.dumps(res, indent=2))
     else:
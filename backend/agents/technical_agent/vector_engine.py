@@ -0,0 +1,309 @@
+"""
+vector_engine.py
+
+Vectorized NumPy match-matrix engine for the Technical Agent.
+
+The normalized catalog is encoded once into typed NumPy columns:
+- size_sqmm  -> float64 values + "parsed" flag
+- voltage    -> float64 kV values + "parsed" flag (used with a voltage tolerance)
+- cores      -> categorical code of int(float(value)) + "parsed" flag
+- every attribute also gets a categorical code of its normalized string,
+  used for the string fallback of cores/size and for voltage, insulation,
+  conductor and standard
+
+RFP items are encoded against the same vocabularies, and the items x SKUs
+match-mask matrix (one bit per attribute, see bitmask_matcher.py) is
+computed in chunks of rows with array operations. The top-k per item is
+selected with argpartition on a key built from the mask's score rank that
+breaks ties by catalog order, so match percentages and ordering are identical to
+calculate_spec_match / rank_products_for_rfp_item.
+
+Catalog deltas (apply_delta) re-encode only the changed SKUs into their
+column rows (appended SKUs extend the columns); deleted SKUs stay in the
+columns and get a key below every live SKU, so they are never selected.
+A delta writes into new column arrays, never into the current ones, so
+copy() (the engine of a new catalog version) shares every column and
+vocabulary with the engine it was copied from.
+
+NumPy is an optional dependency: the engine raises ImportError when it is
+selected without NumPy installed.
+"""
+
+import sys
+from typing import List, Dict, Any, Optional, Tuple, Set, Iterable
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from agents.technical_agent.spec_keys import (
+    STRING_ATTRIBUTES,
+    norm_str,
+    parse_size,
+    parse_cores,
+    parse_voltage,
+    voltage_key,
+)
+from agents.technical_agent.bitmask_matcher import ATTRIBUTE_BITS, MatchScorer, DEFAULT_SCORER
+from agents.technical_agent.compact_catalog import make_ranked_entry
+
+
+# Upper bound on cells (items x SKUs) processed per chunk
+CHUNK_CELLS = 1 << 22
+
+# Code for empty values (never matches) and for RFP values absent from the catalog
+EMPTY_CODE = -1
+UNKNOWN_CODE = -2
+
+
+class _Vocabulary:
+    """Maps hashable values to dense integer codes."""
+
+    def __init__(self):
+        self.codes = {}
+
+    def add(self, value) -> int:
+        code = self.codes.get(value)
+        if code is None:
+            code = len(self.codes)
+            self.codes[value] = code
+        return code
+
+    def lookup(self, value) -> int:
+        return self.codes.get(value, UNKNOWN_CODE)
+
+
+class VectorMatchEngine:
+    """
+    Batched matcher over a list of normalized products.
+
+    Usage:
+        engine = VectorMatchEngine(normalized_products)
+        top_matches = engine.rank_batch(normalized_rfp_items, limit=3)
+    """
+
+    def __init__(self, products: List[Dict[str, Any]], chunk_cells: int = CHUNK_CELLS,
+                 deleted: Optional[Set[int]] = None):
+        if np is None:
+            raise ImportError("The vectorized match engine requires numpy (pip install numpy).")
+
+        self.products = products
+        self.chunk_cells = chunk_cells
+        # positions of deleted SKUs (shared with the owning catalog)
+        self.deleted: Set[int] = deleted if deleted is not None else set()
+
+        self._cores_vocab = _Vocabulary()
+        self._cores_str_vocab = _Vocabulary()
+        self._size_str_vocab = _Vocabulary()
+        self._voltage_vocab = _Vocabulary()
+        self._string_vocabs = {attr: _Vocabulary() for attr in STRING_ATTRIBUTES}
+
+        self._columns = self._encode(products, self._add_code)
+
+    # ---- encoding ----
+
+    @staticmethod
+    def _add_code(vocab: _Vocabulary, value: str) -> int:
+        return vocab.add(value) if value != "" else EMPTY_CODE
+
+    @staticmethod
+    def _lookup_code(vocab: _Vocabulary, value: str) -> int:
+        return vocab.lookup(value) if value != "" else EMPTY_CODE
+
+    def _encode(self, records: List[Dict[str, Any]], code) -> Dict[str, Any]:
+        """Encode records into NumPy columns; `code` assigns or looks up vocabulary codes."""
+
+        n = len(records)
+        cores_num = np.full(n, EMPTY_CODE, dtype=np.int64)
+        cores_parsed = np.zeros(n, dtype=bool)
+        cores_str = np.empty(n, dtype=np.int64)
+        size_val = np.zeros(n, dtype=np.float64)
+        size_parsed = np.zeros(n, dtype=bool)
+        size_str = np.empty(n, dtype=np.int64)
+        voltage = np.empty(n, dtype=np.int64)
+        voltage_val = np.zeros(n, dtype=np.float64)
+        voltage_parsed = np.zeros(n, dtype=bool)
+        strings = {attr: np.empty(n, dtype=np.int64) for attr in STRING_ATTRIBUTES}
+
+        for i, record in enumerate(records):
+            raw_cores = record.get("cores", "")
+            cores = parse_cores(raw_cores)
+            if cores is not None:
+                cores_parsed[i] = True
+                cores_num[i] = code(self._cores_vocab, cores)
+            cores_str[i] = code(self._cores_str_vocab, norm_str(raw_cores))
+
+            raw_size = record.get("size_sqmm", "")
+            size = parse_size(raw_size)
+            if size is not None:
+                size_parsed[i] = True
+                size_val[i] = size
+            size_str[i] = code(self._size_str_vocab, norm_str(raw_size))
+
+            key = voltage_key(record.get("voltage", ""))
+            voltage[i] = code(self._voltage_vocab, key)
+            voltage_kv = parse_voltage(key)
+            if voltage_kv is not None:
+                voltage_parsed[i] = True
+                voltage_val[i] = voltage_kv
+
+            for attr in STRING_ATTRIBUTES:
+                strings[attr][i] = code(self._string_vocabs[attr], norm_str(record.get(attr, "")))
+
+        return {
+            "cores_num": cores_num,
+            "cores_parsed": cores_parsed,
+            "cores_str": cores_str,
+            "size_val": size_val,
+            "size_parsed": size_parsed,
+            "size_str": size_str,
+            "voltage": voltage,
+            "voltage_val": voltage_val,
+            "voltage_parsed": voltage_parsed,
+            "strings": strings,
+        }
+
+    def copy(self, products: List[Dict[str, Any]], deleted: Set[int]) -> "VectorMatchEngine":
+        """Engine over a copy of the catalog (its products / deleted), sharing the columns until a delta."""
+        clone = VectorMatchEngine.__new__(VectorMatchEngine)
+        clone.__dict__.update(self.__dict__)
+        clone.products = products
+        clone.deleted = deleted
+        clone._columns = dict(self._columns, strings=dict(self._columns["strings"]))
+        return clone
+
+    def nbytes(self) -> int:
+        """Approximate bytes held by the columns and vocabularies."""
+        columns = [column for name, column in self._columns.items() if name != "strings"]
+        columns += list(self._columns["strings"].values())
+        vocabularies = [self._cores_vocab, self._cores_str_vocab, self._size_str_vocab, self._voltage_vocab,
+                        *self._string_vocabs.values()]
+        return sum(column.nbytes for column in columns) + sum(sys.getsizeof(vocab.codes) for vocab in vocabularies)
+
+    def apply_delta(self, positions: Iterable[int]) -> None:
+        """
+        Re-encode changed SKU positions (updated, appended or deleted in
+        self.products / self.deleted); deleted positions are excluded at ranking.
+        """
+
+        positions = sorted(set(positions))
+        if not positions:
+            return
+        n = len(self._columns["cores_num"])
+        changed = self._encode([self.products[p] for p in positions], self._add_code)
+
+        updated = [i for i, p in enumerate(positions) if p < n]
+        appended = [i for i, p in enumerate(positions) if p >= n]
+        rows = np.asarray([positions[i] for i in updated], dtype=np.int64)
+
+        def merge(column, new_values):
+            # new array: the current one may be shared with other catalog versions
+            column = np.concatenate([column, new_values[appended]]) if appended else column.copy()
+            column[rows] = new_values[updated]
+            return column
+
+        for name, column in self._columns.items():
+            if name == "strings":
+                for attr in STRING_ATTRIBUTES:
+                    column[attr] = merge(column[attr], changed["strings"][attr])
+            else:
+                self._columns[name] = merge(column, changed[name])
+
+    # ---- scoring ----
+
+    @staticmethod
+    def _string_match(rfp_codes, prod_codes):
+        """Equal, non-empty codes (rows: items, cols: SKUs)."""
+        return (rfp_codes[:, None] == prod_codes[None, :]) & (rfp_codes[:, None] >= 0)
+
+    def match_masks(self, items: Dict[str, Any], rows: slice, scorer: MatchScorer = DEFAULT_SCORER):
+        """Match-mask matrix (uint8, see bitmask_matcher) for a slice of encoded RFP items."""
+
+        prod = self._columns
+
+        # cores: integer equality when both parse, otherwise string fallback
+        both = items["cores_parsed"][rows, None] & prod["cores_parsed"][None, :]
+        num_eq = items["cores_num"][rows, None] == prod["cores_num"][None, :]
+        str_eq = self._string_match(items["cores_str"][rows], prod["cores_str"])
+        masks = np.where(both, num_eq, str_eq).astype(np.uint8) * np.uint8(ATTRIBUTE_BITS["cores"])
+
+        # size: tolerance check when both parse, otherwise string fallback
+        both = items["size_parsed"][rows, None] & prod["size_parsed"][None, :]
+        with np.errstate(invalid="ignore", over="ignore"):
+            within = np.abs(items["size_val"][rows, None] - prod["size_val"][None, :]) <= scorer.size_tolerance
+        str_eq = self._string_match(items["size_str"][rows], prod["size_str"])
+        masks |= np.where(both, within, str_eq).astype(np.uint8) * np.uint8(ATTRIBUTE_BITS["size_sqmm"])
+
+        # voltage: key match, or kV within the scorer's voltage tolerance when both parse
+        str_eq = self._string_match(items["voltage"][rows], prod["voltage"])
+        if scorer.voltage_tolerance is not None:
+            both = items["voltage_parsed"][rows, None] & prod["voltage_parsed"][None, :]
+            with np.errstate(invalid="ignore", over="ignore"):
+                within = np.abs(items["voltage_val"][rows, None] - prod["voltage_val"][None, :]) \
+                    <= scorer.voltage_tolerance
+            str_eq = np.where(both, within, str_eq)
+        masks |= str_eq.astype(np.uint8) * np.uint8(ATTRIBUTE_BITS["voltage"])
+        for attr in STRING_ATTRIBUTES:
+            masks |= self._string_match(items["strings"][attr][rows], prod["strings"][attr]).astype(np.uint8) \
+                * np.uint8(ATTRIBUTE_BITS[attr])
+
+        return masks
+
+    def rank_batch(self, rfp_items: List[Dict[str, Any]], limit: Optional[int] = 3,
+                   scorer: MatchScorer = DEFAULT_SCORER) -> List[List[Dict[str, Any]]]:
+        """
+        Return the top `limit` ranked entries for every RFP item (all SKUs when
+        limit is None). Entries have the same shape and order as
+        rank_products_for_rfp_item.
+        """
+        return [
+            [make_ranked_entry(self.products[p], scorer.percent(mask), mask) for p, mask in ranking]
+            for ranking in self.rank_batch_positions(rfp_items, limit, scorer)
+        ]
+
+    def rank_batch_positions(self, rfp_items: List[Dict[str, Any]], limit: Optional[int] = 3,
+                             scorer: MatchScorer = DEFAULT_SCORER) -> List[List[Tuple[int, int]]]:
+        """Ranked (position, match mask) pairs for every RFP item, in rank_batch() order."""
+
+        n_products = len(self.products)
+        if not rfp_items:
+            return []
+        if n_products == 0:
+            return [[] for _ in rfp_items]
+
+        n_live = n_products - len(self.deleted)
+        k = n_live if limit is None else min(limit, n_live)
+        if k == 0:
+            return [[] for _ in rfp_items]
+        items = self._encode(rfp_items, self._lookup_code)
+        score_rank = np.asarray(scorer.rank_table, dtype=np.int64)
+        deleted = np.fromiter(self.deleted, dtype=np.int64, count=len(self.deleted))
+
+        # Key = score rank * n + (n - 1 - position): unique per SKU, higher
+        # percent first and earlier catalog position first among equal percents.
+        # Deleted SKUs get -1, below every live SKU.
+        tie_break = (n_products - 1 - np.arange(n_products, dtype=np.int64))[None, :]
+
+        chunk_rows = max(1, self.chunk_cells // n_products)
+        results = []
+        for start in range(0, len(rfp_items), chunk_rows):
+            rows = slice(start, min(start + chunk_rows, len(rfp_items)))
+            masks = self.match_masks(items, rows, scorer)
+            keys = score_rank[masks] * n_products + tie_break
+            if len(deleted):
+                keys[:, deleted] = -1
+
+            if k < n_products:
+                top = np.argpartition(-keys, k - 1, axis=1)[:, :k]
+            else:
+                top = np.broadcast_to(np.arange(n_products), keys.shape)
+            top_keys = np.take_along_axis(keys, top, axis=1)
+            order = np.argsort(-top_keys, axis=1)
+            top = np.take_along_axis(top, order, axis=1)
+            top_masks = np.take_along_axis(masks, top, axis=1)
+
+            for positions, row_masks in zip(top.tolist(), top_masks.tolist()):
+                results.append(list(zip(positions, row_masks)))
+
+        return results
@@ -4,6 +4,7 @@ from fastapi.middleware.cors import CORSMiddleware
 from api.routes.rfp import router as rfp_router
 from api.routes.dashboard import router as dashboard_router
 from api.routes.ai_insights import router as ai_insights_router
+from api.routes.catalog import router as catalog_router
 
 # ✅ Step 1: Create app FIRST
 app = FastAPI(
@@ -29,6 +30,7 @@ app.add_middleware(
 app.include_router(rfp_router, prefix="/api/rfp", tags=["RFP"])
 app.include_router(dashboard_router, prefix="/api/dashboard", tags=["Dashboard"])
 app.include_router(ai_insights_router, prefix="/api/ai-insights", tags=["AI Insights"])
+app.include_router(catalog_router, prefix="/api/catalog", tags=["Catalog"])
 
 # Optional health check
 @app.get("/")
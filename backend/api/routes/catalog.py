@@ -0,0 +1,79 @@
+from typing import List, Dict, Any
+
+from fastapi import APIRouter, HTTPException
+from pydantic import BaseModel
+from backend.agents.main_agent.main_agent import (
+    search_catalog,
+    apply_catalog_delta,
+    CATALOG_REGISTRY,
+    DEFAULT_CATALOG_ID,
+)
+
+router = APIRouter()
+
+
+@router.get("/catalogs")
+def list_catalogs():
+    """
+    Registered product catalogs (one per OEM / tenant) with their memory use
+    and hit / load / eviction counters.
+    """
+    return {
+        "status": "success",
+        "data": CATALOG_REGISTRY.stats()
+    }
+
+
+@router.get("/search")
+def search_products(size_sqmm: str = None, size_tolerance: float = 0.2,
+                    voltage: str = None, voltage_tolerance: float = 0.0,
+                    cores: str = None, insulation: str = None, conductor: str = None,
+                    standard: str = None, limit: int = 50, catalog_id: str = DEFAULT_CATALOG_ID):
+    """
+    Searches a product catalog by spec.
+
+    size_sqmm / voltage match within their tolerance (sqmm / kV), cores
+    exactly; insulation, conductor and standard compare like RFP specs.
+    """
+
+    filters = {"insulation": insulation, "conductor": conductor, "standard": standard}
+    try:
+        result = search_catalog(catalog_id=catalog_id, size_sqmm=size_sqmm, size_tolerance=size_tolerance,
+                                voltage=voltage, voltage_tolerance=voltage_tolerance, cores=cores,
+                                filters=filters, limit=limit)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+    return {
+        "status": "success",
+        "data": result
+    }
+
+
+class CatalogDeltaRequest(BaseModel):
+    records: List[Dict[str, Any]]
+
+
+@router.post("/delta")
+def apply_delta(request: CatalogDeltaRequest, catalog_id: str = DEFAULT_CATALOG_ID):
+    """
+    Applies add / update / delete records to a loaded product catalog
+    without a full reload.
+
+    Each record is a CSV row plus "op" ("add", "update" or "delete"); the
+    sku column identifies the SKU and updates only need the changed columns.
+    """
+
+    try:
+        result = apply_catalog_delta(records=request.records, catalog_id=catalog_id)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+    return {
+        "status": "success",
+        "data": result
+    }
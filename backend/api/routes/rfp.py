@@ -1,25 +1,100 @@
+from typing import List, Dict, Any
+
 from fastapi import APIRouter, HTTPException
-from backend.agents.main_agent.main_agent import run_main_agent
+from pydantic import BaseModel
+from backend.agents.main_agent.main_agent import (
+    run_main_agent,
+    run_pricing_scenario,
+    StalePricingError,
+    OUTPUT_FORMAT_VERBOSE,
+    OUTPUT_FORMAT_COMPACT,
+    TECHNICAL_RESULTS,
+    DEFAULT_CATALOG_ID,
+)
 
 router = APIRouter()
 
 @router.post("/run-rfp")
 @router.post("/run-pipeline")
-def run_rfp_pipeline():
+def run_rfp_pipeline(verbose: bool = True, comparison_tables: bool = True, catalog_id: str = DEFAULT_CATALOG_ID):
     """
     Runs full RFP pipeline:
     Sales → Technical → Pricing → Final Response
+
+    catalog_id selects the product catalog (OEM / tenant) quoted against.
+
+    verbose=false returns the compact technical output (deduplicated SKU
+    table, no comparison tables) instead of the shape used by the frontend.
+    comparison_tables=false leaves the tables out of the verbose shape; they
+    are served per item by /rfp/{rfp_id}/items/{item_index}/comparison-table.
     """
 
     try:
-        result = run_main_agent()
+        result = run_main_agent(OUTPUT_FORMAT_VERBOSE if verbose else OUTPUT_FORMAT_COMPACT,
+                                comparison_tables=comparison_tables, catalog_id=catalog_id)
         return {
             "status": "success",
             "data": result
         }
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
     
+@router.get("/rfp/{rfp_id}/items/{item_index}/comparison-table")
+def get_comparison_table(rfp_id: str, item_index: int):
+    """
+    Comparison table of one line item of a processed RFP, built on first
+    request and cached.
+    """
+
+    try:
+        table = TECHNICAL_RESULTS.comparison_table(rfp_id, item_index)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    if table is None:
+        raise HTTPException(status_code=404, detail="RFP item not found")
+    return {
+        "status": "success",
+        "data": table
+    }
+
+
+class PricingScenarioRequest(BaseModel):
+    overrides: List[Dict[str, Any]]
+
+
+@router.post("/rfp/{rfp_id}/scenario")
+def price_scenario(rfp_id: str, request: PricingScenarioRequest):
+    """
+    What-if re-pricing of a processed RFP without re-running the pipeline.
+
+    Each override changes one item ("item_no") or, with only "tests", every
+    item: {"item_no": 4, "quantity": 2000}, {"item_no": 4, "sku_rank": 2}
+    (2nd SKU of the item's top_3), {"item_no": 4, "unit_price": 199.5},
+    {"tests": ["High voltage test"]}. Only the affected pricing rows and the
+    totals are recomputed; the stored RFP response is not changed. 409 when
+    the pricing tables changed since the RFP was priced.
+    """
+
+    try:
+        result = run_pricing_scenario(rfp_id, request.overrides)
+    except StalePricingError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+    if result is None:
+        raise HTTPException(status_code=404, detail="RFP not found")
+    return {
+        "status": "success",
+        "data": result
+    }
+
+
 @router.get("/rfp/{rfp_id}")
 def get_rfp(rfp_id: str):
     # Load saved RFP pipeline result
@@ -0,0 +1,179 @@
+"""
+bench_delta.py
+
+Benchmark of catalog delta ingestion (CatalogManager.apply_delta).
+
+A synthetic catalog (synthetic_data.py, default 1M SKUs) is loaded with its
+match structures built and MATCH_CACHE warmed by one RFP; then deltas of
+--delta records (60% updates, 20% adds, 20% deletes) are applied. It reports:
+- catalog load time and match structure build time (the cost of a reload)
+- per-delta apply time (mean / max, milliseconds) with all structures updated
+- cached match results carried over to the new catalog version
+- RFP ranking time after the deltas, and whether the indexed results still
+  equal the brute-force reference on a sample of items
+
+Usage (from the repository root):
+    python backend/benchmarks/bench_delta.py
+    python backend/benchmarks/bench_delta.py --skus 100000 --delta 1000 --deltas 5 --output /tmp/delta.json
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import platform
+import tempfile
+from datetime import datetime
+from typing import List, Dict, Any
+
+# Add backend to Python path dynamically
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.append(BASE_DIR)
+
+from benchmarks.synthetic_data import (
+    dataset_paths, CORES, SIZES_SQMM, VOLTAGES_KV, INSULATIONS, CONDUCTORS, STANDARDS,
+)
+import agents.technical_agent.technical_agent as ta
+
+
+DEFAULT_RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results")
+
+# share of update / add / delete records in a delta
+OP_WEIGHTS = (("update", 0.6), ("add", 0.2), ("delete", 0.2))
+STRUCTURES = ("indexed", "vectorized", "bitmask")
+
+
+def timed(fn, *args) -> float:
+    started = time.perf_counter()
+    fn(*args)
+    return time.perf_counter() - started
+
+
+def random_specs(rng: random.Random) -> Dict[str, str]:
+    return {
+        "cores": rng.choice(CORES),
+        "size_sqmm": rng.choice(SIZES_SQMM),
+        "voltage_kv": rng.choice(VOLTAGES_KV),
+        "insulation": rng.choice(INSULATIONS),
+        "conductor": rng.choice(CONDUCTORS),
+        "standard": rng.choice(STANDARDS),
+    }
+
+
+def build_delta(rng: random.Random, live_skus: List[str], n_records: int, delta_number: int) -> List[Dict[str, Any]]:
+    """n_records delta records; live_skus is updated to the SKUs left after the delta."""
+
+    ops = rng.choices([op for op, _ in OP_WEIGHTS], weights=[w for _, w in OP_WEIGHTS], k=n_records)
+    records = []
+    for number, op in enumerate(ops):
+        if op == "add":
+            sku = f"CABLE-DELTA-{delta_number:04d}-{number:06d}"
+            records.append(dict(random_specs(rng), op="add", sku=sku))
+            live_skus.append(sku)
+        elif op == "update":
+            specs = random_specs(rng)
+            changed = rng.sample(sorted(specs), rng.randint(1, 3))
+            records.append(dict({column: specs[column] for column in changed}, op="update",
+                                sku=rng.choice(live_skus)))
+        else:
+            index = rng.randrange(len(live_skus))
+            live_skus[index], live_skus[-1] = live_skus[-1], live_skus[index]
+            records.append({"op": "delete", "sku": live_skus.pop()})
+    return records
+
+
+def main(argv: List[str] = None) -> Dict[str, Any]:
+    parser = argparse.ArgumentParser(description="Catalog delta ingestion benchmark")
+    parser.add_argument("--skus", type=int, default=1_000_000)
+    parser.add_argument("--delta", type=int, default=1_000, help="records per delta")
+    parser.add_argument("--deltas", type=int, default=5, help="number of deltas applied")
+    parser.add_argument("--items", type=int, default=100, help="RFP line items used to warm the match cache")
+    parser.add_argument("--structures", nargs="+", choices=STRUCTURES, default=list(STRUCTURES))
+    parser.add_argument("--check-items", type=int, default=20,
+                        help="items compared against brute force after the deltas")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--data-dir", default=os.path.join(tempfile.gettempdir(), "rfp_benchmark_data"))
+    parser.add_argument("--output", help="results JSON path")
+    args = parser.parse_args(argv)
+
+    paths = dataset_paths(args.data_dir, args.skus, args.items, args.seed)
+    csv_path = paths["catalog"]
+    ta.ensure_catalog_snapshot(csv_path)
+    ta.CATALOG_MANAGER.invalidate(csv_path)
+
+    started = time.perf_counter()
+    catalog = ta.CATALOG_MANAGER.get(csv_path)
+    load_seconds = time.perf_counter() - started
+
+    build = {"indexed": catalog.spec_index, "vectorized": catalog.vector_engine,
+             "bitmask": catalog.bitmask_matcher}
+    build_seconds = {name: round(timed(build[name]), 4) for name in args.structures}
+    print(f"[Benchmark] {len(catalog)} SKUs loaded in {load_seconds:.3f}s; structures built in {build_seconds}")
+
+    rfp_items = [ta.normalize_rfp_specs(item)
+                 for item in ta.map_rfp_items(ta.load_rfp_json(paths["rfp"]).get("scope_of_supply", []))]
+    for name in args.structures:
+        ta.rank_top_matches(rfp_items, catalog, name, match_cache=ta.MATCH_CACHE)
+    cached_before = ta.MATCH_CACHE.stats()["entries"]
+
+    rng = random.Random(args.seed)
+    live_skus = [product.to_dict()["_raw"]["sku"] for product in catalog.products]
+    deltas = []
+    for delta_number in range(args.deltas):
+        records = build_delta(rng, live_skus, args.delta, delta_number)
+        result = ta.apply_catalog_delta(csv_path, records)
+        deltas.append(result)
+    apply_ms = [delta["seconds"] * 1000 for delta in deltas]
+    print(f"[Benchmark] {args.deltas} deltas of {args.delta} records: "
+          f"mean {sum(apply_ms) / len(apply_ms):.1f} ms, max {max(apply_ms):.1f} ms")
+    print(f"[Benchmark] cached results kept per delta: {[delta['cached_results_kept'] for delta in deltas]} "
+          f"(of {cached_before})")
+
+    # deltas publish a new catalog (copy-on-write); `catalog` is the one loaded
+    catalog = ta.CATALOG_MANAGER.get(csv_path)
+    rank_seconds = {}
+    for name in args.structures:
+        rank_seconds[name] = round(timed(ta.rank_top_matches, rfp_items, catalog, name), 4)
+    print(f"[Benchmark] RFP of {len(rfp_items)} items ranked after the deltas in {rank_seconds}")
+
+    sample = rfp_items[:args.check_items]
+    products = catalog.live_products()
+    reference = [ta.rank_products_for_rfp_item(item, products, limit=3) for item in sample]
+    consistent = {
+        name: ta.rank_top_matches(sample, catalog, name) == reference
+        for name in args.structures
+    }
+    print(f"[Benchmark] results equal to brute force on {len(sample)} items: {consistent}")
+
+    report = {
+        "suite": "catalog_delta",
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "seed": args.seed,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "skus": args.skus,
+        "delta_records": args.delta,
+        "load_seconds": round(load_seconds, 4),
+        "build_seconds": build_seconds,
+        "deltas": deltas,
+        "apply_ms_mean": round(sum(apply_ms) / len(apply_ms), 3),
+        "apply_ms_max": round(max(apply_ms), 3),
+        "cached_results_before": cached_before,
+        "rank_seconds_after": rank_seconds,
+        "consistent_with_brute_force": consistent,
+    }
+
+    output = args.output or os.path.join(
+        DEFAULT_RESULTS_DIR, f"delta_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+    )
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"[Benchmark] Results written to {output}")
+    return report
+
+
+if __name__ == "__main__":
+    main()
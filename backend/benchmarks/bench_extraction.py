@@ -0,0 +1,170 @@
+"""
+bench_extraction.py
+
+Benchmark of the description spec extractor (loaders/spec_extractor.py).
+
+Descriptions are generated from seeded spec combinations (synthetic_data.py
+ranges) with a set of realistic wordings, so every description has a known
+ground truth. For --descriptions N (default 100k) it reports:
+- extract_specs        one call per description (every description parsed)
+- extract_specs_batch  the batch path used by map_rfp_items (distinct
+                       descriptions parsed once)
+- map_rfp_items        full RFP item mapping of items that only carry a
+                       description (extraction + canonicalization)
+as descriptions per second and mean microseconds per description, plus the
+per-field accuracy of the extracted values against the ground truth.
+
+Usage (from the repository root):
+    python backend/benchmarks/bench_extraction.py
+    python backend/benchmarks/bench_extraction.py --descriptions 20000 --output /tmp/extract.json
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import platform
+from datetime import datetime
+from typing import List, Dict, Any, Tuple
+
+# Add backend to Python path dynamically
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.append(BASE_DIR)
+
+from benchmarks.synthetic_data import CORES, SIZES_SQMM, VOLTAGES_KV, INSULATIONS, CONDUCTORS
+from loaders.spec_extractor import EXTRACTED_FIELDS, extract_specs, extract_specs_batch
+from loaders.units import canonical_cores, canonical_size, canonical_voltage
+from agents.technical_agent.technical_agent import map_rfp_items
+
+
+DEFAULT_RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results")
+
+# Wordings seen in RFP schedules; {v} is the voltage in kV, {volts} in V
+TEMPLATES = [
+    "LT cable {c}C x {s} sqmm, {v}kV, {i} insulated, {cond} conductor",
+    "Supply of {c} core {s} sq.mm {i} insulated {cond} conductor cable, {v} kV grade",
+    "{c}x{s}mm2 {cond} {i} cable {volts}V",
+    "{i} insulated, {cond_short} conductor, {c}C x {s} sq mm, rated {v} kV, armoured",
+    "Cable {v}kV {c}-core {s} sqmm {cond} conductor {i} insulated PVC sheathed",
+    # regression: a temperature rating before the cores is not a core count
+    "Conductor temp 90C, {c}C x {s} sqmm {cond} {i} insulated cable, {v} kV",
+]
+CONDUCTOR_SHORT = {"Copper": "Cu", "Aluminium": "Al"}
+
+
+def build_descriptions(n: int, seed: int) -> Tuple[List[str], List[Dict[str, str]]]:
+    """n descriptions and their ground-truth canonical specs."""
+    rng = random.Random(seed)
+    descriptions, truth = [], []
+    for _ in range(n):
+        cores, size, voltage = rng.choice(CORES), rng.choice(SIZES_SQMM), rng.choice(VOLTAGES_KV)
+        insulation, conductor = rng.choice(INSULATIONS), rng.choice(CONDUCTORS)
+        template = rng.choice(TEMPLATES)
+        descriptions.append(template.format(
+            c=cores, s=size, v=voltage, volts=round(float(voltage) * 1000), i=insulation,
+            cond=conductor.lower(), cond_short=CONDUCTOR_SHORT[conductor],
+        ))
+        truth.append({
+            "cores": canonical_cores(cores),
+            "size_sqmm": canonical_size(size),
+            "voltage": canonical_voltage(voltage, "kv"),
+            "insulation": insulation,
+            "conductor": conductor,
+        })
+    return descriptions, truth
+
+
+def timed(fn, *args) -> Tuple[Any, float]:
+    started = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - started
+
+
+def rate_record(name: str, n: int, seconds: float) -> Dict[str, Any]:
+    return {
+        "path": name,
+        "descriptions": n,
+        "seconds": round(seconds, 4),
+        "per_second": round(n / seconds) if seconds > 0 else None,
+        "mean_us": round(seconds / n * 1e6, 2) if n else None,
+    }
+
+
+def field_accuracy(items: List[Dict[str, Any]], truth: List[Dict[str, str]]) -> Dict[str, float]:
+    """Share of items whose mapped field equals the ground truth, per field."""
+    canonical = {"cores": canonical_cores, "size_sqmm": canonical_size, "voltage": canonical_voltage}
+    accuracy = {}
+    for field in EXTRACTED_FIELDS:
+        to_canonical = canonical.get(field, lambda value: value)
+        correct = sum(1 for item, expected in zip(items, truth) if to_canonical(item[field]) == expected[field])
+        accuracy[field] = round(correct / len(items), 6) if items else None
+    return accuracy
+
+
+def extracted_as_items(extracted: List[Dict[str, str]]) -> List[Dict[str, str]]:
+    """Extracted specs with every field present ("" when not found)."""
+    return [{field: specs.get(field, "") for field in EXTRACTED_FIELDS} for specs in extracted]
+
+
+def main(argv: List[str] = None) -> Dict[str, Any]:
+    parser = argparse.ArgumentParser(description="Description spec extraction benchmark")
+    parser.add_argument("--descriptions", type=int, default=100_000)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="results JSON path")
+    args = parser.parse_args(argv)
+
+    descriptions, truth = build_descriptions(args.descriptions, args.seed)
+    n = len(descriptions)
+    print(f"[Benchmark] {n} descriptions ({len(set(descriptions))} distinct)")
+
+    results = []
+
+    extracted, seconds = timed(lambda: [extract_specs(d) for d in descriptions])
+    results.append(rate_record("extract_specs", n, seconds))
+
+    _, seconds = timed(extract_specs_batch, descriptions)
+    results.append(rate_record("extract_specs_batch", n, seconds))
+
+    raw_items = [{"item_no": str(i), "description": d, "quantity": 1} for i, d in enumerate(descriptions, start=1)]
+    mapped, seconds = timed(map_rfp_items, raw_items)
+    results.append(rate_record("map_rfp_items", n, seconds))
+
+    for record in results:
+        print(f"[Benchmark] {record['path']:<20} {record['per_second']:>10,} descriptions/s | "
+              f"{record['mean_us']:8.2f} us each | {record['seconds']:.3f}s total")
+
+    accuracy = field_accuracy(extracted_as_items(extracted), truth)
+    mapped_accuracy = field_accuracy(mapped, truth)
+    fully_inferred = sum(1 for item in mapped if len(item["inferred_fields"]) == len(EXTRACTED_FIELDS))
+    print(f"[Benchmark] accuracy (extract_specs): {accuracy}")
+    print(f"[Benchmark] accuracy (map_rfp_items): {mapped_accuracy}")
+    print(f"[Benchmark] items with every field inferred: {fully_inferred}/{n}")
+
+    report = {
+        "suite": "spec_extraction",
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "seed": args.seed,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "descriptions": n,
+        "distinct_descriptions": len(set(descriptions)),
+        "results": results,
+        "accuracy": accuracy,
+        "mapped_accuracy": mapped_accuracy,
+        "fully_inferred": fully_inferred,
+    }
+
+    output = args.output or os.path.join(
+        DEFAULT_RESULTS_DIR, f"extraction_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+    )
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"[Benchmark] Results written to {output}")
+    return report
+
+
+if __name__ == "__main__":
+    main()
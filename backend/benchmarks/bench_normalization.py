@@ -0,0 +1,250 @@
+"""
+bench_normalization.py
+
+Micro-benchmark of the shared normalization rules (loaders/normalization.py)
+against the chained str.replace implementations they replaced.
+
+For each call site it measures the per-call cost (ns) of:
+- legacy   the previous inline implementation (copied below as reference)
+- current  the normalization module, as called by the loaders / matchers
+and checks that both return exactly the same values on the benchmark inputs.
+
+Call sites:
+- norm_str              spec_keys.norm_str / calculate_spec_mask string keys
+- normalize_key         pricing_loader keys (test names, SKU ids)
+- normalize_rfp_specs   one mapped RFP item
+- normalize_product_specs  one mapped catalog row
+- calculate_spec_mask   one RFP item x SKU comparison (string keys per attribute)
+
+Inputs are drawn from a synthetic catalog / RFP (synthetic_data.py), so hot
+values repeat the way they do in real data.
+
+Usage (from the repository root):
+    python backend/benchmarks/bench_normalization.py
+    python backend/benchmarks/bench_normalization.py --records 20000 --output /tmp/norm.json
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+import tempfile
+from datetime import datetime
+from typing import List, Dict, Any, Callable
+
+# Add backend to Python path dynamically
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.append(BASE_DIR)
+
+from benchmarks.synthetic_data import dataset_paths, TESTS
+from loaders.json_loader import load_rfp_json, iter_product_specs, normalize_rfp_specs, normalize_product_specs
+from loaders.pricing_loader import normalize_key
+from loaders.normalization import clear_normalization_caches, normalization_cache_info
+from agents.technical_agent.spec_keys import SPEC_ATTRIBUTES, norm_str
+from agents.technical_agent.bitmask_matcher import ATTRIBUTE_BITS
+from agents.technical_agent.technical_agent import (
+    map_rfp_item_keys,
+    map_product_row_to_canonical,
+    calculate_spec_mask,
+)
+
+
+DEFAULT_RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results")
+
+
+# -------------------------
+# Legacy implementations (reference)
+# -------------------------
+
+def legacy_norm_str(v):
+    if v is None:
+        return ""
+    return str(v).lower().strip().replace(" ", "").replace("-", "")
+
+
+def legacy_normalize_key(value):
+    if value is None:
+        return ""
+    return str(value).lower().strip().replace(" ", "").replace("-", "")
+
+
+def _legacy_field(key, value):
+    if value is None:
+        v = ""
+    else:
+        v = str(value).lower().strip()
+    v = v.replace(" ", "").replace("-", "")
+    if key == "cores":
+        v = v.replace("core", "")
+    if key == "size_sqmm":
+        v = v.replace("sqmm", "")
+    if key == "voltage":
+        v = v.replace("kv", "") + "kv"
+    if key == "insulation":
+        v = v.replace("insulated", "")
+    if key == "standard":
+        v = v.replace("is", "is ")
+    return v
+
+
+def legacy_calculate_spec_mask(rfp_item, product):
+    match_mask = 0
+    for attr in SPEC_ATTRIBUTES:
+        rfp_val = rfp_item.get(attr, "")
+        prod_val = product.get(attr, "")
+        if attr == "size_sqmm":
+            try:
+                if abs(float(str(rfp_val)) - float(str(prod_val))) <= 0.2:
+                    match_mask |= ATTRIBUTE_BITS[attr]
+            except Exception:
+                if legacy_norm_str(rfp_val) and legacy_norm_str(rfp_val) == legacy_norm_str(prod_val):
+                    match_mask |= ATTRIBUTE_BITS[attr]
+        elif attr == "cores":
+            try:
+                if int(float(rfp_val)) == int(float(prod_val)):
+                    match_mask |= ATTRIBUTE_BITS[attr]
+            except Exception:
+                if legacy_norm_str(rfp_val) and legacy_norm_str(rfp_val) == legacy_norm_str(prod_val):
+                    match_mask |= ATTRIBUTE_BITS[attr]
+        elif attr == "voltage":
+            rv = str(rfp_val).lower().replace(" ", "")
+            pv = str(prod_val).lower().replace(" ", "")
+            if rv and "kv" not in rv:
+                rv = rv + "kv"
+            if pv and "kv" not in pv:
+                pv = pv + "kv"
+            if rv == pv and rv != "":
+                match_mask |= ATTRIBUTE_BITS[attr]
+        else:
+            if legacy_norm_str(rfp_val) == legacy_norm_str(prod_val) and legacy_norm_str(rfp_val) != "":
+                match_mask |= ATTRIBUTE_BITS[attr]
+    return match_mask
+
+
+def legacy_normalize_rfp_specs(rfp_specs):
+    return {key: _legacy_field(key, value) for key, value in rfp_specs.items()}
+
+
+def legacy_normalize_product_specs(product_list):
+    return [
+        {key: value if key == "_raw" else _legacy_field(key, value) for key, value in product.items()}
+        for product in product_list
+    ]
+
+
+# -------------------------
+# Timing
+# -------------------------
+
+def per_call_ns(fn: Callable, inputs: List[Any], repeat: int) -> float:
+    """Best-of-`repeat` mean cost of fn(x) over inputs, in nanoseconds."""
+    best = None
+    for _ in range(repeat):
+        started = time.perf_counter_ns()
+        for x in inputs:
+            fn(x)
+        elapsed = time.perf_counter_ns() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best / len(inputs)
+
+
+def bench_case(name: str, legacy: Callable, current: Callable, inputs: List[Any], repeat: int) -> Dict[str, Any]:
+    mismatches = sum(1 for x in inputs if legacy(x) != current(x))
+
+    legacy_ns = per_call_ns(legacy, inputs, repeat)
+    clear_normalization_caches()
+    cold_ns = per_call_ns(current, inputs, 1)
+    current_ns = per_call_ns(current, inputs, repeat)
+
+    return {
+        "call_site": name,
+        "calls": len(inputs),
+        "legacy_ns": round(legacy_ns, 1),
+        "current_cold_ns": round(cold_ns, 1),
+        "current_ns": round(current_ns, 1),
+        "speedup": round(legacy_ns / current_ns, 2) if current_ns else None,
+        "mismatches": mismatches,
+    }
+
+
+def build_inputs(data_dir: str, n_records: int, seed: int) -> Dict[str, List[Any]]:
+    paths = dataset_paths(data_dir, n_records, n_records, seed)
+
+    # inferred_fields (a list, not a spec value) did not exist in the legacy items
+    rfp_items = [map_rfp_item_keys(item) for item in load_rfp_json(paths["rfp"])["scope_of_supply"]]
+    for item in rfp_items:
+        item.pop("inferred_fields", None)
+    product_rows = [map_product_row_to_canonical(row) for row in iter_product_specs(paths["catalog"])]
+
+    spec_values = []
+    for product in product_rows:
+        spec_values.extend(product[attr] for attr in ("cores", "size_sqmm", "voltage", "insulation",
+                                                       "conductor", "standard"))
+    price_keys = [row["sku"] for row in iter_product_specs(paths["catalog"])][: n_records // 2]
+    price_keys += [TESTS[i % len(TESTS)].upper() if i % 3 else TESTS[i % len(TESTS)]
+                   for i in range(n_records // 2)]
+
+    # raw (mapped, not normalized) values, so the string fallbacks are exercised
+    pairs = [(rfp_items[i % len(rfp_items)], product_rows[i]) for i in range(len(product_rows))]
+
+    return {
+        "norm_str": spec_values,
+        "normalize_key": price_keys,
+        "normalize_rfp_specs": rfp_items,
+        "normalize_product_specs": [[product] for product in product_rows],
+        "calculate_spec_mask": pairs,
+    }
+
+
+def main(argv: List[str] = None) -> Dict[str, Any]:
+    parser = argparse.ArgumentParser(description="Normalization micro-benchmark")
+    parser.add_argument("--records", type=int, default=10_000, help="catalog rows / RFP items to normalize")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--data-dir", default=os.path.join(tempfile.gettempdir(), "rfp_benchmark_data"))
+    parser.add_argument("--output", help="results JSON path")
+    args = parser.parse_args(argv)
+
+    inputs = build_inputs(args.data_dir, args.records, args.seed)
+    cases = [
+        ("norm_str", legacy_norm_str, norm_str),
+        ("normalize_key", legacy_normalize_key, normalize_key),
+        ("normalize_rfp_specs", legacy_normalize_rfp_specs, normalize_rfp_specs),
+        ("normalize_product_specs", legacy_normalize_product_specs, normalize_product_specs),
+        ("calculate_spec_mask", lambda pair: legacy_calculate_spec_mask(*pair),
+         lambda pair: calculate_spec_mask(*pair)),
+    ]
+
+    results = []
+    for name, legacy, current in cases:
+        record = bench_case(name, legacy, current, inputs[name], args.repeat)
+        results.append(record)
+        print(f"[Benchmark] {name:<24} legacy {record['legacy_ns']:8.1f} ns | "
+              f"current {record['current_ns']:8.1f} ns (cold {record['current_cold_ns']:8.1f}) | "
+              f"x{record['speedup']} | mismatches {record['mismatches']}")
+
+    report = {
+        "suite": "normalization",
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "seed": args.seed,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "records": args.records,
+        "results": results,
+        "cache_info": normalization_cache_info(),
+    }
+
+    output = args.output or os.path.join(
+        DEFAULT_RESULTS_DIR, f"normalization_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+    )
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"[Benchmark] Results written to {output}")
+    return report
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,183 @@
+"""
+bench_pricing.py
+
+Benchmark of the Pricing Agent's batch pricing kernel (price_items) against
+the per-item loop it replaced (compute_item_pricing on every item, summing
+the costs one item at a time).
+
+Technical Agent output for a BOQ of --items line items is synthesized from a
+synthetic price table (synthetic_data.py): SKUs are drawn from the priced
+catalog, quantities and match percentages at random, and the RFP requires
+three tests of test_pricing.csv. It reports the time of both paths and checks that they return
+exactly the same pricing_summary and totals.
+
+With --tiers N every priced SKU also gets N random volume slabs
+(price_tiers.py): the batch kernel then resolves all lines at once and is
+checked against resolving each line's slab by bisect.
+
+Usage (from the repository root):
+    python backend/benchmarks/bench_pricing.py
+    python backend/benchmarks/bench_pricing.py --items 1000000 --skus 100000 --output /tmp/pricing.json
+    python backend/benchmarks/bench_pricing.py --tiers 24
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import platform
+import tempfile
+from datetime import datetime
+from typing import List, Dict, Any
+
+# Add backend to Python path dynamically
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.append(BASE_DIR)
+
+from benchmarks.synthetic_data import dataset_paths
+from loaders.pricing_loader import load_product_prices, load_test_prices, normalize_key
+from agents.pricing_agent.pricing_agent import compute_item_pricing, price_items
+from agents.pricing_agent.price_tiers import PriceTiers
+
+
+DEFAULT_RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results")
+TEST_PRICING_CSV = os.path.join(BASE_DIR, "data", "datasets", "test_pricing.csv")
+
+
+def synthetic_items(rng: random.Random, skus: List[str], n_items: int) -> List[Dict[str, Any]]:
+    """Technical Agent output items (final SKU + quantity) for a BOQ of n_items lines."""
+    return [
+        {
+            "item_index": number,
+            "final_recommended_sku": rng.choice(skus),
+            "final_match_percent": rng.choice([66.67, 83.33, 100.0]),
+            "quantity": str(rng.choice([100, 250, 500, 750, 1000, 2000, 5000])),
+        }
+        for number in range(1, n_items + 1)
+    ]
+
+
+def price_per_item(items, product_prices, test_prices, tests_required):
+    """The previous run_pricing_agent loop (reference)."""
+    priced_items = []
+    total_material = 0
+    total_test_cost = 0
+    for item in items:
+        pricing = compute_item_pricing(item, product_prices, test_prices, tests_required)
+        priced_items.append(pricing)
+        total_material += pricing["material_cost"]
+        total_test_cost += pricing["test_cost_total"]
+    totals = {
+        "material_total": total_material,
+        "test_total": total_test_cost,
+        "grand_total": total_material + total_test_cost,
+    }
+    return priced_items, totals
+
+
+def synthetic_tiers(rng: random.Random, product_prices: Dict[str, float], n_tiers: int) -> PriceTiers:
+    """n_tiers slabs per SKU, each cheaper than the one below it."""
+    tiers = {}
+    for key, unit_price in product_prices.items():
+        breakpoints = sorted(rng.sample(range(50, 10_000), n_tiers))
+        tiers[key] = [(quantity, round(unit_price * (1 - 0.01 * (slab + 1)), 2))
+                      for slab, quantity in enumerate(breakpoints)]
+    return PriceTiers(tiers)
+
+
+def price_per_item_tiered(items, product_prices, test_prices, tests_required, tiers):
+    """Per-item loop with each line's slab resolved by bisect (reference)."""
+    priced_items, totals = price_per_item(items, product_prices, test_prices, tests_required)
+    total_material = 0
+    for pricing in priced_items:
+        unit_price = tiers.unit_price(normalize_key(pricing["sku"]), pricing["quantity"], pricing["unit_price"])
+        pricing["unit_price"] = unit_price
+        pricing["material_cost"] = unit_price * pricing["quantity"]
+        pricing["total_cost"] = pricing["material_cost"] + pricing["test_cost_total"]
+        total_material += pricing["material_cost"]
+    totals["material_total"] = total_material
+    totals["grand_total"] = total_material + totals["test_total"]
+    return priced_items, totals
+
+
+def best_of(repeat: int, fn, *args):
+    best = None
+    result = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn(*args)
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def main(argv: List[str] = None) -> Dict[str, Any]:
+    parser = argparse.ArgumentParser(description="Pricing Agent batch kernel benchmark")
+    parser.add_argument("--items", type=int, default=100_000, help="BOQ line items")
+    parser.add_argument("--skus", type=int, default=10_000, help="SKUs in the price table")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--tiers", type=int, default=0, help="volume slabs per SKU (0: flat prices)")
+    parser.add_argument("--data-dir", default=os.path.join(tempfile.gettempdir(), "rfp_benchmark_data"))
+    parser.add_argument("--output", help="results JSON path")
+    args = parser.parse_args(argv)
+
+    paths = dataset_paths(args.data_dir, args.skus, 1, args.seed)
+    product_prices = load_product_prices(paths["prices"])
+    test_prices = load_test_prices(TEST_PRICING_CSV)
+
+    rng = random.Random(args.seed)
+    with open(paths["prices"], "r", encoding="utf-8") as f:
+        skus = [line.split(",", 1)[0] for line in f.read().splitlines()[1:]]
+    items = synthetic_items(rng, skus, args.items)
+    with open(TEST_PRICING_CSV, "r", encoding="utf-8") as f:
+        tests_required = rng.sample([line.split(",", 1)[0] for line in f.read().splitlines()[1:]], 3)
+
+    if args.tiers:
+        tiers = synthetic_tiers(rng, product_prices, args.tiers)
+        legacy_seconds, legacy = best_of(1, price_per_item_tiered, items, product_prices, test_prices,
+                                         tests_required, tiers)
+        batch_seconds, batch = best_of(args.repeat, lambda: price_items(items, product_prices, test_prices,
+                                                                        tests_required, tiers=tiers)[:2])
+    else:
+        legacy_seconds, legacy = best_of(1, price_per_item, items, product_prices, test_prices, tests_required)
+        batch_seconds, batch = best_of(args.repeat, lambda: price_items(items, product_prices, test_prices,
+                                                                        tests_required)[:2])
+
+    identical = legacy == batch
+    print(f"[Benchmark] {args.items} line items"
+          + (f", {args.tiers} slabs per SKU" if args.tiers else "")
+          + f": per-item loop {legacy_seconds:.3f}s, "
+          f"batch kernel {batch_seconds:.3f}s ({legacy_seconds / batch_seconds:.1f}x); identical: {identical}")
+
+    report = {
+        "suite": "pricing",
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "seed": args.seed,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "items": args.items,
+        "skus": args.skus,
+        "tiers": args.tiers,
+        "tests_required": tests_required,
+        "per_item_seconds": round(legacy_seconds, 4),
+        "batch_seconds": round(batch_seconds, 4),
+        "speedup": round(legacy_seconds / batch_seconds, 2) if batch_seconds else None,
+        "identical": identical,
+        "totals": batch[1],
+    }
+
+    output = args.output or os.path.join(
+        DEFAULT_RESULTS_DIR, f"pricing_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+    )
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"[Benchmark] Results written to {output}")
+    return report
+
+
+if __name__ == "__main__":
+    main()
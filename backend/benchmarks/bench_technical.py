@@ -0,0 +1,270 @@
+"""
+bench_technical.py
+
+Synthetic-data benchmark suite for the Technical Agent.
+
+For every scenario (catalog size x RFP size) and engine it reports:
+- throughput: item x SKU comparisons per second over the whole RFP
+- per-item latency (p50 / p99 / mean / max, milliseconds)
+- catalog load time (snapshot open + match structure build)
+- peak RSS of the process that ran the engine
+
+Engines:
+- calculate_spec_match   the per-pair scoring function on its own
+- brute_force            rank_products_for_rfp_item over the whole catalog
+- indexed / vectorized / bitmask / top_k   the process_rfp match modes
+
+Each engine runs in a fresh process, so peak RSS is not inflated by earlier
+runs. Brute-force style engines are timed on a sample of items that fits
+--brute-force-budget comparisons. Data comes from synthetic_data.py (seeded,
+offline) and is reused across runs.
+
+Usage (from the repository root):
+    python backend/benchmarks/bench_technical.py --preset smoke
+    python backend/benchmarks/bench_technical.py --skus 100000 --items 10 1000 --engines indexed vectorized
+
+Results are written as JSON (default: backend/benchmarks/results/technical_<timestamp>.json).
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+import tempfile
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from typing import List, Dict, Any
+
+try:
+    import resource
+except ImportError:  # not available on Windows
+    resource = None
+
+# Add backend to Python path dynamically
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.append(BASE_DIR)
+
+from benchmarks.synthetic_data import dataset_paths
+
+
+PRESETS = {
+    "smoke": {"skus": [10_000], "items": [10, 100]},
+    "standard": {"skus": [10_000, 100_000], "items": [10, 1_000]},
+    "full": {"skus": [10_000, 100_000, 1_000_000], "items": [10, 1_000, 10_000]},
+}
+
+PAIR_ENGINE = "calculate_spec_match"
+BRUTE_FORCE_ENGINE = "brute_force"
+MATCH_MODE_ENGINES = ["indexed", "vectorized", "bitmask", "top_k"]
+ENGINES = [PAIR_ENGINE, BRUTE_FORCE_ENGINE] + MATCH_MODE_ENGINES
+
+DEFAULT_BRUTE_FORCE_BUDGET = 20_000_000
+DEFAULT_MAX_TIMED_ITEMS = 200
+DEFAULT_RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results")
+
+
+# -------------------------
+# Measurement helpers
+# -------------------------
+
+def percentile(values: List[float], q: float) -> float:
+    """Nearest-rank percentile (q in 0..100) of a non-empty list."""
+    ordered = sorted(values)
+    rank = max(1, -(-len(ordered) * q // 100))  # ceil
+    return ordered[int(rank) - 1]
+
+
+def peak_rss_mb() -> float:
+    """Peak resident set size of this process in MiB (None when unsupported)."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in KiB on Linux, bytes on macOS
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def latency_summary(seconds: List[float]) -> Dict[str, float]:
+    if not seconds:
+        return {}
+    return {
+        "p50": round(percentile(seconds, 50) * 1000, 4),
+        "p99": round(percentile(seconds, 99) * 1000, 4),
+        "mean": round(sum(seconds) / len(seconds) * 1000, 4),
+        "max": round(max(seconds) * 1000, 4),
+    }
+
+
+# -------------------------
+# Engine runs (executed in a fresh process each)
+# -------------------------
+
+def _load_items(rfp_path: str) -> List[Dict[str, Any]]:
+    from agents.technical_agent.technical_agent import map_rfp_item_keys, normalize_rfp_specs, load_rfp_json
+    raw_items = load_rfp_json(rfp_path).get("scope_of_supply", [])
+    return [normalize_rfp_specs(map_rfp_item_keys(item)) for item in raw_items]
+
+
+def run_engine(engine: str, paths: Dict[str, str], options: Dict[str, Any]) -> Dict[str, Any]:
+    """Benchmark one engine on one dataset; returns a result record."""
+
+    from agents.technical_agent import technical_agent as ta
+
+    items = _load_items(paths["rfp"])
+
+    started = time.perf_counter()
+    catalog = ta.CATALOG_MANAGER.get(paths["catalog"])
+    if engine == "indexed":
+        catalog.spec_index()
+    elif engine == "vectorized":
+        catalog.vector_engine()
+    elif engine in ("bitmask", "top_k"):
+        catalog.bitmask_matcher()
+    load_seconds = time.perf_counter() - started
+
+    n_skus = len(catalog)
+    record = {
+        "engine": engine,
+        "n_skus": n_skus,
+        "n_items": len(items),
+        "catalog_load_s": round(load_seconds, 4),
+    }
+
+    if engine == PAIR_ENGINE:
+        # per-pair scoring of the first items against every SKU
+        products = catalog.products
+        n_timed = max(1, min(len(items), options["brute_force_budget"] // max(1, n_skus)))
+        latencies = []
+        for item in items[:n_timed]:
+            t0 = time.perf_counter()
+            for product in products:
+                ta.calculate_spec_match(item, product)
+            latencies.append(time.perf_counter() - t0)
+        batch_seconds = sum(latencies)
+
+    elif engine == BRUTE_FORCE_ENGINE:
+        n_timed = max(1, min(len(items), options["brute_force_budget"] // max(1, n_skus)))
+        latencies = []
+        for item in items[:n_timed]:
+            t0 = time.perf_counter()
+            ta.rank_products_for_rfp_item(item, catalog.products, limit=3)
+            latencies.append(time.perf_counter() - t0)
+        batch_seconds = sum(latencies)
+
+    else:
+        # whole-RFP batch (how process_rfp ranks), then per-item latency on a sample
+        t0 = time.perf_counter()
+        ta.rank_top_matches(items, catalog, engine, limit=3)
+        batch_seconds = time.perf_counter() - t0
+        n_timed = len(items)
+
+        latencies = []
+        for item in items[:options["max_timed_items"]]:
+            t0 = time.perf_counter()
+            ta.rank_top_matches([item], catalog, engine, limit=3)
+            latencies.append(time.perf_counter() - t0)
+
+    comparisons = n_timed * n_skus
+    record.update({
+        "items_timed": n_timed,
+        "comparisons": comparisons,
+        "batch_seconds": round(batch_seconds, 4),
+        "throughput_cmp_per_s": round(comparisons / batch_seconds) if batch_seconds > 0 else None,
+        "latency_ms": latency_summary(latencies),
+        "latency_samples": len(latencies),
+        "peak_rss_mb": peak_rss_mb(),
+    })
+    return record
+
+
+def run_isolated(engine: str, paths: Dict[str, str], options: Dict[str, Any]) -> Dict[str, Any]:
+    """run_engine in a fresh process (spawn), so peak RSS belongs to this run only."""
+    with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("spawn")) as pool:
+        return pool.submit(run_engine, engine, paths, options).result()
+
+
+# -------------------------
+# Suite
+# -------------------------
+
+def run_suite(skus: List[int], items: List[int], engines: List[str], seed: int, data_dir: str,
+              options: Dict[str, Any], isolated: bool = True) -> Dict[str, Any]:
+    results = []
+
+    for n_skus in skus:
+        for n_items in items:
+            paths = dataset_paths(data_dir, n_skus, n_items, seed)
+
+            # compile the catalog snapshot once, outside the timed runs
+            from agents.technical_agent.technical_agent import ensure_catalog_snapshot
+            ensure_catalog_snapshot(paths["catalog"])
+
+            for engine in engines:
+                print(f"[Benchmark] {n_skus} SKUs x {n_items} items: {engine} ...", flush=True)
+                try:
+                    record = run_isolated(engine, paths, options) if isolated else run_engine(engine, paths, options)
+                except Exception as e:
+                    record = {"engine": engine, "n_skus": n_skus, "n_items": n_items, "error": repr(e)}
+                record["scenario"] = f"{n_skus}x{n_items}"
+                results.append(record)
+                _print_record(record)
+
+    return {
+        "suite": "technical_agent",
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "seed": seed,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "options": options,
+        "results": results,
+    }
+
+
+def _print_record(record: Dict[str, Any]) -> None:
+    if "error" in record:
+        print(f"    error: {record['error']}")
+        return
+    latency = record["latency_ms"]
+    throughput = record["throughput_cmp_per_s"] or 0
+    print(f"    {throughput:>14,.0f} cmp/s | p50 {latency.get('p50', 0):9.3f} ms | "
+          f"p99 {latency.get('p99', 0):9.3f} ms | load {record['catalog_load_s']:.3f}s | "
+          f"peak RSS {record['peak_rss_mb']} MiB")
+
+
+def main(argv: List[str] = None) -> Dict[str, Any]:
+    parser = argparse.ArgumentParser(description="Technical Agent synthetic benchmark suite")
+    parser.add_argument("--preset", choices=sorted(PRESETS), default="smoke")
+    parser.add_argument("--skus", type=int, nargs="+", help="catalog sizes (overrides the preset)")
+    parser.add_argument("--items", type=int, nargs="+", help="RFP line-item counts (overrides the preset)")
+    parser.add_argument("--engines", nargs="+", choices=ENGINES, default=ENGINES)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--data-dir", default=os.path.join(tempfile.gettempdir(), "rfp_benchmark_data"))
+    parser.add_argument("--output", help="results JSON path")
+    parser.add_argument("--brute-force-budget", type=int, default=DEFAULT_BRUTE_FORCE_BUDGET,
+                        help="max comparisons timed for calculate_spec_match / brute_force")
+    parser.add_argument("--max-timed-items", type=int, default=DEFAULT_MAX_TIMED_ITEMS,
+                        help="items timed one by one for the per-item latency of match modes")
+    parser.add_argument("--in-process", action="store_true", help="run engines in this process (no isolation)")
+    args = parser.parse_args(argv)
+
+    preset = PRESETS[args.preset]
+    options = {"brute_force_budget": args.brute_force_budget, "max_timed_items": args.max_timed_items}
+
+    report = run_suite(args.skus or preset["skus"], args.items or preset["items"], args.engines,
+                       args.seed, args.data_dir, options, isolated=not args.in_process)
+
+    output = args.output or os.path.join(
+        DEFAULT_RESULTS_DIR, f"technical_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+    )
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"[Benchmark] Results written to {output}")
+    return report
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,171 @@
+"""
+synthetic_data.py
+
+Seeded generators of realistic cable catalogs and RFPs for benchmarks.
+
+Files are written in the same schemas as the real data:
+- product_specs.csv   sku, cores, size_sqmm, voltage_kv, insulation, conductor, standard
+- product_pricing.csv sku_id, unit_price
+- RFP JSON            rfp_id, issuer, title, due_date, scope_of_supply[], tests_required[]
+
+Catalogs enumerate the usual LT/HT cable ranges (cores x IEC sizes x voltage
+grade x insulation x conductor x standard); beyond the number of distinct
+combinations, SKUs are brand variants of existing specs, as in real OEM
+catalogs. RFP line items are drawn from the same ranges with realistic noise:
+sizes between catalog sizes, voltages written as "11 kV" / "11000 V", missing
+standards, cores given as "3C".
+
+Everything is generated offline from a seed, so the same arguments always
+produce byte-identical files.
+"""
+
+import os
+import csv
+import json
+import random
+from typing import List, Dict, Any
+
+
+CORES = ["1", "2", "3", "3.5", "4", "5", "7", "12"]
+SIZES_SQMM = ["1.5", "2.5", "4", "6", "10", "16", "25", "35", "50", "70", "95", "120",
+              "150", "185", "240", "300", "400"]
+VOLTAGES_KV = ["0.65", "1.1", "3.3", "6.6", "11", "22", "33"]
+INSULATIONS = ["PVC", "XLPE", "EPR"]
+CONDUCTORS = ["Copper", "Aluminium"]
+STANDARDS = ["IS 694", "IS 1554", "IS 7098", "IEC 60502"]
+BRANDS = ["POLY", "FINO", "HAVL", "KEIC", "RRKB", "GLOS", "UNIV", "APAR"]
+
+TESTS = [
+    "Conductor resistance test",
+    "Insulation resistance test",
+    "High voltage test",
+    "Partial discharge test",
+    "Flammability test",
+    "Tensile strength test",
+]
+
+SPEC_COLUMNS = ["sku", "cores", "size_sqmm", "voltage_kv", "insulation", "conductor", "standard"]
+
+
+def _spec_combination(index: int) -> List[str]:
+    """The index-th (cores, size, voltage, insulation, conductor, standard) combination."""
+    values = []
+    for choices in (CORES, SIZES_SQMM, VOLTAGES_KV, INSULATIONS, CONDUCTORS, STANDARDS):
+        index, position = divmod(index, len(choices))
+        values.append(choices[position])
+    return values
+
+
+N_COMBINATIONS = (len(CORES) * len(SIZES_SQMM) * len(VOLTAGES_KV) * len(INSULATIONS)
+                  * len(CONDUCTORS) * len(STANDARDS))
+
+
+def generate_catalog(path: str, n_skus: int, seed: int = 42) -> str:
+    """Write a product_specs.csv with n_skus SKUs; returns the path."""
+
+    rng = random.Random(seed)
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+
+    # visit every combination once (shuffled) before repeating specs as brand variants
+    order = list(range(N_COMBINATIONS))
+    rng.shuffle(order)
+
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(SPEC_COLUMNS)
+        for n in range(n_skus):
+            cores, size, voltage, insulation, conductor, standard = _spec_combination(order[n % N_COMBINATIONS])
+            brand = BRANDS[(n // N_COMBINATIONS + rng.randrange(len(BRANDS))) % len(BRANDS)]
+            sku = f"CABLE-{brand}-{insulation}-{cores}C-{size}-{standard.replace(' ', '')}-{n:07d}"
+            writer.writerow([sku, cores, size, voltage, insulation, conductor, standard])
+    return path
+
+
+def generate_prices(path: str, catalog_path: str, seed: int = 42) -> str:
+    """Write a product_pricing.csv with one unit price per SKU of catalog_path; returns the path."""
+
+    rng = random.Random(seed)
+    with open(catalog_path, "r", encoding="utf-8") as src, open(path, "w", newline="", encoding="utf-8") as dst:
+        writer = csv.writer(dst)
+        writer.writerow(["sku_id", "unit_price"])
+        for row in csv.DictReader(src):
+            base = float(row["size_sqmm"]) * float(row["cores"]) * 12
+            writer.writerow([row["sku"], round(base * rng.uniform(0.8, 1.3) + 40, 2)])
+    return path
+
+
+def _rfp_item(rng: random.Random, item_no: int) -> Dict[str, Any]:
+    cores = rng.choice(CORES)
+    size = rng.choice(SIZES_SQMM)
+    voltage = rng.choice(VOLTAGES_KV)
+    insulation = rng.choice(INSULATIONS)
+    conductor = rng.choice(CONDUCTORS)
+    standard = rng.choice(STANDARDS)
+
+    item = {
+        "item_no": str(item_no),
+        "description": (f"{'HT' if float(voltage) > 1.1 else 'LT'} cable {cores}C x {size} sqmm, {voltage}kV, "
+                        f"{insulation} insulated, {conductor.lower()} conductor"),
+        "cores": float(cores) if "." in cores else int(cores),
+        "size_sqmm": float(size) if "." in size else int(size),
+        "voltage_rating_kv": float(voltage) if "." in voltage else int(voltage),
+        "insulation": insulation,
+        "conductor": conductor,
+        "standard": standard,
+        "quantity": rng.choice([100, 250, 500, 750, 1000, 2000, 5000]),
+    }
+
+    # realistic noise
+    roll = rng.random()
+    if roll < 0.10:
+        item["size_sqmm"] = round(float(size) + rng.choice([-0.1, 0.1, 0.15, 0.3]), 2)
+    elif roll < 0.13:
+        item["voltage_rating_kv"] = f"{voltage} kV"
+    elif roll < 0.15:
+        item["voltage_rating_kv"] = f"{round(float(voltage) * 1000)} V"
+    elif roll < 0.20:
+        item.pop("standard")
+    elif roll < 0.25:
+        item["cores"] = f"{cores}C"
+    return item
+
+
+def generate_rfp(path: str, n_items: int, seed: int = 7, rfp_id: str = None) -> str:
+    """Write an RFP JSON with n_items line items; returns the path."""
+
+    rng = random.Random(seed)
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+
+    rfp = {
+        "rfp_id": rfp_id or f"RFP-BENCH-{n_items}-{seed}",
+        "issuer": "Synthetic Utilities Ltd",
+        "title": f"Supply of LT/HT power cables ({n_items} line items)",
+        "due_date": "2030-01-31",
+        "scope_of_supply": [_rfp_item(rng, i) for i in range(1, n_items + 1)],
+        "tests_required": rng.sample(TESTS, 3),
+    }
+
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(rfp, f, indent=2)
+    return path
+
+
+def dataset_paths(data_dir: str, n_skus: int, n_items: int, seed: int) -> Dict[str, str]:
+    """
+    Generate (or reuse) the catalog, price table and RFP of one benchmark
+    scenario under data_dir; returns {"catalog", "prices", "rfp"} paths.
+    """
+
+    catalog = os.path.join(data_dir, f"product_specs_{n_skus}_{seed}.csv")
+    prices = os.path.join(data_dir, f"product_pricing_{n_skus}_{seed}.csv")
+    rfp = os.path.join(data_dir, f"rfp_{n_items}_{seed}.json")
+
+    # written under a temporary name first, so an interrupted run never leaves
+    # a truncated file that later runs would reuse
+    if not os.path.exists(catalog):
+        os.replace(generate_catalog(catalog + ".part", n_skus, seed), catalog)
+    if not os.path.exists(prices):
+        os.replace(generate_prices(prices + ".part", catalog, seed), prices)
+    if not os.path.exists(rfp):
+        os.replace(generate_rfp(rfp + ".part", n_items, seed), rfp)
+    return {"catalog": catalog, "prices": prices, "rfp": rfp}
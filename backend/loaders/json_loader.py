@@ -14,6 +14,8 @@ import os
 import json
 import csv
 
+from loaders.normalization import normalize_record
+
 
 
 # -----------------------------------------------------------
@@ -80,11 +82,18 @@ def load_product_specs(csv_path: str) -> list:
         list[dict]: Product records
     """
 
+    return list(iter_product_specs(csv_path))
+
+
+def iter_product_specs(csv_path: str):
+    """
+    Streaming variant of load_product_specs(): yields one stripped row dict
+    at a time, so large catalogs can be converted row by row.
+    """
+
     if not os.path.exists(csv_path):
         raise FileNotFoundError(f"Product specs CSV not found: {csv_path}")
 
-    product_list = []
-
     with open(csv_path, "r", encoding="utf-8") as csvfile:
         reader = csv.DictReader(csvfile)
 
@@ -92,9 +101,7 @@ def load_product_specs(csv_path: str) -> list:
             # Convert all values to stripped lowercase versions
             normalized_row = {key: value.strip() for key, value in row.items()}
 
-            product_list.append(normalized_row)
-
-    return product_list
+            yield normalized_row
 
 
 
@@ -102,6 +109,10 @@ def load_product_specs(csv_path: str) -> list:
 # HELPER 3 — Normalize RFP Specification Values
 # -----------------------------------------------------------
 
+# List of spec fields read from the description, kept as-is
+_RFP_SKIP_KEYS = ("inferred_fields",)
+
+
 def normalize_rfp_specs(rfp_specs: dict) -> dict:
     """
     Normalizes RFP spec values by:
@@ -109,36 +120,11 @@ def normalize_rfp_specs(rfp_specs: dict) -> dict:
       - lowering case
       - removing spaces/dashes
       - applying field-specific cleanup rules
+    (rules in normalization.FIELD_RULES)
+    The inferred_fields list set by map_rfp_item_keys is kept as-is.
     """
 
-    normalized = {}
-
-    for key, value in rfp_specs.items():
-
-        # Safely convert ANY value to string first
-        if value is None:
-            v = ""
-        else:
-            v = str(value).lower().strip()
-
-        # remove spaces and dashes
-        v = v.replace(" ", "").replace("-", "")
-
-        # Field-specific cleanup
-        if key == "cores":
-            v = v.replace("core", "")        # convert "3core" → "3"
-        if key == "size_sqmm":
-            v = v.replace("sqmm", "")
-        if key == "voltage":
-            v = v.replace("kv", "") + "kv"   # ensure suffix "kv"
-        if key == "insulation":
-            v = v.replace("insulated", "")
-        if key == "standard":
-            v = v.replace("is", "is ")
-
-        normalized[key] = v
-
-    return normalized
+    return normalize_record(rfp_specs, skip=_RFP_SKIP_KEYS)
 
 
 
@@ -146,50 +132,17 @@ def normalize_rfp_specs(rfp_specs: dict) -> dict:
 # HELPER 4 — Normalize Product Specs (SKU Database)
 # -----------------------------------------------------------
 
+# Raw nested dict from canonical mapping, kept as-is
+_PRODUCT_SKIP_KEYS = ("_raw",)
+
+
 def normalize_product_specs(product_list: list) -> list:
     """
     Normalize product specs in CSV for consistent comparison.
     Skips non-string fields such as nested dicts (e.g., '_raw').
     """
 
-    normalized_products = []
-
-    for product in product_list:
-        normalized = {}
-
-        for key, value in product.items():
-
-            # Skip raw nested dict from canonical mapping
-            if key == "_raw":
-                normalized[key] = value
-                continue
-
-            # Safely convert any value to string
-            if value is None:
-                v = ""
-            else:
-                v = str(value).lower().strip()
-
-            # Remove spaces/dashes
-            v = v.replace(" ", "").replace("-", "")
-
-            # Field-specific cleanup
-            if key == "cores":
-                v = v.replace("core", "")
-            if key == "size_sqmm":
-                v = v.replace("sqmm", "")
-            if key == "voltage":
-                v = v.replace("kv", "") + "kv"
-            if key == "insulation":
-                v = v.replace("insulated", "")
-            if key == "standard":
-                v = v.replace("is", "is ")
-
-            normalized[key] = v
-
-        normalized_products.append(normalized)
-
-    return normalized_products
+    return [normalize_record(product, skip=_PRODUCT_SKIP_KEYS) for product in product_list]
 
 
 # -----------------------------------------------------------
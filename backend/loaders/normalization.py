@@ -0,0 +1,168 @@
+"""
+normalization.py
+
+Text normalization rules shared by every loader and matcher.
+
+All spec and price keys go through the same base rule:
+    lowercase -> strip -> drop spaces and dashes
+    'High Voltage Test' -> 'highvoltagetest', 'IS 1554' -> 'is1554'
+
+Spec fields then apply their own cleanup (FIELD_RULES), e.g. "3 core" -> "3",
+"1.1 kV" -> "1.1kv". The rules are:
+- compiled once into a tuple of replacement steps per field (_FIELD_STEPS).
+  Deletions use str.replace: on CPython, str.translate with a deletion
+  table is several times slower than replace for these short ASCII values
+  (see benchmarks/bench_normalization.py)
+- memoized in bounded LRU caches: catalogs and RFPs repeat the same few
+  hundred values ("XLPE", "Copper", "IS 1554", ...) over and over
+- interned, so equal normalized values share one string object (cheaper
+  dict lookups and less memory in large catalogs)
+
+Fields whose values are mostly unique per record (UNIQUE_FIELDS: SKU ids,
+descriptions) are neither memoized nor interned, so they cannot evict the
+hot keys or grow the intern table.
+"""
+
+import sys
+from functools import lru_cache
+from typing import Dict, Any, Iterable
+
+
+
+# -----------------------------------------------------------
+# Rules
+# -----------------------------------------------------------
+
+# Max number of memoized values per cache
+NORMALIZE_CACHE_SIZE = 65536
+
+# field -> (substring replacements applied in order, suffix appended),
+# applied after the base rule
+FIELD_RULES = {
+    "cores": ((("core", ""),), ""),               # "3core" -> "3"
+    "size_sqmm": ((("sqmm", ""),), ""),           # "2.5sqmm" -> "2.5"
+    "voltage": ((("kv", ""),), "kv"),             # "1.1" / "1.1kv" -> "1.1kv"
+    "insulation": ((("insulated", ""),), ""),     # "xlpeinsulated" -> "xlpe"
+    "standard": ((("is", "is "),), ""),           # "is1554" -> "is 1554"
+}
+
+# Fields with (mostly) one distinct value per record: never memoized
+UNIQUE_FIELDS = frozenset({"sku_id", "sku", "item_no", "description"})
+
+# Base rule after lower() + strip()
+_BASE_STEPS = ((" ", ""), ("-", ""))
+
+# field -> (all replacement steps, suffix); fields without rules use _BASE_STEPS
+_FIELD_STEPS = {
+    field: (_BASE_STEPS + replacements, suffix)
+    for field, (replacements, suffix) in FIELD_RULES.items()
+}
+_NO_RULE = (_BASE_STEPS, "")
+
+
+
+# -----------------------------------------------------------
+# Base rule (also the pricing key rule)
+# -----------------------------------------------------------
+
+def _text_key(text: str) -> str:
+    return sys.intern(text.lower().strip().replace(" ", "").replace("-", ""))
+
+
+_text_key_memo = lru_cache(maxsize=NORMALIZE_CACHE_SIZE)(_text_key)
+
+
+def normalize_text(value, memo: bool = True) -> str:
+    """
+    Lowercase, strip and drop spaces/dashes; None -> "".
+    memo=False skips the LRU cache (for bulk loads of unique keys).
+    """
+    if value is None:
+        return ""
+    if value.__class__ is not str:
+        value = str(value)
+    return _text_key_memo(value) if memo else _text_key(value)
+
+
+
+# -----------------------------------------------------------
+# Field rules
+# -----------------------------------------------------------
+
+def _field_value(field: str, text: str) -> str:
+    steps, suffix = _FIELD_STEPS.get(field, _NO_RULE)
+    value = text.lower().strip()
+    for old, new in steps:
+        value = value.replace(old, new)
+    return value + suffix if suffix else value
+
+
+@lru_cache(maxsize=NORMALIZE_CACHE_SIZE)
+def _field_value_memo(field: str, text: str) -> str:
+    return sys.intern(_field_value(field, text))
+
+
+def normalize_field(field: str, value) -> str:
+    """Normalized value of one spec field: base rule + FIELD_RULES[field] (None counts as "")."""
+    if value is None:
+        value = ""
+    elif value.__class__ is not str:
+        value = str(value)
+    if field in UNIQUE_FIELDS:
+        return _field_value(field, value)
+    return _field_value_memo(field, value)
+
+
+def normalize_record(record: Dict[str, Any], skip: Iterable[str] = ()) -> Dict[str, Any]:
+    """normalize_field() over every key of a record; keys in `skip` are copied as-is."""
+    normalized = {}
+    for key, value in record.items():
+        if key in skip:
+            normalized[key] = value
+            continue
+        if value is None:
+            value = ""
+        elif value.__class__ is not str:
+            value = str(value)
+        if key in UNIQUE_FIELDS:
+            normalized[key] = _field_value(key, value)
+        else:
+            normalized[key] = _field_value_memo(key, value)
+    return normalized
+
+
+def voltage_key(value) -> str:
+    """Voltage comparison key: lowercase, no spaces, 'kv' suffix ensured."""
+    text = value if value.__class__ is str else str(value)
+    return _voltage_key_memo(text)
+
+
+@lru_cache(maxsize=NORMALIZE_CACHE_SIZE)
+def _voltage_key_memo(text: str) -> str:
+    v = text.lower().replace(" ", "")
+    if v and "kv" not in v:
+        v = v + "kv"
+    return sys.intern(v)
+
+
+
+# -----------------------------------------------------------
+# Cache maintenance
+# -----------------------------------------------------------
+
+def normalization_cache_info() -> Dict[str, Dict[str, int]]:
+    """Hit/miss counters of the memo caches."""
+    caches = {"text": _text_key_memo, "field": _field_value_memo, "voltage": _voltage_key_memo}
+    return {name: cache.cache_info()._asdict() for name, cache in caches.items()}
+
+
+def clear_normalization_caches() -> None:
+    _text_key_memo.cache_clear()
+    _field_value_memo.cache_clear()
+    _voltage_key_memo.cache_clear()
+
+
+
+# -----------------------------------------------------------
+# END OF MODULE
+# -----------------------------------------------------------
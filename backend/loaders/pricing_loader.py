@@ -4,16 +4,26 @@ pricing_loader.py
 This module loads and processes:
 1. Product pricing table (product_pricing.csv)
 2. Test pricing table (test_pricing.csv)
+3. Volume price tiers (product_price_tiers.csv) and issuer discounts
+   (issuer_discounts.csv), see agents/pricing_agent/price_tiers.py
 
 The Pricing Agent uses these mappings to determine:
 - Unit price per SKU
 - Cost per test type
 
 Both CSVs are converted into Python dictionaries for fast lookup.
+The product price table can also be compiled into a binary snapshot, so
+later loads skip parsing and normalizing the CSV (open_product_prices), see
+snapshot.py.
 """
 
 import os
 import csv
+from bisect import bisect_left
+from collections.abc import Mapping
+
+from loaders.snapshot import FileFingerprint, open_snapshot, write_snapshot, snapshot_path_for, source_fingerprint
+from loaders.normalization import normalize_text
 
 
 
@@ -21,7 +31,7 @@ import csv
 # Utility: Normalize text keys (so comparisons are safe)
 # -----------------------------------------------------------
 
-def normalize_key(value: str) -> str:
+def normalize_key(value: str, memo: bool = True) -> str:
     """
     Converts any text key into a uniform format:
     - lowercase
@@ -31,17 +41,11 @@ def normalize_key(value: str) -> str:
     Example:
         'High Voltage Test' → 'highvoltagetest'
         'CABLE-PVC-3C-2.5-IS694' → 'cablepvc3c2.5is694'
-    """
-    if value is None:
-        return ""
 
-    return (
-        str(value)
-        .lower()
-        .strip()
-        .replace(" ", "")
-        .replace("-", "")
-    )
+    Hot keys are memoized (see normalization.py); pass memo=False for bulk
+    loads of unique keys such as SKU ids.
+    """
+    return normalize_text(value, memo)
 
 
 
@@ -79,7 +83,7 @@ def load_product_prices(csv_path: str) -> dict:
             if not raw_sku:
                 continue  # skip rows with missing SKU
 
-            key = normalize_key(raw_sku)
+            key = normalize_key(raw_sku, memo=False)
 
             try:
                 price_map[key] = float(raw_price)
@@ -90,6 +94,107 @@ def load_product_prices(csv_path: str) -> dict:
 
 
 
+# -----------------------------------------------------------
+# 1️⃣b Product Pricing snapshot
+# -----------------------------------------------------------
+
+PRICE_SNAPSHOT_KIND = "product_prices"
+PRICE_SNAPSHOT_SCHEMA = 1
+
+
+class ProductPriceTable(Mapping):
+    """
+    Read-only {normalized sku key: unit price} mapping over a price snapshot.
+
+    Keys are stored sorted, so lookups are a binary search over the mapped
+    string table; nothing is parsed or copied when the table is opened.
+    """
+
+    def __init__(self, snapshot):
+        self.snapshot = snapshot
+        self._keys = snapshot.column("keys")
+        self._prices = snapshot.column("unit_prices")
+
+    def _find(self, key) -> int:
+        if not isinstance(key, str):
+            return -1
+        index = bisect_left(self._keys, key)
+        if index < len(self._keys) and self._keys[index] == key:
+            return index
+        return -1
+
+    def __getitem__(self, key) -> float:
+        index = self._find(key)
+        if index < 0:
+            raise KeyError(key)
+        return self._prices[index]
+
+    def __contains__(self, key) -> bool:
+        return self._find(key) >= 0
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def __iter__(self):
+        return iter(self._keys)
+
+    def to_dict(self) -> dict:
+        """The whole table as a plain dict, decoded in one pass."""
+        return dict(zip(self._keys.to_list(), self._prices.tolist()))
+
+
+def compile_product_prices(csv_path: str, snapshot_path: str = None,
+                           fingerprint: FileFingerprint = None) -> str:
+    """
+    Compile product_pricing.csv into a price snapshot (sorted keys + float64
+    prices). fingerprint: the CSV's, when the caller took it already.
+    Returns the snapshot path.
+    """
+
+    snapshot_path = snapshot_path or snapshot_path_for(csv_path)
+    # fingerprint first: an edit during the parse leaves the snapshot stale, not wrong
+    sources = [source_fingerprint(csv_path, fingerprint)]
+    price_map = load_product_prices(csv_path)
+    keys = sorted(price_map)
+    write_snapshot(
+        snapshot_path, PRICE_SNAPSHOT_KIND, PRICE_SNAPSHOT_SCHEMA, sources,
+        {"keys": ("str", keys), "unit_prices": ("f64", [price_map[key] for key in keys])},
+    )
+    return snapshot_path
+
+
+def open_product_prices(csv_path: str, fingerprint: FileFingerprint = None):
+    """
+    Product prices for csv_path from its snapshot, (re)compiled when missing
+    or older than the CSV. Behaves like the dict of load_product_prices();
+    falls back to that dict when the snapshot cannot be written.
+
+    fingerprint: the CSV's, when the caller took it already; the snapshot is
+    then checked and compiled against it instead of hashing the CSV again.
+    """
+
+    if not os.path.exists(csv_path):
+        raise FileNotFoundError(f"Product pricing file missing: {csv_path}")
+
+    snapshot_path = snapshot_path_for(csv_path)
+    fingerprints = [fingerprint] if fingerprint is not None else None
+    snapshot = open_snapshot(snapshot_path, PRICE_SNAPSHOT_KIND, PRICE_SNAPSHOT_SCHEMA, [csv_path], fingerprints)
+    if snapshot is None:
+        try:
+            compile_product_prices(csv_path, snapshot_path, fingerprint)
+        except OSError as e:
+            print(f"[Pricing] Could not write snapshot {snapshot_path}: {e}")
+            return load_product_prices(csv_path)
+        snapshot = open_snapshot(snapshot_path, PRICE_SNAPSHOT_KIND, PRICE_SNAPSHOT_SCHEMA, [csv_path],
+                                 fingerprints)
+        if snapshot is None:
+            # CSV changed while compiling
+            return load_product_prices(csv_path)
+
+    return ProductPriceTable(snapshot)
+
+
+
 # -----------------------------------------------------------
 # 2️⃣ Load Test Pricing CSV
 # -----------------------------------------------------------
@@ -136,6 +241,113 @@ def load_test_prices(csv_path: str) -> dict:
 
 
 
+# -----------------------------------------------------------
+# 3️⃣ Load Volume Price Tiers CSV
+# -----------------------------------------------------------
+
+def load_price_tiers(csv_path: str) -> dict:
+    """
+    Loads product_price_tiers.csv (quantity slabs) into sorted breakpoints:
+
+    CSV format:
+        sku_id, min_quantity, unit_price
+
+    Each row is the unit price from min_quantity upward; below the first
+    slab of a SKU its flat unit_price (product_pricing.csv) applies.
+
+    Returns:
+        {
+          "cablepvc3c2.5is694": [(1000, 172.0), (5000, 165.0)],
+          ...
+        }
+    """
+
+    if not os.path.exists(csv_path):
+        raise FileNotFoundError(f"Price tiers file missing: {csv_path}")
+
+    tier_map = {}
+
+    with open(csv_path, "r", encoding="utf-8") as f:
+        reader = csv.DictReader(f)
+
+        for row in reader:
+            raw_sku = row.get("sku_id")
+            raw_quantity = row.get("min_quantity")
+            raw_price = row.get("unit_price")
+
+            if not raw_sku:
+                continue
+
+            key = normalize_key(raw_sku, memo=False)
+
+            try:
+                min_quantity = int(raw_quantity)
+                price = float(raw_price)
+            except Exception:
+                raise ValueError(f"Invalid price tier for SKU '{raw_sku}' in CSV.")
+            if min_quantity < 0:
+                raise ValueError(f"Negative min_quantity for SKU '{raw_sku}' in CSV.")
+
+            tier_map.setdefault(key, []).append((min_quantity, price))
+
+    for key, tiers in tier_map.items():
+        tiers.sort()
+        for (quantity, _), (next_quantity, _) in zip(tiers, tiers[1:]):
+            if quantity == next_quantity:
+                raise ValueError(f"Duplicate min_quantity {quantity} for SKU '{key}' in CSV.")
+
+    return tier_map
+
+
+
+# -----------------------------------------------------------
+# 4️⃣ Load Issuer Discounts CSV
+# -----------------------------------------------------------
+
+def load_issuer_discounts(csv_path: str) -> dict:
+    """
+    Loads issuer_discounts.csv (discount on material prices per RFP issuer):
+
+    CSV format:
+        issuer, discount_percent
+
+    Returns:
+        {
+          "powergridcorporationofindia": 5.0,
+          ...
+        }
+    """
+
+    if not os.path.exists(csv_path):
+        raise FileNotFoundError(f"Issuer discounts file missing: {csv_path}")
+
+    discount_map = {}
+
+    with open(csv_path, "r", encoding="utf-8") as f:
+        reader = csv.DictReader(f)
+
+        for row in reader:
+            raw_issuer = row.get("issuer")
+            raw_discount = row.get("discount_percent")
+
+            if not raw_issuer:
+                continue
+
+            key = normalize_key(raw_issuer)
+
+            try:
+                discount = float(raw_discount)
+            except Exception:
+                raise ValueError(f"Invalid discount for issuer '{raw_issuer}' in CSV.")
+            if not 0 <= discount <= 100:
+                raise ValueError(f"Discount for issuer '{raw_issuer}' must be between 0 and 100.")
+
+            discount_map[key] = discount
+
+    return discount_map
+
+
+
 # -----------------------------------------------------------
 # END OF MODULE
 # -----------------------------------------------------------
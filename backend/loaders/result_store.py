@@ -0,0 +1,103 @@
+"""
+result_store.py
+
+Store of per-RFP agent results as JSON.
+
+The Technical Agent keeps its compact results for on-demand comparison
+tables and the Pricing Agent its pricing outputs for what-if scenarios; both
+need the same thing: an rfp_id -> JSON result map that survives a restart.
+JsonResultStore saves each result as <rfp_id>.json under the store
+directory (the id percent-encoded, so tender numbers like
+"PGCIL/2025/CAB/001" stay inside it; the original id is kept in the JSON)
+and keeps the most recently used ones in memory (LRU, at most
+max_results); a result not in memory is reloaded from disk, so memory does
+not grow with the number of RFPs processed.
+"""
+
+import os
+import json
+import hashlib
+import threading
+from urllib.parse import quote
+from collections import OrderedDict
+from typing import Dict, Any, Optional
+
+
+DEFAULT_MAX_RESULTS = 128
+
+
+# Longest encoded rfp id used as a file name as it is; longer ones are hashed
+MAX_FILE_NAME_CHARS = 200
+
+
+class JsonResultStore:
+    """rfp_id -> result dict (the "rfp_id" field of the result)."""
+
+    def __init__(self, directory: str, max_results: int = DEFAULT_MAX_RESULTS):
+        self.directory = directory
+        self.max_results = max_results
+
+        self._lock = threading.Lock()
+        self._results: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+
+    def _remember(self, rfp_id: str, output: Dict[str, Any]) -> None:
+        # caller holds the lock
+        self._results[rfp_id] = output
+        self._results.move_to_end(rfp_id)
+        while len(self._results) > self.max_results:
+            self._results.popitem(last=False)
+
+    def _path(self, rfp_id: str) -> str:
+        if rfp_id in ("", ".", ".."):
+            raise ValueError(f"Invalid RFP id: {rfp_id!r}")
+        # '/', spaces, ... percent-encoded: every id gets its own file in the directory
+        name = quote(rfp_id, safe="")
+        if len(name) > MAX_FILE_NAME_CHARS:
+            name = hashlib.sha256(rfp_id.encode("utf-8")).hexdigest()
+        return os.path.join(self.directory, f"{name}.json")
+
+    def put(self, output: Dict[str, Any]) -> str:
+        """Store (and save) a result; returns its rfp_id."""
+
+        rfp_id = str(output.get("rfp_id", "UNKNOWN"))
+        path = self._path(rfp_id)
+
+        os.makedirs(self.directory, exist_ok=True)
+        with open(path, "w") as f:
+            json.dump(output, f, separators=(",", ":"))
+
+        with self._lock:
+            self._remember(rfp_id, output)
+        return rfp_id
+
+    def get(self, rfp_id: str) -> Optional[Dict[str, Any]]:
+        """Result of an RFP (from memory, else from disk), or None."""
+
+        with self._lock:
+            output = self._results.get(rfp_id)
+            if output is not None:
+                self._results.move_to_end(rfp_id)
+                return output
+
+        path = self._path(rfp_id)
+        if not os.path.exists(path):
+            return None
+        with open(path, "r") as f:
+            output = json.load(f)
+
+        with self._lock:
+            current = self._results.get(rfp_id)
+            if current is not None:
+                # put() or another reader got there first
+                return current
+            self._remember(rfp_id, output)
+            return output
+
+    def is_current(self, rfp_id: str, output: Dict[str, Any]) -> bool:
+        """True while output is the stored result of rfp_id."""
+        with self._lock:
+            return self._results.get(rfp_id) is output
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"results": len(self._results)}
@@ -0,0 +1,315 @@
+"""
+snapshot.py
+
+Versioned binary snapshots of CSV-derived tables, opened with mmap.
+
+Parsing a large CSV with csv.DictReader dominates startup and reload time.
+A snapshot stores the already-parsed table in a binary file next to the CSV:
+
+    magic (8 bytes) | header length (uint64) | JSON header | padding | columns
+
+Column types:
+- "u32": fixed-width unsigned 32-bit integers (codes, positions)
+- "f64": fixed-width doubles (prices)
+- "str": a string table = uint64 end offsets + one UTF-8 blob
+
+Opening a snapshot maps the file and exposes the columns as memoryviews /
+lazy StringTables over the mapping, so it takes milliseconds regardless of
+the table size, and every process that opens the same snapshot shares its
+pages through the OS page cache.
+
+The CSV stays the source of truth: the header records the size, mtime and
+sha256 of every source file, and open_snapshot() returns None when any of
+them changed (or the snapshot kind / schema version differs), so callers
+recompile it. FileFingerprint is the same identity of a file for the
+in-memory caches that reload a table when its CSV changes.
+"""
+
+import os
+import sys
+import json
+import mmap
+import struct
+import hashlib
+from array import array
+from typing import List, Dict, Any, Optional, Tuple
+
+
+
+SNAPSHOT_MAGIC = b"RFPSNAP\x00"
+SNAPSHOT_FORMAT_VERSION = 1
+
+_ALIGN = 8
+_HASH_CHUNK_BYTES = 1 << 20
+_TYPECODES = {"u32": "I", "f64": "d"}
+
+
+
+# -----------------------------------------------------------
+# Source fingerprints
+# -----------------------------------------------------------
+
+def file_content_hash(path: str) -> str:
+    """Return the sha256 hex digest of a file's content."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(_HASH_CHUNK_BYTES), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class FileFingerprint:
+    """mtime/size/content-hash triple identifying one version of a file."""
+
+    __slots__ = ("mtime_ns", "size", "content_hash")
+
+    def __init__(self, mtime_ns: int, size: int, content_hash: str):
+        self.mtime_ns = mtime_ns
+        self.size = size
+        self.content_hash = content_hash
+
+    @classmethod
+    def of(cls, path: str) -> "FileFingerprint":
+        stat = os.stat(path)
+        return cls(stat.st_mtime_ns, stat.st_size, file_content_hash(path))
+
+    def same_stat(self, stat: os.stat_result) -> bool:
+        return self.mtime_ns == stat.st_mtime_ns and self.size == stat.st_size
+
+
+def source_fingerprint(path: str, fingerprint: Optional[FileFingerprint] = None) -> Dict[str, Any]:
+    """{path, size, mtime_ns, sha256} of one source file (from fingerprint when the caller has one)."""
+    if fingerprint is None:
+        fingerprint = FileFingerprint.of(path)
+    return {
+        "path": os.path.abspath(path),
+        "size": fingerprint.size,
+        "mtime_ns": fingerprint.mtime_ns,
+        "sha256": fingerprint.content_hash,
+    }
+
+
+def _source_unchanged(recorded: Dict[str, Any], path: str,
+                      fingerprint: Optional[FileFingerprint] = None) -> bool:
+    if recorded.get("path") != os.path.abspath(path) or not os.path.exists(path):
+        return False
+    if fingerprint is not None:
+        # the caller hashed the file already
+        return fingerprint.content_hash == recorded.get("sha256")
+    stat = os.stat(path)
+    if stat.st_size == recorded.get("size") and stat.st_mtime_ns == recorded.get("mtime_ns"):
+        return True
+    # touched but maybe not modified
+    return file_content_hash(path) == recorded.get("sha256")
+
+
+
+# -----------------------------------------------------------
+# Column views
+# -----------------------------------------------------------
+
+class StringTable:
+    """Read-only sequence of strings stored as end offsets + UTF-8 blob."""
+
+    __slots__ = ("_ends", "_blob")
+
+    def __init__(self, ends: memoryview, blob: memoryview):
+        self._ends = ends
+        self._blob = blob
+
+    def __len__(self) -> int:
+        return len(self._ends)
+
+    @property
+    def nbytes(self) -> int:
+        """Mapped bytes of the offsets and the blob."""
+        return self._ends.nbytes + self._blob.nbytes
+
+    def __getitem__(self, index: int) -> str:
+        if index < 0:
+            index += len(self._ends)
+        if not 0 <= index < len(self._ends):
+            raise IndexError("string table index out of range")
+        start = self._ends[index - 1] if index else 0
+        return str(self._blob[start:self._ends[index]], "utf-8")
+
+    def __iter__(self):
+        start = 0
+        blob = self._blob
+        for end in self._ends:
+            yield str(blob[start:end], "utf-8")
+            start = end
+
+    def to_list(self) -> List[str]:
+        """All strings, decoded at once (much faster than iterating for large tables)."""
+        text = str(self._blob, "utf-8")
+        if len(text) != len(self._blob):
+            # multi-byte characters: byte offsets are not character offsets
+            return list(self)
+        ends = self._ends.tolist()
+        return [text[start:end] for start, end in zip([0] + ends, ends)]
+
+
+class Snapshot:
+    """
+    One opened snapshot file.
+
+    Attributes:
+        path:  snapshot file path
+        kind:  table kind ("product_specs", "product_prices", ...)
+        meta:  free-form JSON metadata written with the snapshot
+    """
+
+    def __init__(self, path: str, header: Dict[str, Any], mapping: mmap.mmap, data_start: int):
+        self.path = path
+        self.kind = header["kind"]
+        self.meta = header.get("meta", {})
+        self.sources = header.get("sources", [])
+        self._columns = header["columns"]
+        self._mapping = mapping
+        self._data = memoryview(mapping)[data_start:]
+
+    def column_names(self) -> List[str]:
+        return list(self._columns)
+
+    def _section(self, offset: int, length: int) -> memoryview:
+        return self._data[offset:offset + length]
+
+    def column(self, name: str):
+        """memoryview of a numeric column, or a StringTable for a "str" column."""
+        spec = self._columns[name]
+        if spec["type"] == "str":
+            ends = self._section(spec["offset"], spec["count"] * 8).cast("Q")
+            blob = self._section(spec["blob_offset"], spec["blob_length"])
+            return StringTable(ends, blob)
+        itemsize = array(_TYPECODES[spec["type"]]).itemsize
+        return self._section(spec["offset"], spec["count"] * itemsize).cast(_TYPECODES[spec["type"]])
+
+
+
+# -----------------------------------------------------------
+# Write / open
+# -----------------------------------------------------------
+
+def _pad(f) -> None:
+    remainder = f.tell() % _ALIGN
+    if remainder:
+        f.write(b"\x00" * (_ALIGN - remainder))
+
+
+def write_snapshot(path: str, kind: str, schema_version: int, sources: List[Dict[str, Any]],
+                   columns: Dict[str, Tuple[str, Any]], meta: Optional[Dict[str, Any]] = None) -> None:
+    """
+    Write a snapshot file atomically (temp file + os.replace).
+
+    sources: source_fingerprint() of every source file, taken by the caller
+    BEFORE it read the data, so a source modified while compiling makes the
+    snapshot stale rather than wrong.
+    columns: {name: (type, values)} with type "u32", "f64" or "str".
+    """
+
+    # lay out the data sections (offsets relative to the start of the data)
+    sections = []
+    layout = {}
+    offset = 0
+
+    def add(data: bytes) -> int:
+        nonlocal offset
+        start = offset
+        sections.append((start, data))
+        offset += len(data)
+        offset += -offset % _ALIGN
+        return start
+
+    for name, (column_type, values) in columns.items():
+        if column_type == "str":
+            encoded = [value.encode("utf-8") for value in values]
+            ends = array("Q")
+            total = 0
+            for item in encoded:
+                total += len(item)
+                ends.append(total)
+            layout[name] = {
+                "type": "str",
+                "count": len(encoded),
+                "offset": add(ends.tobytes()),
+                "blob_offset": add(b"".join(encoded)),
+                "blob_length": total,
+            }
+        elif column_type in _TYPECODES:
+            data = values if isinstance(values, array) else array(_TYPECODES[column_type], values)
+            layout[name] = {"type": column_type, "count": len(data), "offset": add(data.tobytes())}
+        else:
+            raise ValueError(f"Unknown snapshot column type: {column_type}")
+
+    header = json.dumps({
+        "format": SNAPSHOT_FORMAT_VERSION,
+        "kind": kind,
+        "schema": schema_version,
+        "byteorder": sys.byteorder,
+        "sources": sources,
+        "meta": meta or {},
+        "columns": layout,
+    }).encode("utf-8")
+
+    tmp_path = f"{path}.tmp{os.getpid()}"
+    with open(tmp_path, "wb") as f:
+        f.write(SNAPSHOT_MAGIC)
+        f.write(struct.pack("<Q", len(header)))
+        f.write(header)
+        _pad(f)
+        data_start = f.tell()
+        for start, data in sections:
+            f.seek(data_start + start)
+            f.write(data)
+        _pad(f)
+    os.replace(tmp_path, path)
+
+
+def open_snapshot(path: str, kind: str, schema_version: int, source_paths: List[str],
+                  fingerprints: Optional[List[FileFingerprint]] = None) -> Optional[Snapshot]:
+    """
+    Map a snapshot file. Returns None when it is missing, unreadable, of
+    another kind / schema / format, or stale with respect to source_paths
+    (compared with their fingerprints when given, instead of re-hashing).
+    """
+
+    if not os.path.exists(path):
+        return None
+
+    with open(path, "rb") as f:
+        if f.read(len(SNAPSHOT_MAGIC)) != SNAPSHOT_MAGIC:
+            return None
+        try:
+            (header_length,) = struct.unpack("<Q", f.read(8))
+            header = json.loads(f.read(header_length).decode("utf-8"))
+        except (struct.error, ValueError):
+            return None
+
+        if (header.get("format") != SNAPSHOT_FORMAT_VERSION or header.get("kind") != kind
+                or header.get("schema") != schema_version or header.get("byteorder") != sys.byteorder):
+            return None
+
+        recorded = header.get("sources", [])
+        if len(recorded) != len(source_paths):
+            return None
+        fingerprints = fingerprints or [None] * len(source_paths)
+        if not all(_source_unchanged(r, p, f) for r, p, f in zip(recorded, source_paths, fingerprints)):
+            return None
+
+        data_start = len(SNAPSHOT_MAGIC) + 8 + header_length
+        data_start += -data_start % _ALIGN
+        mapping = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    return Snapshot(path, header, mapping, data_start)
+
+
+def snapshot_path_for(csv_path: str) -> str:
+    """Default snapshot location: next to the CSV, e.g. product_specs.csv.snap."""
+    return csv_path + ".snap"
+
+
+
+# -----------------------------------------------------------
+# END OF MODULE
+# -----------------------------------------------------------
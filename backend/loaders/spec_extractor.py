@@ -0,0 +1,165 @@
+"""
+spec_extractor.py
+
+Extraction of cable specs from free-text RFP line-item descriptions.
+
+Many RFPs only describe an item in prose:
+    "LT cable 3C x 2.5 sqmm, 1.1kV, PVC insulated, copper conductor"
+The Technical Agent fills the spec fields such an item leaves empty from its
+description (cores, size_sqmm, voltage, insulation, conductor), and reports
+which fields were inferred.
+
+Recognized forms (case-insensitive):
+    cores       "3C x 2.5", "3C 2.5 sqmm", "3.5 core", "4-core", "three core",
+                "3 x 2.5 sqmm", "1Cx630" (a bare "<n>C" is read as cores only
+                before "x" or a size, never after "temp": "conductor temp 70C")
+    size_sqmm   "2.5 sqmm", "2.5 sq.mm", "2.5 sq mm", "2.5mm2", "2.5 mm²"
+    voltage     "1.1kV", "11 kV", "1100 V", "6.35/11 kV" (the line voltage, 11)
+    insulation  INSULATION_TERMS; "<term> insulated" wins over e.g. a PVC sheath
+    conductor   CONDUCTOR_TERMS;  "<term> conductor" wins over other mentions
+
+All patterns are compiled once, at import. Extracted values are returned as
+written units ("1.1kv", "2.5"), so map_rfp_item_keys canonicalizes them
+exactly like structured fields (loaders/units.py).
+"""
+
+import re
+from typing import List, Dict, Iterable
+
+
+
+# -----------------------------------------------------------
+# Vocabulary
+# -----------------------------------------------------------
+
+# Fields filled from descriptions, in output order
+EXTRACTED_FIELDS = ("cores", "size_sqmm", "voltage", "insulation", "conductor")
+
+# term (lowercase) -> value written to the spec field
+INSULATION_TERMS: Dict[str, str] = {
+    "xlpe": "XLPE",
+    "pvc": "PVC",
+    "epr": "EPR",
+    "lszh": "LSZH",
+    "rubber": "Rubber",
+}
+CONDUCTOR_TERMS: Dict[str, str] = {
+    "copper": "Copper",
+    "cu": "Copper",
+    "aluminium": "Aluminium",
+    "aluminum": "Aluminium",
+    "al": "Aluminium",
+}
+CORE_WORDS: Dict[str, str] = {
+    "single": "1", "one": "1", "twin": "2", "two": "2",
+    "three": "3", "four": "4", "five": "5",
+}
+
+
+
+# -----------------------------------------------------------
+# Patterns (compiled once)
+# -----------------------------------------------------------
+
+_NUMBER = r"(\d+(?:\.\d+)?)"
+_SIZE_UNIT = r"(?:sq\.?\s*mm|mm2|mm²|mm\^2)"
+
+# "3 core(s)", "3-core", "3C x 2.5", "1Cx630", "3C 2.5 sqmm"; a bare "70C" is
+# usually a temperature, so "C" alone needs an "x" or a size after it
+_CORES = re.compile(
+    r"(?<![\d.])" + _NUMBER + r"\s*-?\s*(?:cores?\b|c(?=\s*[x×*]|\s*,?\s*\d+(?:\.\d+)?\s*" + _SIZE_UNIT + r"))"
+)
+# "temp 70", "temperature: 90", "temp. rating 70": numbers that are not cores
+_TEMPERATURE_BEFORE = re.compile(r"temp(?:erature)?\.?\s*(?:rating\s*)?(?:of\s*|:\s*)?$")
+# "three core", "single-core"
+_CORE_WORD = re.compile(r"\b(" + "|".join(CORE_WORDS) + r")\s*-?\s*cores?\b")
+# "3 x 2.5 sqmm" / "3x2.5mm2": cores x size
+_CORES_X_SIZE = re.compile(r"(?<![\d.])" + _NUMBER + r"\s*[x×*]\s*" + _NUMBER + r"\s*" + _SIZE_UNIT)
+# "2.5 sqmm"
+_SIZE = re.compile(r"(?<![\d.])" + _NUMBER + r"\s*" + _SIZE_UNIT)
+# "1.1kV", "1100 V", "6.35/11 kV"
+_VOLTAGE = re.compile(r"(?<![\d.])(?:" + _NUMBER + r"\s*/\s*)?" + _NUMBER + r"\s*(kv|kilovolts?|volts?|v)\b")
+
+_INSULATION_ANY = re.compile(r"\b(" + "|".join(INSULATION_TERMS) + r")\b")
+_INSULATION_STATED = re.compile(r"\b(" + "|".join(INSULATION_TERMS) + r")\s*-?\s*insulat")
+_CONDUCTOR_ANY = re.compile(r"\b(" + "|".join(CONDUCTOR_TERMS) + r")\b")
+_CONDUCTOR_STATED = re.compile(r"\b(" + "|".join(CONDUCTOR_TERMS) + r")\s*-?\s*conductors?\b")
+
+
+
+# -----------------------------------------------------------
+# Extraction
+# -----------------------------------------------------------
+
+def _term(stated: "re.Pattern", anywhere: "re.Pattern", terms: Dict[str, str], text: str):
+    match = stated.search(text) or anywhere.search(text)
+    return terms[match.group(1)] if match else None
+
+
+def extract_specs(description) -> Dict[str, str]:
+    """
+    Spec fields found in one description: {field: value} for the
+    EXTRACTED_FIELDS that could be read (fields not found are left out).
+    """
+
+    if not description:
+        return {}
+    text = str(description).lower()
+    specs = {}
+
+    match = next((match for match in _CORES.finditer(text)
+                  if not _TEMPERATURE_BEFORE.search(text, max(0, match.start() - 24), match.start())), None)
+    if match:
+        specs["cores"] = match.group(1)
+    else:
+        match = _CORE_WORD.search(text)
+        if match:
+            specs["cores"] = CORE_WORDS[match.group(1)]
+
+    match = _CORES_X_SIZE.search(text)
+    if match:
+        specs.setdefault("cores", match.group(1))
+        specs["size_sqmm"] = match.group(2)
+    else:
+        match = _SIZE.search(text)
+        if match:
+            specs["size_sqmm"] = match.group(1)
+
+    match = _VOLTAGE.search(text)
+    if match:
+        unit = match.group(3)
+        specs["voltage"] = match.group(2) + ("kv" if unit.startswith("k") else "v")
+
+    insulation = _term(_INSULATION_STATED, _INSULATION_ANY, INSULATION_TERMS, text)
+    if insulation:
+        specs["insulation"] = insulation
+
+    conductor = _term(_CONDUCTOR_STATED, _CONDUCTOR_ANY, CONDUCTOR_TERMS, text)
+    if conductor:
+        specs["conductor"] = conductor
+
+    return specs
+
+
+def extract_specs_batch(descriptions: Iterable) -> List[Dict[str, str]]:
+    """
+    extract_specs over many descriptions; each distinct description is parsed
+    once (RFPs repeat the same wording across line items). The returned dicts
+    are shared between equal descriptions and must not be modified.
+    """
+
+    seen: Dict[str, Dict[str, str]] = {}
+    results = []
+    for description in descriptions:
+        key = "" if description is None else str(description)
+        specs = seen.get(key)
+        if specs is None:
+            specs = seen[key] = extract_specs(key)
+        results.append(specs)
+    return results
+
+
+
+# -----------------------------------------------------------
+# END OF MODULE
+# -----------------------------------------------------------
@@ -0,0 +1,141 @@
+"""
+units.py
+
+Unit-aware parsing of the numeric cable specs: voltage, conductor size and
+number of cores.
+
+RFPs and OEM catalogs write the same value in many ways:
+    voltage   "11kV", "11 KV", "11000V", "11000 volts"      -> 11.0 kV
+    size      2.5, "2.5 sqmm", "2.5 sq.mm", "2.5mm2"         -> 2.5 sqmm
+    cores     3, "3C", "3 core", "3 Cores"                   -> 3.0
+
+The Technical Agent parses these once, when RFP items and catalog rows are
+mapped to canonical keys, and stores the canonical number string ("11",
+"2.5", "3"); voltages are always in kV. A bare voltage number carries no
+unit, so it is only read as a voltage in the unit of the column it sits in
+(bare_unit, "kv" for the voltage / voltage_kv columns); other bare numbers
+are not guessed at. Values that cannot be parsed are kept as they are, so
+the string comparison rules still apply to them.
+"""
+
+import re
+import math
+from typing import Optional, Dict
+
+
+
+# -----------------------------------------------------------
+# Units
+# -----------------------------------------------------------
+
+# unit token (lowercase, spaces and dots removed) -> factor to the canonical unit
+VOLTAGE_UNITS_KV: Dict[str, float] = {
+    "kv": 1.0, "kilovolt": 1.0, "kilovolts": 1.0,
+    "v": 0.001, "volt": 0.001, "volts": 0.001,
+}
+SIZE_UNITS_SQMM: Dict[str, float] = {
+    "sqmm": 1.0, "mm2": 1.0, "mm²": 1.0, "sqmillimeter": 1.0, "sqmillimetre": 1.0,
+}
+CORE_UNITS: Dict[str, float] = {
+    "c": 1.0, "core": 1.0, "cores": 1.0,
+}
+
+# Digits of the canonical number strings (absorbs 650 V * 0.001 style rounding)
+CANONICAL_DECIMALS = 6
+
+_NUMBER_WITH_UNIT = re.compile(r"^\s*(\d+(?:\.\d*)?|\.\d+)\s*-?\s*([a-z\u00b2][a-z0-9\u00b2\s.\-]*)?$")
+_UNIT_NOISE = re.compile(r"[\s.\-]+")
+
+
+
+# -----------------------------------------------------------
+# Parsing
+# -----------------------------------------------------------
+
+def _parse(value, units: Dict[str, float]):
+    """(number, factor or None for a bare number), or None when value is not a number + known unit."""
+    if value is None or isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        return (float(value), None) if math.isfinite(value) else None
+
+    match = _NUMBER_WITH_UNIT.match(str(value).lower())
+    if match is None:
+        return None
+    number = float(match.group(1))
+    unit = match.group(2)
+    if unit is None:
+        return number, None
+    factor = units.get(_UNIT_NOISE.sub("", unit))
+    if factor is None:
+        return None
+    return number, factor
+
+
+def parse_voltage_kv(value, bare_unit: Optional[str] = None) -> Optional[float]:
+    """
+    Voltage in kV. A bare number is read in bare_unit (the unit of its
+    voltage column, e.g. "kv"), and is None without one. None if unparseable.
+    """
+    parsed = _parse(value, VOLTAGE_UNITS_KV)
+    if parsed is None:
+        return None
+    number, factor = parsed
+    if factor is None:
+        factor = VOLTAGE_UNITS_KV.get(bare_unit)
+        if factor is None:
+            return None
+    # divide rather than multiply by 0.001: 650 / 1000 == 0.65 exactly
+    return number / 1000.0 if factor == 0.001 else number * factor
+
+
+def parse_size_sqmm(value) -> Optional[float]:
+    """Conductor size in sqmm; bare numbers are sqmm. None if unparseable."""
+    parsed = _parse(value, SIZE_UNITS_SQMM)
+    return None if parsed is None else parsed[0]
+
+
+def parse_core_count(value) -> Optional[float]:
+    """Number of cores (3.5 for 3.5 core cables). None if unparseable."""
+    parsed = _parse(value, CORE_UNITS)
+    return None if parsed is None else parsed[0]
+
+
+def canonical_number(number: float) -> str:
+    """Shortest string of a number: 11.0 -> "11", 0.65 -> "0.65"."""
+    number = round(number, CANONICAL_DECIMALS)
+    if number == int(number):
+        return str(int(number))
+    return repr(number)
+
+
+
+# -----------------------------------------------------------
+# Canonical spec strings
+# -----------------------------------------------------------
+
+def canonical_voltage(value, bare_unit: Optional[str] = None) -> str:
+    """
+    Voltage as a kV number string ("11000 V" -> "11"; bare numbers only with
+    a bare_unit, see parse_voltage_kv); other values as str(value).strip().
+    """
+    kv = parse_voltage_kv(value, bare_unit)
+    return canonical_number(kv) if kv is not None else str(value).strip()
+
+
+def canonical_size(value) -> str:
+    """Size as a sqmm number string ("2.5 sq.mm" -> "2.5"); unparseable values as str(value).strip()."""
+    size = parse_size_sqmm(value)
+    return canonical_number(size) if size is not None else str(value).strip()
+
+
+def canonical_cores(value) -> str:
+    """Core count as a number string ("3C" -> "3"); unparseable values as str(value).strip()."""
+    cores = parse_core_count(value)
+    return canonical_number(cores) if cores is not None else str(value).strip()
+
+
+
+# -----------------------------------------------------------
+# END OF MODULE
+# -----------------------------------------------------------
@@ -11,6 +11,8 @@ interface RfpData {
         total_material_cost?: number;
         total_test_cost?: number;
         grand_total_cost?: number;
+        unpriced_items?: number[];
+        complete?: boolean;
     };
     pricing_analysis?: {
         pricing_summary?: Array<{